@@ -0,0 +1,11 @@
+"""Benchmark module
+
+Benchmark suite measuring throughput, latency and peak memory
+of hashing, prime search, key generation, RSA and signatures.
+The results can be saved as JSON and compared against a baseline.
+"""
+
+from .suite import Case, Result, Regression, measure, run, compare
+from .cases import all_cases
+
+__all__ = ["Case", "Result", "Regression", "measure", "run", "compare", "all_cases"]
@@ -0,0 +1,317 @@
+"""The benchmark cases of kiv_bit_rsa.
+
+Each function yields :py:class:`Case` instances of one area, :py:func:`all_cases`
+yields all of them. The `quick` variants use smaller inputs and key sizes.
+"""
+
+import io
+import os
+import random
+import tempfile
+from functools import lru_cache
+from typing import Iterator
+
+from kiv_bit_rsa.bench.suite import Case
+from kiv_bit_rsa.hash import Md5, HashlibMd5
+from kiv_bit_rsa.math import random_prime, is_prime, PRIMALITY_POLICIES
+from kiv_bit_rsa.rsa import Rsa, PublicKey, PrivateKey, KeyPair, TomlKeyFormatter, BinaryKeyFormatter
+from kiv_bit_rsa.sign import Signature, HashTree, signable_file, TomlSignatureFormatter, BinarySignatureFormatter
+
+
+def size_name(size: int) -> str:
+    """Get human readable name of a size in bytes.
+
+    :param size: The size in bytes.
+    :return: The size name, e.g. "64KiB".
+    """
+
+    for unit in ["B", "KiB", "MiB"]:
+        if size < 1024 or size % 1024:
+            return "{}{}".format(size, unit)
+
+        size //= 1024
+
+    return "{}GiB".format(size)
+
+
+@lru_cache(maxsize=None)
+def _keys(bits: int) -> KeyPair:
+    """Get a key pair generated once per process.
+
+    :param bits: The key size in bits.
+    :return: The key pair.
+    """
+
+    return Rsa().generate_keys(bits, 65537)
+
+
+@lru_cache(maxsize=None)
+def _prime(bits: int) -> int:
+    """Get a random prime generated once per process.
+
+    :param bits: The prime size in bits.
+    :return: The prime.
+    """
+
+    return random_prime(bits)
+
+
+def _data(size: int) -> bytes:
+    """Get deterministic pseudo random data.
+
+    :param size: The data size in bytes.
+    :return: The data.
+    """
+
+    return random.Random(size).getrandbits(8 * size).to_bytes(size, "little") if size else b""
+
+
+def md5_cases(quick: bool = False) -> Iterator[Case]:
+    """Throughput of MD5 in MB/s for every compression engine and the hashlib backend.
+
+    :param quick: Use less input sizes.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [64, 64 * 1024] if quick else [64, 1024, 64 * 1024, 1024 * 1024]
+
+    def engine_setup(engine, data):
+        def setup():
+            def hash_data():
+                # the engine is global, so it is selected only for the call
+                previous = Md5.engine()
+                Md5.set_engine(engine)
+
+                try:
+                    return Md5(data).to_bytes()
+                finally:
+                    Md5.set_engine(previous)
+
+            return hash_data
+
+        return setup
+
+    for size in sizes:
+        data = _data(size)
+
+        for name in Md5.engines():
+            yield Case("md5.{}.{}".format(name, size_name(size)), engine_setup(name, data), "MB/s", size)
+
+        yield Case("md5.hashlib.{}".format(size_name(size)), lambda d=data: lambda: HashlibMd5(d).to_bytes(), "MB/s", size)
+
+    messages = [_data(i % 256) for i in range(100 if quick else 1000)]
+
+    yield Case("md5.hash_many", lambda: lambda: Md5.hash_many(messages), "msg/s", len(messages))
+
+
+def prime_cases(quick: bool = False) -> Iterator[Case]:
+    """Latency of random prime search and of confirming a prime by every primality policy in ms.
+
+    :param quick: Use smaller primes.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [256, 512] if quick else [512, 1024]
+
+    for bits in sizes:
+        yield Case("prime.random.{}".format(bits), lambda b=bits: lambda: random_prime(b), "ms", min_rounds=3)
+
+    def is_prime_setup(bits, policy):
+        prime = _prime(bits)
+        return lambda: is_prime(prime, policy=policy)
+
+    for bits in sizes:
+        for policy in PRIMALITY_POLICIES:
+            yield Case("prime.is_prime.{}.{}".format(policy, bits), lambda b=bits, p=policy: is_prime_setup(b, p), "ms")
+
+
+def keygen_cases(quick: bool = False) -> Iterator[Case]:
+    """Latency of key pair generation in ms.
+
+    :param quick: Use smaller keys.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [512, 1024] if quick else [1024, 2048]
+    rsa = Rsa()
+
+    for bits in sizes:
+        yield Case("keygen.{}".format(bits), lambda b=bits: lambda: rsa.generate_keys(b, 65537), "ms", min_rounds=3)
+
+
+def rsa_cases(quick: bool = False) -> Iterator[Case]:
+    """Encryption and decryption (with and without CRT) operations per second,
+    per message overhead of the single and batch API in messages per second,
+    throughput of parallel file decryption in MB/s and latency of creating
+    a collection of public keys in ms (see its peak memory).
+
+    The overhead is measured with a key with exponent 1, so the modular
+    power costs nearly nothing.
+
+    :param quick: Use smaller keys.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [512, 1024] if quick else [1024, 2048]
+    rsa = Rsa()
+    message = b"Hello world!"
+    file_size = 32 * 1024
+    overhead_messages = 1000
+    key_count = 10000
+
+    def encrypt_setup(bits):
+        key = _keys(bits).public_key
+        return lambda: rsa.encrypt(message, key)
+
+    def decrypt_setup(bits, crt):
+        keys = _keys(bits)
+        key = keys.private_key if crt else PrivateKey(keys.private_key.exp, keys.private_key.mod)
+        cipher = rsa.encrypt(message, keys.public_key)
+        return lambda: rsa.decrypt(cipher, key)
+
+    def overhead_setup(bits, method):
+        key = PublicKey(1, _keys(bits).public_key.mod)
+        messages = [_data(i % rsa.block_size(key)) for i in range(overhead_messages)]
+        ciphers = rsa.encrypt_many(messages, key)
+
+        if method == "encrypt":
+            return lambda: [rsa.encrypt(m, key) for m in messages]
+
+        if method == "decrypt":
+            return lambda: [rsa.decrypt(c, key) for c in ciphers]
+
+        if method == "encrypt_many":
+            return lambda: rsa.encrypt_many(messages, key)
+
+        return lambda: rsa.decrypt_many(ciphers, key)
+
+    def keys_setup(bits):
+        mod = _keys(bits).public_key.mod
+        return lambda: [PublicKey(65537, mod + 2 * i) for i in range(key_count)]
+
+    def decrypt_file_setup(bits, workers):
+        keys = _keys(bits)
+        cipher = io.BytesIO()
+        rsa.encrypt_file(io.BytesIO(_data(file_size)), cipher, keys.public_key)
+        return lambda: rsa.decrypt_file(io.BytesIO(cipher.getvalue()), io.BytesIO(), keys.private_key, workers)
+
+    for bits in sizes:
+        yield Case("rsa.encrypt.{}".format(bits), lambda b=bits: encrypt_setup(b), "ops/s")
+        yield Case("rsa.decrypt.{}".format(bits), lambda b=bits: decrypt_setup(b, True), "ops/s")
+        yield Case("rsa.decrypt.nocrt.{}".format(bits), lambda b=bits: decrypt_setup(b, False), "ops/s")
+
+        yield Case("rsa.keys.{}.{}".format(key_count, bits), lambda b=bits: keys_setup(b), "ms")
+
+        for method in ["encrypt", "encrypt_many", "decrypt", "decrypt_many"]:
+            yield Case("rsa.overhead.{}.{}".format(method, bits),
+                       lambda b=bits, m=method: overhead_setup(b, m),
+                       "msg/s",
+                       overhead_messages)
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            yield Case("rsa.decrypt_file.{}.{}".format(bits, workers),
+                       lambda b=bits, w=workers: decrypt_file_setup(b, w),
+                       "MB/s",
+                       file_size)
+
+
+def format_cases(quick: bool = False) -> Iterator[Case]:
+    """Parsing of private keys (with the CRT components) per second in TOML
+    (without and with the key cache) and binary format and parsing
+    of signatures per second in TOML and binary format.
+
+    :param quick: Use smaller keys.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [1024] if quick else [2048, 4096]
+
+    def parse_setup(formatter, bits):
+        data = formatter.to_bytes(_keys(bits).private_key)
+        return lambda: formatter.from_bytes(data)
+
+    for bits in sizes:
+        yield Case("key.toml.parse.{}".format(bits),
+                   lambda b=bits: parse_setup(TomlKeyFormatter(use_cache=False), b),
+                   "ops/s")
+        yield Case("key.toml.cached.{}".format(bits), lambda b=bits: parse_setup(TomlKeyFormatter(), b), "ops/s")
+        yield Case("key.binary.parse.{}".format(bits), lambda b=bits: parse_setup(BinaryKeyFormatter(), b), "ops/s")
+
+    def signature_setup(formatter):
+        keys = _keys(sizes[0])
+        data = formatter.to_bytes(Signature(Md5, bytes(keys.public_key.byte_size()), keys.public_key.fingerprint()))
+        return lambda: formatter.from_bytes(data)
+
+    yield Case("signature.toml.parse", lambda: signature_setup(TomlSignatureFormatter()), "ops/s")
+    yield Case("signature.binary.parse", lambda: signature_setup(BinarySignatureFormatter()), "ops/s")
+
+
+def signature_cases(quick: bool = False) -> Iterator[Case]:
+    """Latency of signing and verifying files in ms and throughput of the tree hash in MB/s.
+
+    The files are created in a temporary directory removed
+    when the iterator is exhausted.
+
+    :param quick: Use smaller files.
+    :return: Iterator of the cases.
+    """
+
+    sizes = [64 * 1024, 1024 * 1024] if quick else [64 * 1024, 1024 * 1024, 16 * 1024 * 1024]
+    bits = 1024
+
+    def sign_setup(path):
+        key = _keys(bits).private_key
+
+        def run():
+            with open(path, "rb") as file:
+                return Signature.sign(signable_file(file), Md5, key)
+
+        return run
+
+    def verify_setup(path):
+        keys = _keys(bits)
+
+        with open(path, "rb") as file:
+            signature = Signature.sign(signable_file(file), Md5, keys.private_key)
+
+        def run():
+            with open(path, "rb") as file:
+                return signature.verify(signable_file(file), keys.public_key)
+
+        return run
+
+    def tree_setup(path, workers):
+        return lambda: HashTree.compute(path, Md5, 512 * 1024, workers)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = os.path.join(directory, size_name(size))
+
+            with open(path, "wb") as file:
+                file.write(_data(size))
+
+            yield Case("signature.sign.{}".format(size_name(size)), lambda p=path: sign_setup(p), "ms")
+            yield Case("signature.verify.{}".format(size_name(size)), lambda p=path: verify_setup(p), "ms")
+
+        path = os.path.join(directory, size_name(sizes[-1]))
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            yield Case("tree.{}.{}".format(size_name(sizes[-1]), workers),
+                       lambda w=workers: tree_setup(path, w),
+                       "MB/s",
+                       sizes[-1])
+
+
+def all_cases(quick: bool = False) -> Iterator[Case]:
+    """All benchmark cases.
+
+    :param quick: Use smaller inputs and keys.
+    :return: Iterator of the cases.
+    """
+
+    yield from md5_cases(quick)
+    yield from prime_cases(quick)
+    yield from keygen_cases(quick)
+    yield from rsa_cases(quick)
+    yield from format_cases(quick)
+    yield from signature_cases(quick)
@@ -0,0 +1,257 @@
+"""Benchmark cases, measuring and comparing of the results."""
+
+from __future__ import annotations
+
+import platform
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List, Optional
+
+from kiv_bit_rsa.hash import Md5, get_backend
+
+UNITS = {
+    "MB/s": True,
+    "ops/s": True,
+    "msg/s": True,
+    "ms": False,
+}
+"""Units of the results - tells whether higher value is better"""
+
+
+class Case:
+    """A benchmark case.
+
+    The `setup` prepares the inputs (not measured) and returns the measured
+    function, which does `work` units of work (bytes, operations, messages...)
+    per call. The time per call is converted into the `unit`.
+    """
+
+    def __init__(self,
+                 name: str,
+                 setup: Callable[[], Callable[[], object]],
+                 unit: str,
+                 work: int = 1,
+                 min_rounds: int = 1):
+        """Initialize a benchmark case.
+
+        :param name: The case name, dot separated, e.g. "md5.unrolled.64KiB".
+        :param setup: Function returning the measured function.
+        :param unit: The result unit, one of :py:data:`UNITS`.
+        :param work: Amount of work done by one call of the measured function (bytes for MB/s, count for ops/s and msg/s).
+        :param min_rounds: Minimal number of calls of the measured function.
+        """
+
+        if unit not in UNITS:
+            raise ValueError("Unknown unit: {}".format(unit))
+
+        self.name = name
+        self.setup = setup
+        self.unit = unit
+        self.work = work
+        self.min_rounds = min_rounds
+
+    def value(self,
+              seconds: float) -> float:
+        """Convert time of one call to the value in the case unit.
+
+        :param seconds: Time of one call in seconds.
+        :return: The value.
+        """
+
+        if self.unit == "ms":
+            return seconds * 1000
+
+        if self.unit == "MB/s":
+            return self.work / seconds / 1e6
+
+        return self.work / seconds
+
+
+class Result:
+    """Result of a benchmark case."""
+
+    def __init__(self,
+                 name: str,
+                 value: float,
+                 unit: str,
+                 rounds: int,
+                 peak_memory: Optional[int] = None):
+        """Initialize a benchmark result.
+
+        :param name: The case name.
+        :param value: The measured value.
+        :param unit: The value unit.
+        :param rounds: Number of measured calls.
+        :param peak_memory: Peak memory allocated during one call in bytes, None when not measured.
+        """
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.rounds = rounds
+        self.peak_memory = peak_memory
+
+    @property
+    def higher_is_better(self) -> bool:
+        """Tells whether higher value is better."""
+        return UNITS[self.unit]
+
+    def to_dict(self) -> Dict:
+        """Convert the result to a JSON serializable dict.
+
+        :return: The result dict.
+        """
+
+        return {
+            "value": self.value,
+            "unit": self.unit,
+            "rounds": self.rounds,
+            "peak_memory": self.peak_memory,
+        }
+
+    @classmethod
+    def from_dict(cls,
+                  name: str,
+                  data: Dict) -> Result:
+        """Create result from a dict created by :py:meth:`to_dict`.
+
+        :param name: The case name.
+        :param data: The result dict.
+        :return: The result.
+        """
+
+        return Result(name, data["value"], data["unit"], data.get("rounds", 0), data.get("peak_memory"))
+
+
+class Regression:
+    """Change of a benchmark result against the baseline."""
+
+    def __init__(self,
+                 baseline: Result,
+                 result: Result):
+        """Initialize a change of results.
+
+        :param baseline: The baseline result.
+        :param result: The current result.
+        """
+        self.baseline = baseline
+        self.result = result
+
+    @property
+    def change(self) -> float:
+        """Get the relative improvement, negative for worse results."""
+
+        change = (self.result.value - self.baseline.value) / self.baseline.value
+
+        return change if self.result.higher_is_better else -change
+
+
+def measure(case: Case,
+            min_time: float = 0.5,
+            memory: bool = False) -> Result:
+    """Measure the benchmark case.
+
+    The case is called repeatedly for at least `min_time` seconds and
+    `min_rounds` calls. The peak memory is measured by :py:mod:`tracemalloc`
+    during one extra call, so the tracing does not slow down the timing.
+    Tracing slows down allocation heavy code (e.g. the pure Python MD5)
+    many times, so the memory is measured only on request.
+
+    :param case: The benchmark case.
+    :param min_time: Minimal measured time in seconds.
+    :param memory: Measure also the peak memory.
+    :return: The result.
+    """
+
+    func = case.setup()
+    rounds = 0
+    start = time.perf_counter()
+
+    while True:
+        func()
+        rounds += 1
+        elapsed = time.perf_counter() - start
+
+        if elapsed >= min_time and rounds >= case.min_rounds:
+            break
+
+    if not memory:
+        return Result(case.name, case.value(elapsed / rounds), case.unit, rounds)
+
+    tracing = tracemalloc.is_tracing()
+
+    if not tracing:
+        tracemalloc.start()
+    elif hasattr(tracemalloc, "reset_peak"):
+        tracemalloc.reset_peak()
+
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    return Result(case.name, case.value(elapsed / rounds), case.unit, rounds, max(0, peak - base))
+
+
+def run(cases: Iterable[Case],
+        min_time: float = 0.5,
+        name_filter: Optional[str] = None,
+        memory: bool = False,
+        progress: Optional[Callable[[Result], None]] = None) -> Dict:
+    """Run the benchmark cases.
+
+    :param cases: The benchmark cases.
+    :param min_time: Minimal measured time of a case in seconds.
+    :param name_filter: Run only cases with the name containing this string.
+    :param memory: Measure also the peak memory.
+    :param progress: Function called with every result.
+    :return: The JSON serializable report.
+    """
+
+    results = {}
+
+    for case in cases:
+        if name_filter and name_filter not in case.name:
+            continue
+
+        result = measure(case, min_time, memory)
+        results[result.name] = result.to_dict()
+
+        if progress:
+            progress(result)
+
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "hash-backend": get_backend(),
+        "md5-engine": Md5.engine(),
+        "results": results,
+    }
+
+
+def compare(baseline: Dict,
+            report: Dict,
+            threshold: float = 0.1) -> List[Regression]:
+    """Compare the benchmark report against the baseline report.
+
+    :param baseline: The baseline report.
+    :param report: The current report.
+    :param threshold: Relative worsening considered as regression.
+    :return: The results of cases present in both reports worse by more than the `threshold`.
+    """
+
+    regressions = []
+
+    for name, data in report["results"].items():
+        if name not in baseline.get("results", {}):
+            continue
+
+        change = Regression(Result.from_dict(name, baseline["results"][name]), Result.from_dict(name, data))
+
+        if change.baseline.value > 0 and change.change < -threshold:
+            regressions.append(change)
+
+    return regressions
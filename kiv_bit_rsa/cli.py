@@ -4,77 +4,108 @@ Consists of key generation, encryption/decryption and file
 signing and verifying
 """
 
+import contextlib
+import json
+import os
+import signal
+
 import click
 
-from kiv_bit_rsa.hash import Md5
-from kiv_bit_rsa.rsa import Rsa, TomlKeyFormatter, KeyFormatError
-from kiv_bit_rsa.rsa.rsa import DecryptError
-from kiv_bit_rsa.sign import SignableBinaryIO, Signature
-from kiv_bit_rsa.sign.signature_formatter import TomlSignatureFormatter, SignatureFormatError
+from kiv_bit_rsa.hash import Md5, get_hash_class
+from kiv_bit_rsa.rsa import Rsa, TomlKeyFormatter, BinaryKeyFormatter, KeyFormatError, load_key
+from kiv_bit_rsa.rsa.rsa import DecryptError, PublicExponentError
+from kiv_bit_rsa.sign import ManifestError, read_manifest, verify_many, sign_directory, verify_directory
+from kiv_bit_rsa.sign.directory import relative_exclude
+from kiv_bit_rsa.sign import DigestCache, DigestCacheError, SignableIncrementalIO, SignableTree, Signature, TreeSignature, signable_file
+from kiv_bit_rsa.sign.tree import DEFAULT_LEAF_SIZE
+from kiv_bit_rsa.sign.signature_formatter import TomlSignatureFormatter, BinarySignatureFormatter, SignatureFormatError
+from kiv_bit_rsa.sign.signature_formatter import load_signature
+from kiv_bit_rsa.sign.checkpoint_formatter import TomlCheckpointFormatter, CheckpointFormatError
 
 
 @click.group()
-def cli():
+@click.option('--daemon', default=None, envvar='MKRSA_DAEMON', type=click.Path(dir_okay=False), help='socket of a running "mkrsa serve" daemon, which then signs, verifies, encrypts and decrypts with its keys')
+@click.pass_context
+def cli(ctx, daemon):
     """RSA cipher utilities for encryption/decryption and signing/verifying files."""
-    pass
+    ctx.obj = daemon
 
 
 @click.command()
 @click.option('-b', '--bits', default=2048, type=click.IntRange(16, 8192), help='number of bits for storing key modulus n')
-@click.option('-d', '--private_key_file', 'private', default="rsa-key.private.toml", type=click.File('w'), help='filepath where to store private key')
-@click.option('-e', '--public_key_file', 'public', default="rsa-key.public.toml", type=click.File('w'), help='filepath where to store public key')
-def keygen(bits, private, public):
+@click.option('-d', '--private_key_file', 'private', default=None, type=click.File('wb'), help='filepath where to store private key [default: rsa-key.private.toml or .bin]')
+@click.option('-e', '--public_key_file', 'public', default=None, type=click.File('wb'), help='filepath where to store public key [default: rsa-key.public.toml or .bin]')
+@click.option('-f', '--format', 'key_format', default="toml", type=click.Choice(["toml", "binary"]), help='format of the key files')
+@click.option('-x', '--public_exponent', '--public-exponent', 'public_exponent', default=None, type=click.IntRange(3, None), help='fixed public exponent, e.g. 65537 [default: random]')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1, None), help='number of worker processes searching the primes')
+def keygen(bits, private, public, key_format, public_exponent, jobs):
     """Generate pair of RSA keys."""
 
     rsa = Rsa()
-    keys = rsa.generate_keys(bits)
 
-    formatter = TomlKeyFormatter()
+    try:
+        keys = rsa.generate_keys(bits, public_exponent, jobs)
+    except PublicExponentError:
+        click.echo("ERROR: Public exponent must be an odd number bigger than 2")
+        return
+
+    formatter = TomlKeyFormatter() if key_format == "toml" else BinaryKeyFormatter()
+    extension = "toml" if key_format == "toml" else "bin"
 
-    private.write(formatter.to_string(keys.private_key))
-    public.write(formatter.to_string(keys.public_key))
+    private = private or click.open_file("rsa-key.private." + extension, "wb")
+    public = public or click.open_file("rsa-key.public." + extension, "wb")
+
+    with private, public:
+        private.write(formatter.to_bytes(keys.private_key))
+        public.write(formatter.to_bytes(keys.public_key))
 
 
 @click.command()
-@click.option('-k', '--key_file', 'key', required=True, type=click.File("r"), help='filepath of the encryption key')
+@click.option('-k', '--key_file', 'key', default=None, type=click.File("rb"), help='filepath of the encryption key [required without --daemon]')
 @click.option('-p', '--plaintext', 'plaintext', type=click.File('rb'), help='filepath where to read plaintext from')
 @click.option('-c', '--cipher', 'cipher', type=click.File('wb'), help='filepath where to print the cipher into')
-def encrypt(key, plaintext, cipher):
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1, None), help='number of worker processes encrypting the blocks')
+@click.pass_obj
+def encrypt(daemon, key, plaintext, cipher, jobs):
     """Encrypt a message using the RSA key."""
 
+    if daemon:
+        cipher.write(_daemon_request(daemon, key, lambda client: client.encrypt(plaintext.read())))
+        return
+
     rsa = Rsa()
 
     try:
-        k = TomlKeyFormatter().from_string(key.read())
+        k = load_key(_require_key(key).read())
 
-        p = plaintext.read()
-        c = rsa.encrypt(p, k)
-
-        cipher.write(c)
+        rsa.encrypt_file(plaintext, cipher, k, jobs)
 
     except KeyFormatError:
         click.echo("ERROR: Key is in bad format")
 
     except OverflowError:
-        click.echo("ERROR: Message is to long for encryption with the given key.")
+        click.echo("ERROR: Key is too short for encryption.")
 
 
 @click.command()
-@click.option('-k', '--key_file', 'key', required=True, type=click.File("r"), help='filepath of the decryption key')
+@click.option('-k', '--key_file', 'key', default=None, type=click.File("rb"), help='filepath of the decryption key [required without --daemon]')
 @click.option('-c', '--cipher', 'cipher', type=click.File('rb'), help='filepath where to read cipher from')
 @click.option('-p', '--plaintext', 'plaintext', type=click.File('wb'), help='filepath where to print plaintext into')
-def decrypt(key, cipher, plaintext):
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1, None), help='number of worker processes decrypting the blocks')
+@click.pass_obj
+def decrypt(daemon, key, cipher, plaintext, jobs):
     """Decrypt a message using the RSA key."""
 
+    if daemon:
+        plaintext.write(_daemon_request(daemon, key, lambda client: client.decrypt(cipher.read())))
+        return
+
     rsa = Rsa()
 
     try:
-        k = TomlKeyFormatter().from_string(key.read())
-
-        c = cipher.read()
-        p = rsa.decrypt(c, k)
+        k = load_key(_require_key(key).read())
 
-        plaintext.write(p)
+        rsa.decrypt_file(cipher, plaintext, k, jobs)
 
     except KeyFormatError:
         click.echo("ERROR: Key is in bad format")
@@ -84,34 +115,278 @@ def decrypt(key, cipher, plaintext):
 
 
 @click.command()
-@click.option('-k', '--key_file', 'key', required=True, type=click.File("r"), help='filepath of the signing key')
+@click.option('-k', '--key_file', 'key', default=None, type=click.File("rb"), help='filepath of the signing key [required without --daemon]')
 @click.option('-f', '--file', 'file', required=True, type=click.File('rb'), help='filepath of the file that will be signed')
-@click.option('-s', '--signature_file', 'sign', default="signature.toml", type=click.File('w'), help='filepath where to store the signature')
-def sign(key, file, sign):
+@click.option('-s', '--signature_file', 'sign', default=None, type=click.File('wb'), help='filepath where to store the signature [default: signature.toml or .bin]')
+@click.option('--format', 'signature_format', default="toml", type=click.Choice(["toml", "binary"]), help='format of the signature file')
+@click.option('-i', '--incremental', is_flag=True, help='resume hashing of an append-only file from the checkpoint (a replaced file, truncation or a change of a file up to 256 KiB or of 64 sampled 4 KiB windows of a larger file is detected, other in-place rewrites are not)')
+@click.option('-c', '--checkpoint_file', 'checkpoint', type=click.Path(dir_okay=False), help='filepath of the hash checkpoint for --incremental [default: FILE.checkpoint.toml]')
+@click.option('-t', '--tree', is_flag=True, help='sign a tree hash of the file computed in parallel')
+@click.option('--leaf_size', default=DEFAULT_LEAF_SIZE, type=click.IntRange(1, None), help='size of the tree hash leaves in bytes')
+@click.option('-j', '--jobs', default=None, type=click.IntRange(1, None), help='number of worker processes [default: number of CPUs]')
+@click.option('--digest_cache', default=None, type=click.Path(dir_okay=False), envvar='MKRSA_DIGEST_CACHE', help='filepath of the persistent cache of file digests [default: $MKRSA_DIGEST_CACHE or no cache]')
+@click.pass_obj
+def sign(daemon, key, file, sign, signature_format, incremental, checkpoint, tree, leaf_size, jobs, digest_cache):
     """Sign a file using the MD5 hash and RSA key."""
 
+    extension = "toml" if signature_format == "toml" else "bin"
+
+    if daemon:
+        if incremental or tree:
+            raise click.UsageError("--incremental and --tree can not be used with --daemon")
+
+        data = _daemon_request(daemon, key, lambda client: client.sign(file.read(), signature_format))
+
+        with sign or click.open_file("signature." + extension, "wb") as f:
+            f.write(data)
+
+        return
+
     try:
-        key = TomlKeyFormatter().from_string(key.read())
-        signature = Signature.sign(SignableBinaryIO(file), Md5, key)
+        key = load_key(_require_key(key).read())
+
+        if incremental:
+            signature = _sign_incremental(file, key, checkpoint or file.name + ".checkpoint.toml")
+        elif tree:
+            signature = TreeSignature.sign(SignableTree(file.name, leaf_size, jobs), get_hash_class("MD5"), key)
+        else:
+            with _open_digest_cache(digest_cache) as cache:
+                signature = Signature.sign(signable_file(file, cache), get_hash_class("MD5"), key)
 
-        sign.write(TomlSignatureFormatter().to_string(signature))
+        formatter = TomlSignatureFormatter() if signature_format == "toml" else BinarySignatureFormatter()
+
+        with sign or click.open_file("signature." + extension, "wb") as f:
+            f.write(formatter.to_bytes(signature))
 
     except KeyFormatError:
         click.echo("ERROR: Key is in bad format")
 
+    except DigestCacheError as e:
+        click.echo("ERROR: Digest cache can not be used: {}".format(e))
+
+
+def _sign_incremental(file, key, checkpoint_path):
+    """Sign an append-only file, hash only the bytes appended since the checkpoint.
+
+    :param file: The file to sign.
+    :param key: The signing key.
+    :param checkpoint_path: Filepath of the checkpoint, it is updated after signing.
+    :return: The signature.
+    """
+
+    formatter = TomlCheckpointFormatter()
+    checkpoint = None
+
+    if os.path.exists(checkpoint_path):
+        try:
+            with open(checkpoint_path, "r") as f:
+                checkpoint = formatter.from_string(f.read())
+        except CheckpointFormatError:
+            click.echo("WARNING: Checkpoint is in bad format, hashing the whole file")
+
+    signable = SignableIncrementalIO(file, checkpoint)
+    signature = Signature.sign(signable, Md5, key)
+
+    if checkpoint and not signable.resumed:
+        click.echo("WARNING: File was truncated or rewritten since the checkpoint, hashed the whole file")
+
+    # replace the checkpoint atomically
+    with open(checkpoint_path + ".tmp", "w") as f:
+        f.write(formatter.to_string(signable.checkpoint))
+
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+    return signature
+
 
 @click.command()
-@click.option('-k', '--key_file', 'key', required=True, type=click.File("r"), help='filepath of the decryption key')
+@click.option('-k', '--key_file', 'key', default=None, type=click.File("rb"), help='filepath of the decryption key [required without --daemon]')
 @click.option('-f', '--file', 'file', required=True, type=click.File('rb'), help='filepath of the file that will be verified')
-@click.option('-s', '--signature_file', 'sign', default="signature.toml", type=click.File('r'), help='filepath of the signature')
-def verify(key, file, sign):
+@click.option('-s', '--signature_file', 'sign', default=None, type=click.File('rb'), help='filepath of the signature (TOML or binary) [default: signature.toml, or signature.bin when it does not exist]')
+@click.option('-r', '--range', 'byte_range', default=None, help='verify only bytes START:END of the file (tree hash signatures only)')
+@click.option('-j', '--jobs', default=None, type=click.IntRange(1, None), help='number of worker processes for tree hash signatures [default: number of CPUs]')
+@click.option('--digest_cache', default=None, type=click.Path(dir_okay=False), envvar='MKRSA_DIGEST_CACHE', help='filepath of the persistent cache of file digests [default: $MKRSA_DIGEST_CACHE or no cache]')
+@click.pass_obj
+def verify(daemon, key, file, sign, byte_range, jobs, digest_cache):
     """Verify a signed file."""
 
+    sign = sign or _default_signature_file()
+
+    try:
+        if daemon:
+            if byte_range is not None:
+                raise click.UsageError("--range can not be used with --daemon")
+
+            verified = _daemon_request(daemon, key, lambda client: client.verify(file.read(), sign.read()))
+        else:
+            verified = _verify(load_key(_require_key(key).read()), file, sign, byte_range, jobs, digest_cache)
+
+        if verified:
+            click.echo("---verified---")
+            exit(0)
+        else:
+            click.echo("---denied---")
+            exit(1)
+
+    except KeyFormatError:
+        click.echo("ERROR: Key is in bad format")
+
+    except SignatureFormatError:
+        click.echo("ERROR: Signature is in bad format")
+
+    except DigestCacheError as e:
+        click.echo("ERROR: Digest cache can not be used: {}".format(e))
+
+
+def _default_signature_file():
+    """Open the default signature file written by sign - signature.toml or signature.bin.
+
+    :raise click.BadParameter: When neither of the files exists.
+    :return: The opened signature file.
+    """
+
+    for path in ("signature.toml", "signature.bin"):
+        if os.path.exists(path):
+            return click.open_file(path, "rb")
+
+    raise click.BadParameter("Neither signature.toml nor signature.bin exists", param_hint="--signature_file")
+
+
+def _verify(key, file, sign, byte_range, jobs, digest_cache):
+    """Verify a signed file in this process.
+
+    :param key: The decryption key.
+    :param file: The file to verify.
+    :param sign: The signature file.
+    :param byte_range: Verify only bytes START:END of the file, None for the whole file.
+    :param jobs: Number of worker processes for tree hash signatures.
+    :param digest_cache: The digest cache filepath, None when disabled.
+    :return: True if the file matches the signature.
+    """
+
+    signature = load_signature(sign.read())
+
+    if byte_range is not None:
+        if not isinstance(signature, TreeSignature):
+            click.echo("ERROR: Only tree hash signatures can verify a byte range")
+            exit(2)
+
+        start, end = _parse_range(byte_range)
+        return signature.verify_range(file, key, start, end)
+
+    if isinstance(signature, TreeSignature):
+        return signature.verify(SignableTree(file.name, signature.tree.leaf_size, jobs), key)
+
+    with _open_digest_cache(digest_cache) as cache:
+        return signature.verify(signable_file(file, cache), key)
+
+
+@click.command()
+@click.option('-k', '--key_file', 'key', required=True, type=click.File("rb"), help='filepath of the decryption key')
+@click.option('-m', '--manifest', required=True, type=click.File('r'), help='filepath of the manifest with lines FILE<TAB>SIGNATURE')
+@click.option('-j', '--jobs', default=None, type=click.IntRange(1, None), help='number of worker processes [default: number of CPUs]')
+@click.option('--digest_cache', default=None, type=click.Path(dir_okay=False), envvar='MKRSA_DIGEST_CACHE', help='filepath of the persistent cache of file digests [default: $MKRSA_DIGEST_CACHE or no cache]')
+def verify_many_command(key, manifest, jobs, digest_cache):
+    """Verify many signed files listed in a manifest.
+
+    Prints one JSON line per file. Exits with code 0 when all files
+    are verified, 1 when some file is denied and 2 on errors.
+    """
+
+    try:
+        key = load_key(key.read())
+        base_dir = os.path.dirname(manifest.name) if manifest.name != "<stdin>" else "."
+        entries = read_manifest(manifest, base_dir)
+        results = verify_many(entries, key, jobs, digest_cache)
+
+    except KeyFormatError:
+        click.echo("ERROR: Key is in bad format", err=True)
+        exit(2)
+
+    except DigestCacheError as e:
+        click.echo("ERROR: Digest cache can not be used: {}".format(e), err=True)
+        exit(2)
+
+    except ManifestError as e:
+        click.echo("ERROR: Manifest is in bad format: {}".format(e), err=True)
+        exit(2)
+
+    code = 0
+
+    for result in results:
+        click.echo(json.dumps(result.to_dict()))
+
+        if result.error:
+            code = 2
+        elif not result.verified:
+            code = max(code, 1)
+
+    exit(code)
+
+
+@click.command()
+@click.option('-k', '--key_file', 'key', required=True, type=click.File("rb"), help='filepath of the signing key')
+@click.option('-d', '--directory', required=True, type=click.Path(exists=True, file_okay=False), help='the directory that will be signed')
+@click.option('-m', '--manifest', default=None, type=click.Path(dir_okay=False), help='filepath where to store the manifest [default: DIRECTORY.manifest]')
+@click.option('-s', '--signature_file', 'sign', default=None, type=click.Path(dir_okay=False), help='filepath where to store the signature of the manifest [default: MANIFEST.signature.toml or .bin]')
+@click.option('--format', 'signature_format', default="toml", type=click.Choice(["toml", "binary"]), help='format of the signature file')
+@click.option('-j', '--jobs', default=None, type=click.IntRange(1, None), help='number of worker processes hashing the files [default: number of CPUs]')
+@click.option('--digest_cache', default=None, type=click.Path(dir_okay=False), envvar='MKRSA_DIGEST_CACHE', help='filepath of the persistent cache of file digests [default: $MKRSA_DIGEST_CACHE or no cache]')
+def sign_tree(key, directory, manifest, sign, signature_format, jobs, digest_cache):
+    """Sign all files of a directory by a single signed manifest.
+
+    The manifest lists digest, size and path of every file,
+    only the manifest digest is signed.
+    """
+
+    formatter = TomlSignatureFormatter() if signature_format == "toml" else BinarySignatureFormatter()
+    extension = "toml" if signature_format == "toml" else "bin"
+    manifest = manifest or os.path.normpath(directory) + ".manifest"
+    sign = sign or manifest + ".signature." + extension
+
+    try:
+        key = load_key(key.read())
+        exclude = relative_exclude(directory, [manifest, sign] + _digest_cache_files(digest_cache))
+
+        with open(manifest, "wb") as f:
+            signature = sign_directory(directory, f, get_hash_class("MD5"), key, jobs, exclude, digest_cache)
+
+        with open(sign, "wb") as f:
+            f.write(formatter.to_bytes(signature))
+
+    except KeyFormatError:
+        click.echo("ERROR: Key is in bad format")
+        exit(2)
+
+    except DigestCacheError as e:
+        click.echo("ERROR: Digest cache can not be used: {}".format(e))
+        exit(2)
+
+    except OSError as e:
+        click.echo("ERROR: {}".format(e))
+        exit(2)
+
+
+@click.command()
+@click.option('-k', '--key_file', 'key', required=True, type=click.File("rb"), help='filepath of the decryption key')
+@click.option('-d', '--directory', required=True, type=click.Path(exists=True, file_okay=False), help='the directory that will be verified')
+@click.option('-s', '--signature_file', 'sign', required=True, type=click.File('rb'), help='filepath of the manifest signature (TOML or binary)')
+@click.option('-m', '--manifest', default=None, type=click.Path(dir_okay=False), help='filepath of the manifest, skipped when it lies in the directory')
+@click.option('-j', '--jobs', default=None, type=click.IntRange(1, None), help='number of worker processes hashing the files [default: number of CPUs]')
+@click.option('--digest_cache', default=None, type=click.Path(dir_okay=False), envvar='MKRSA_DIGEST_CACHE', help='filepath of the persistent cache of file digests [default: $MKRSA_DIGEST_CACHE or no cache]')
+def verify_tree(key, directory, sign, manifest, jobs, digest_cache):
+    """Verify a directory signed by sign-tree.
+
+    The manifest is computed again from the directory,
+    so changed, added and removed files are all detected.
+    """
+
     try:
-        key = TomlKeyFormatter().from_string(key.read())
-        signature = TomlSignatureFormatter().from_string(sign.read())
+        key = load_key(key.read())
+        signature = load_signature(sign.read())
+        exclude = relative_exclude(directory, [manifest, sign.name] + _digest_cache_files(digest_cache))
 
-        if signature.verify(SignableBinaryIO(file), key):
+        if verify_directory(directory, signature, key, jobs, exclude, digest_cache):
             click.echo("---verified---")
             exit(0)
         else:
@@ -124,12 +399,229 @@ def verify(key, file, sign):
     except SignatureFormatError:
         click.echo("ERROR: Signature is in bad format")
 
+    except DigestCacheError as e:
+        click.echo("ERROR: Digest cache can not be used: {}".format(e))
+
+    except OSError as e:
+        click.echo("ERROR: {}".format(e))
+
+    exit(2)
+
+
+@click.command()
+@click.option('-s', '--socket', 'socket_path', default="mkrsa.sock", type=click.Path(dir_okay=False), help='filepath of the Unix domain socket to listen on')
+@click.option('-d', '--private_key_file', 'private', default=None, type=click.File('rb'), help='filepath of the private key used for signing and decryption')
+@click.option('-e', '--public_key_file', 'public', default=None, type=click.File('rb'), help='filepath of the public key used for verifying and encryption')
+@click.option('-j', '--jobs', default=1, type=click.IntRange(1, None), help='number of worker processes')
+@click.option('--batch_size', default=None, type=click.IntRange(1, None), help='maximal number of requests processed by one worker task [default: 64]')
+def serve(socket_path, private, public, jobs, batch_size):
+    """Run a daemon signing, verifying, encrypting and decrypting on request.
+
+    The keys are loaded once and the requests are received on a Unix domain
+    socket, use "mkrsa --daemon SOCKET COMMAND" to send them. Runs until
+    interrupted by SIGINT or SIGTERM.
+    """
+
+    # the daemon is imported only here, so the other commands do not pay its import time
+    import asyncio
+    from kiv_bit_rsa.daemon.server import BATCH_SIZE, Server, SocketInUseError
+
+    if not private and not public:
+        raise click.UsageError("At least one of --private_key_file and --public_key_file is required")
+
+    try:
+        private_key = load_key(private.read()) if private else None
+        public_key = load_key(public.read()) if public else None
+
+    except KeyFormatError:
+        click.echo("ERROR: Key is in bad format")
+        exit(2)
+
+    try:
+        asyncio.run(_serve(Server(private_key, public_key, jobs, batch_size or BATCH_SIZE), socket_path))
+
+    except SocketInUseError as e:
+        click.echo("ERROR: {}".format(e))
+        exit(2)
+
+
+async def _serve(server, socket_path):
+    """Serve the requests on the socket until SIGINT or SIGTERM.
+
+    :param server: The daemon.
+    :param socket_path: Filepath of the Unix domain socket.
+    """
+
+    import asyncio
+
+    loop = asyncio.get_event_loop()
+    stop = loop.create_future()
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, lambda: stop.done() or stop.set_result(None))
+
+    async with server:
+        listener = await server.serve_unix(socket_path)
+        created = os.stat(socket_path)
+
+        try:
+            await stop
+        finally:
+            listener.close()
+
+            # the socket may have been replaced by another daemon meanwhile
+            try:
+                if os.path.samestat(os.stat(socket_path), created):
+                    os.unlink(socket_path)
+            except FileNotFoundError:
+                pass
+
+
+def _require_key(key):
+    """Get the key file, which is required without a daemon.
+
+    :param key: The key file or None.
+    :raise click.UsageError: When the key file is None.
+    :return: The key file.
+    """
+
+    if key is None:
+        raise click.UsageError('Missing option "-k" / "--key_file".')
+
+    return key
+
+
+def _daemon_request(daemon, key, call):
+    """Send a request to the daemon, exit with an error message on failure.
+
+    :param daemon: Filepath of the daemon socket.
+    :param key: The key file, must be None as the daemon holds the keys.
+    :param call: Function sending the request through the given :py:class:`Client`.
+    :return: The result of the `call`.
+    """
+
+    if key is not None:
+        raise click.UsageError("--key_file can not be used with --daemon, the daemon holds the keys")
+
+    # only the thin client, the daemon server is not imported
+    from kiv_bit_rsa.daemon.client import Client, DaemonError
+    from kiv_bit_rsa.daemon.protocol import ProtocolError
+
+    try:
+        with Client.connect(daemon) as client:
+            return call(client)
+
+    except DaemonError as e:
+        click.echo("ERROR: {}".format(e))
+
+    except (OSError, ProtocolError) as e:
+        click.echo("ERROR: Daemon is not available: {}".format(e))
+
+    exit(2)
+
+
+def _open_digest_cache(path):
+    """Open the digest cache, if enabled.
+
+    :param path: The digest cache filepath, None when disabled.
+    :return: Context manager of the cache, of None when disabled.
+    """
+
+    if path is None:
+        return contextlib.nullcontext()
+
+    return DigestCache(path)
+
+
+def _digest_cache_files(path):
+    """Get the files of the digest cache, so they can be left out of signed directories.
+
+    :param path: The digest cache filepath, None when disabled.
+    :return: The filepaths.
+    """
+
+    if path is None:
+        return []
+
+    return [path, path + "-journal"]
+
+
+def _parse_range(byte_range):
+    """Parse byte range in format START:END.
+
+    :param byte_range: The byte range string.
+    :return: Tuple (start, end).
+    """
+
+    try:
+        start, end = (int(i) for i in byte_range.split(":"))
+    except ValueError:
+        raise click.BadParameter("Byte range must be in format START:END", param_hint="--range")
+
+    if start < 0 or end < start:
+        raise click.BadParameter("Byte range must satisfy 0 <= START <= END", param_hint="--range")
+
+    return start, end
+
+
+@click.command()
+@click.option('-q', '--quick', is_flag=True, help='use smaller inputs and keys')
+@click.option('-f', '--filter', 'name_filter', default=None, help='run only benchmarks with the name containing this string')
+@click.option('-t', '--min_time', default=0.5, type=click.FloatRange(0, None), help='minimal measured time of a benchmark in seconds')
+@click.option('-m', '--memory', is_flag=True, help='measure also peak memory of the benchmarks (slow)')
+@click.option('-o', '--output', default="-", type=click.File('w'), help='filepath where to store the JSON results [default: stdout]')
+@click.option('-c', '--compare', 'baseline', default=None, type=click.File('r'), help='filepath of the JSON results to compare against')
+@click.option('--threshold', default=0.1, type=click.FloatRange(0, None), help='relative worsening considered as regression')
+def benchmark(quick, name_filter, min_time, memory, output, baseline, threshold):
+    """Run the benchmarks and optionally compare them against a baseline.
+
+    Exits with code 1 when some benchmark regressed.
+    """
+
+    from kiv_bit_rsa import bench
+
+    if baseline:
+        try:
+            baseline = json.load(baseline)
+        except ValueError:
+            click.echo("ERROR: Baseline is not a valid JSON", err=True)
+            exit(2)
+
+    def progress(result):
+        line = "{:<40} {:>14.3f} {}".format(result.name, result.value, result.unit)
+
+        if result.peak_memory is not None:
+            line += " (peak memory {} KiB)".format(result.peak_memory // 1024)
+
+        click.echo(line, err=True)
+
+    report = bench.run(bench.all_cases(quick), min_time, name_filter, memory, progress)
+
+    output.write(json.dumps(report, indent=2) + "\n")
+
+    if baseline:
+        regressions = bench.compare(baseline, report, threshold)
+
+        for regression in regressions:
+            click.echo("REGRESSION: {} {:.3f} -> {:.3f} {} ({:+.1%})".format(regression.result.name,
+                                                                          regression.baseline.value,
+                                                                          regression.result.value,
+                                                                          regression.result.unit,
+                                                                          regression.change), err=True)
+
+        exit(1 if regressions else 0)
+
 
 cli.add_command(keygen)
 cli.add_command(encrypt)
 cli.add_command(decrypt)
 cli.add_command(sign)
 cli.add_command(verify)
+cli.add_command(verify_many_command, "verify-many")
+cli.add_command(sign_tree, "sign-tree")
+cli.add_command(verify_tree, "verify-tree")
+cli.add_command(serve)
+cli.add_command(benchmark, "bench")
 
 
 if __name__ == '__main__':
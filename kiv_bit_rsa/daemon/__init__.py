@@ -0,0 +1,25 @@
+"""Daemon module
+
+A long-running daemon holding the keys loaded once and serving sign,
+verify, encrypt and decrypt requests over a Unix domain socket,
+together with a thin client.
+
+The server is imported on first use, so the client does not pay
+the import time of asyncio and multiprocessing.
+"""
+
+from .protocol import ProtocolError, encode_message, read_message, write_message, send_message, recv_message
+from .client import Client, DaemonError
+
+_SERVER_NAMES = {"Server", "RequestError", "SocketInUseError"}
+
+__all__ = ["Server", "Client", "ProtocolError", "RequestError", "SocketInUseError", "DaemonError", "encode_message", "read_message",
+           "write_message", "send_message", "recv_message"]
+
+
+def __getattr__(name):
+    if name in _SERVER_NAMES:
+        from . import server
+        return getattr(server, name)
+
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
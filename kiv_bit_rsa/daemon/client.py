@@ -0,0 +1,124 @@
+"""Thin blocking client of the daemon."""
+
+from __future__ import annotations
+
+import socket
+from typing import Dict
+
+from kiv_bit_rsa.daemon.protocol import Message, send_message, recv_message
+from kiv_bit_rsa.exception import KivBitRsaError
+
+
+class DaemonError(KivBitRsaError):
+    """Daemon failed to process the request"""
+
+
+class Client:
+    """Blocking client of the daemon, one request at a time."""
+
+    def __init__(self,
+                 sock: socket.socket):
+        """Initialize a client of a connected socket.
+
+        :param sock: The socket connected to the daemon, e.g. one end of :py:func:`socket.socketpair`.
+        """
+        self._socket = sock
+
+    @classmethod
+    def connect(cls,
+                path: str) -> Client:
+        """Connect to the daemon listening on a Unix domain socket.
+
+        :param path: The socket filepath.
+        :raise OSError: When the daemon is not listening.
+        :return: The client.
+        """
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            raise
+
+        return cls(sock)
+
+    def request(self,
+                header: Dict,
+                data: bytes = b"") -> Message:
+        """Send a request and wait for the response.
+
+        :param header: The request header.
+        :param data: The request data.
+        :raise DaemonError: When the daemon reports a failure.
+        :return: Tuple (response header, response data).
+        """
+
+        send_message(self._socket, header, data)
+        header, data = recv_message(self._socket)
+
+        if not header.get("ok"):
+            raise DaemonError(header.get("error", "Unknown error"))
+
+        return header, data
+
+    def ping(self):
+        """Check that the daemon responds."""
+        self.request({"op": "ping"})
+
+    def sign(self,
+             message: bytes,
+             signature_format: str = "binary") -> bytes:
+        """Sign the message by the private key of the daemon.
+
+        :param message: The message.
+        :param signature_format: Format of the signature, "toml" or "binary".
+        :return: The formatted signature.
+        """
+
+        return self.request({"op": "sign", "format": signature_format}, message)[1]
+
+    def verify(self,
+               message: bytes,
+               signature: bytes) -> bool:
+        """Verify the message by the public key of the daemon.
+
+        :param message: The message.
+        :param signature: The formatted signature (TOML or binary).
+        :return: True if the message matches the signature.
+        """
+
+        header, _ = self.request({"op": "verify", "signature_size": len(signature)}, signature + message)
+
+        return bool(header.get("verified"))
+
+    def encrypt(self,
+                plaintext: bytes) -> bytes:
+        """Encrypt the plaintext by the public key of the daemon.
+
+        :param plaintext: The plaintext.
+        :return: The cipher.
+        """
+
+        return self.request({"op": "encrypt"}, plaintext)[1]
+
+    def decrypt(self,
+                cipher: bytes) -> bytes:
+        """Decrypt the cipher by the private key of the daemon.
+
+        :param cipher: The cipher.
+        :return: The plaintext.
+        """
+
+        return self.request({"op": "decrypt"}, cipher)[1]
+
+    def close(self):
+        """Close the connection."""
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,196 @@
+"""The length-prefixed protocol of the daemon.
+
+Every request and response is one message::
+
+    HEADER_SIZE (4 bytes, big-endian) | DATA_SIZE (4 bytes, big-endian) | HEADER | DATA
+
+The header is a JSON object encoded in UTF-8, the data are raw bytes
+(e.g. the message to sign or the cipher to decrypt).
+
+Requests carry the operation in the header field ``op``:
+
+* ``ping`` - no data
+* ``sign`` - data is the message, optional ``format`` ("toml" or "binary"),
+  the response data is the formatted signature
+* ``verify`` - data is the signature followed by the message,
+  ``signature_size`` is the size of the signature, the response header
+  has the field ``verified``
+* ``encrypt`` - data is the plaintext, the response data is the cipher
+* ``decrypt`` - data is the cipher, the response data is the plaintext
+
+Responses have the field ``ok``, failed responses describe the failure
+in the field ``error``. A connection may pipeline more requests,
+the responses are sent in the order of the requests.
+"""
+
+from __future__ import annotations
+
+import json
+import socket
+from struct import Struct
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+from kiv_bit_rsa.exception import KivBitRsaError
+
+if TYPE_CHECKING:
+    # the blocking client does not need asyncio
+    import asyncio
+
+MAX_HEADER_SIZE = 64 * 1024
+"""Maximal size of a message header in bytes"""
+
+MAX_DATA_SIZE = 256 * 1024 * 1024
+"""Maximal size of message data in bytes"""
+
+_prefix = Struct(">II")
+
+Message = Tuple[Dict, bytes]
+
+
+class ProtocolError(KivBitRsaError):
+    """Message violates the daemon protocol"""
+
+
+def encode_message(header: Dict,
+                   data: bytes = b"") -> bytes:
+    """Encode a message.
+
+    :param header: The message header.
+    :param data: The message data.
+    :return: The encoded message.
+    """
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf8")
+
+    return _prefix.pack(len(encoded), len(data)) + encoded + data
+
+
+def _decode_prefix(prefix: bytes) -> Tuple[int, int]:
+    """Decode and check the sizes of the message header and data.
+
+    :param prefix: The message prefix.
+    :raise ProtocolError: When the sizes are over the limits.
+    :return: Tuple (header size, data size).
+    """
+
+    header_size, data_size = _prefix.unpack(prefix)
+
+    if header_size > MAX_HEADER_SIZE or data_size > MAX_DATA_SIZE:
+        raise ProtocolError("Message is too large")
+
+    return header_size, data_size
+
+
+def _decode_header(header: bytes) -> Dict:
+    """Decode the message header.
+
+    :param header: The encoded header.
+    :raise ProtocolError: When the header is not a JSON object.
+    :return: The header.
+    """
+
+    try:
+        header = json.loads(header.decode("utf8"))
+    except ValueError:
+        raise ProtocolError("Message header is not a valid JSON")
+
+    if not isinstance(header, dict):
+        raise ProtocolError("Message header is not a JSON object")
+
+    return header
+
+
+async def read_message(reader: asyncio.StreamReader) -> Optional[Message]:
+    """Read a message from the stream.
+
+    :param reader: The stream.
+    :raise ProtocolError: When the message is malformed or the stream ends in the middle of it.
+    :return: Tuple (header, data), None at the end of the stream.
+    """
+
+    import asyncio
+
+    try:
+        prefix = await reader.readexactly(_prefix.size)
+    except asyncio.IncompleteReadError as e:
+        if e.partial:
+            raise ProtocolError("Connection closed in the middle of a message")
+
+        return None
+
+    header_size, data_size = _decode_prefix(prefix)
+
+    try:
+        header = await reader.readexactly(header_size)
+        data = await reader.readexactly(data_size)
+    except asyncio.IncompleteReadError:
+        raise ProtocolError("Connection closed in the middle of a message")
+
+    return _decode_header(header), data
+
+
+async def write_message(writer: asyncio.StreamWriter,
+                        header: Dict,
+                        data: bytes = b""):
+    """Write a message into the stream.
+
+    :param writer: The stream.
+    :param header: The message header.
+    :param data: The message data.
+    """
+
+    writer.write(encode_message(header, data))
+    await writer.drain()
+
+
+def _recv_exactly(sock: socket.socket,
+                  size: int) -> bytes:
+    """Receive exactly `size` bytes from the socket.
+
+    :param sock: The socket.
+    :param size: Number of bytes.
+    :raise ProtocolError: When the connection is closed before.
+    :return: The bytes.
+    """
+
+    buffer = bytearray(size)
+
+    with memoryview(buffer) as view:
+        received = 0
+
+        while received < size:
+            n = sock.recv_into(view[received:])
+
+            if not n:
+                raise ProtocolError("Connection closed in the middle of a message")
+
+            received += n
+
+    return bytes(buffer)
+
+
+def send_message(sock: socket.socket,
+                 header: Dict,
+                 data: bytes = b""):
+    """Send a message through a blocking socket.
+
+    :param sock: The socket.
+    :param header: The message header.
+    :param data: The message data.
+    """
+
+    sock.sendall(encode_message(header, data))
+
+
+def recv_message(sock: socket.socket) -> Message:
+    """Receive a message from a blocking socket.
+
+    :param sock: The socket.
+    :raise ProtocolError: When the message is malformed or the connection is closed.
+    :return: Tuple (header, data).
+    """
+
+    header_size, data_size = _decode_prefix(_recv_exactly(sock, _prefix.size))
+    header = _decode_header(_recv_exactly(sock, header_size))
+
+    return header, _recv_exactly(sock, data_size)
@@ -0,0 +1,453 @@
+"""The signing and encryption daemon.
+
+The daemon holds the keys loaded once and serves the requests
+(see :py:mod:`kiv_bit_rsa.daemon.protocol`) of any number of
+connections. Concurrent requests are micro-batched: every request
+queued while a batch is being processed joins the next batch,
+so a busy daemon sends one task per batch to the worker processes.
+The event loop only moves the messages, so a long request never
+delays the other connections.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import socket
+import stat
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional, Tuple
+
+from kiv_bit_rsa.daemon.protocol import Message, ProtocolError, read_message, write_message
+from kiv_bit_rsa.exception import KivBitRsaError
+from kiv_bit_rsa.hash import get_hash_class
+from kiv_bit_rsa.rsa import Key, Rsa
+from kiv_bit_rsa.sign.signable import SignableBinaryIO
+from kiv_bit_rsa.sign.signature import Signature, TreeSignature
+from kiv_bit_rsa.sign.signature_formatter import TomlSignatureFormatter, BinarySignatureFormatter, load_signature
+
+BATCH_SIZE = 64
+"""Maximal number of requests processed by one worker task"""
+
+PIPELINE_DEPTH = 16
+"""Maximal number of pending requests of one connection"""
+
+_Keys = Tuple[Optional[Key], Optional[Key]]
+
+
+class RequestError(KivBitRsaError):
+    """Request can not be processed"""
+
+
+class SocketInUseError(KivBitRsaError):
+    """Another daemon listens on the socket"""
+
+
+def _require(key: Optional[Key],
+             kind: str) -> Key:
+    """Get the key or fail when the daemon does not hold it.
+
+    :param key: The key.
+    :param kind: The key kind for the error message.
+    :raise RequestError: When the key is None.
+    :return: The key.
+    """
+
+    if key is None:
+        raise RequestError("The daemon has no {} key".format(kind))
+
+    return key
+
+
+def _process(keys: _Keys,
+             header: Dict,
+             data: bytes) -> Message:
+    """Process one request.
+
+    :param keys: Tuple (private key, public key).
+    :param header: The request header.
+    :param data: The request data.
+    :raise RequestError: When the request is invalid.
+    :return: Tuple (response header, response data).
+    """
+
+    private_key, public_key = keys
+    op = header.get("op")
+    rsa = Rsa()
+
+    if op == "ping":
+        return {"ok": True}, b""
+
+    if op == "sign":
+        key = _require(private_key, "private")
+        signature_format = header.get("format", "binary")
+
+        if signature_format not in ("toml", "binary"):
+            raise RequestError("Unknown signature format: {}".format(signature_format))
+
+        signature = Signature.sign(SignableBinaryIO(io.BytesIO(data)), get_hash_class("MD5"), key)
+        formatter = TomlSignatureFormatter() if signature_format == "toml" else BinarySignatureFormatter()
+
+        return {"ok": True}, formatter.to_bytes(signature)
+
+    if op == "verify":
+        key = _require(public_key, "public")
+        size = header.get("signature_size")
+
+        if not isinstance(size, int) or not 0 <= size <= len(data):
+            raise RequestError("Field signature_size must be the size of the signature")
+
+        signature = load_signature(data[:size])
+
+        if isinstance(signature, TreeSignature):
+            raise RequestError("Tree hash signatures are not supported by the daemon")
+
+        verified = signature.verify(SignableBinaryIO(io.BytesIO(data[size:])), key)
+
+        return {"ok": True, "verified": verified}, b""
+
+    if op == "encrypt":
+        cipher = io.BytesIO()
+        rsa.encrypt_file(io.BytesIO(data), cipher, _require(public_key, "public"))
+
+        return {"ok": True}, cipher.getvalue()
+
+    if op == "decrypt":
+        plaintext = io.BytesIO()
+        rsa.decrypt_file(io.BytesIO(data), plaintext, _require(private_key, "private"))
+
+        return {"ok": True}, plaintext.getvalue()
+
+    raise RequestError("Unknown operation: {}".format(op))
+
+
+def _process_batch(keys: _Keys,
+                   requests: List[Message]) -> List[Message]:
+    """Process a batch of requests, failures are reported in the responses.
+
+    Any failure of a request (even an unexpected one) is reported
+    only to its client, so it does not bring the daemon down.
+
+    :param keys: Tuple (private key, public key).
+    :param requests: The requests.
+    :return: The responses.
+    """
+
+    responses = []
+
+    for header, data in requests:
+        try:
+            responses.append(_process(keys, header, data))
+        except Exception as e:
+            responses.append(({"ok": False, "error": str(e) or type(e).__name__}, b""))
+
+    return responses
+
+
+_worker_keys = (None, None)
+
+
+def _init_worker(keys: _Keys):
+    """Store the keys in a worker process.
+
+    :param keys: Tuple (private key, public key).
+    """
+
+    global _worker_keys
+    _worker_keys = keys
+
+
+def _process_worker_batch(requests: List[Message]) -> List[Message]:
+    """Process a batch of requests in a worker process.
+
+    :param requests: The requests.
+    :return: The responses.
+    """
+
+    return _process_batch(_worker_keys, requests)
+
+
+class Server:
+    """The daemon serving requests with the keys loaded once."""
+
+    def __init__(self,
+                 private_key: Optional[Key] = None,
+                 public_key: Optional[Key] = None,
+                 workers: int = 1,
+                 batch_size: int = BATCH_SIZE):
+        """Initialize the daemon.
+
+        The batches are processed in the worker processes, only the ``ping``
+        requests are answered directly in the event loop.
+
+        :param private_key: The key used for signing and decryption.
+        :param public_key: The key used for verifying and encryption.
+        :param workers: Number of worker processes.
+        :param batch_size: Maximal number of requests in a batch.
+        """
+
+        if workers < 1 or batch_size < 1:
+            raise ValueError("Number of workers and batch size must be positive")
+
+        self._keys = (private_key, public_key)
+        self._workers = workers
+        self._batch_size = batch_size
+        self._executor = None
+        self._queue = None
+        self._batcher = None
+        self._batches = None
+
+    async def start(self):
+        """Start the worker processes and the batching, must be called in the event loop."""
+
+        self._executor = self._create_executor()
+        self._queue = asyncio.Queue()
+        self._batches = asyncio.Semaphore(2 * self._workers)
+        self._batcher = asyncio.ensure_future(self._batch())
+
+    async def close(self):
+        """Stop the batching and the worker processes."""
+
+        if self._batcher:
+            self._batcher.cancel()
+
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+            self._batcher = None
+
+        if self._executor:
+            self._executor.shutdown()
+            self._executor = None
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        """Create the pool of the worker processes.
+
+        :return: The pool.
+        """
+
+        # forked workers would inherit the open connections and keep them alive
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+        return ProcessPoolExecutor(self._workers,
+                                   mp_context=context,
+                                   initializer=_init_worker,
+                                   initargs=(self._keys,))
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def request(self,
+                      header: Dict,
+                      data: bytes = b"") -> Message:
+        """Process one request in the next batch.
+
+        :param header: The request header.
+        :param data: The request data.
+        :return: Tuple (response header, response data).
+        """
+
+        future = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait((header, data, future))
+
+        return await future
+
+    async def handle(self,
+                     reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter):
+        """Serve the requests of one connection until it is closed.
+
+        At most :py:data:`PIPELINE_DEPTH` requests of the connection are pending,
+        then the next request is not read before a response is sent, so a client
+        pipelining too many requests is held back by the full socket buffers.
+
+        :param reader: The connection input.
+        :param writer: The connection output.
+        """
+
+        responses = asyncio.Queue()
+        slots = asyncio.Semaphore(PIPELINE_DEPTH)
+        sender = asyncio.ensure_future(self._send(responses, slots, writer))
+
+        try:
+            while True:
+                await slots.acquire()
+                message = await read_message(reader)
+
+                if message is None:
+                    break
+
+                responses.put_nowait(asyncio.ensure_future(self.request(*message)))
+
+        except ProtocolError as e:
+            responses.put_nowait(_completed(({"ok": False, "error": str(e)}, b"")))
+
+        except ConnectionError:
+            pass
+
+        finally:
+            responses.put_nowait(None)
+            await sender
+            writer.close()
+
+    async def serve_unix(self,
+                         path: str) -> asyncio.AbstractServer:
+        """Listen on a Unix domain socket accessible only by the owner.
+
+        A stale socket file left by a previous daemon is replaced.
+
+        :param path: The socket filepath.
+        :raise SocketInUseError: When another daemon listens on the socket.
+        :return: The listening server.
+        """
+
+        _remove_stale_socket(path)
+
+        # the socket is created accessible only by the owner, so it is never open to others
+        umask = os.umask(0o077)
+
+        try:
+            server = await asyncio.start_unix_server(self.handle, path)
+        finally:
+            os.umask(umask)
+
+        os.chmod(path, 0o600)
+
+        return server
+
+    async def _send(self,
+                    responses: asyncio.Queue,
+                    slots: asyncio.Semaphore,
+                    writer: asyncio.StreamWriter):
+        """Send the responses of a connection in the order of the requests.
+
+        :param responses: Queue of the response futures, None ends the connection.
+        :param slots: Semaphore of the pending requests, released after every response.
+        :param writer: The connection output.
+        """
+
+        while True:
+            response = await responses.get()
+
+            if response is None:
+                return
+
+            try:
+                await write_message(writer, *(await response))
+            except ConnectionError:
+                pass
+
+            slots.release()
+
+    async def _batch(self):
+        """Collect the queued requests into batches and dispatch them."""
+
+        while True:
+            request = await self._queue.get()
+            batch = []
+
+            while True:
+                if request[0].get("op") == "ping":
+                    # needs no key, answered without a round trip to a worker
+                    _resolve([request], _process_batch(self._keys, [request[:2]]))
+                else:
+                    batch.append(request)
+
+                if len(batch) >= self._batch_size or self._queue.empty():
+                    break
+
+                request = self._queue.get_nowait()
+
+            if batch:
+                await self._batches.acquire()
+                asyncio.ensure_future(self._dispatch(batch))
+
+    async def _dispatch(self,
+                        batch: List):
+        """Process a batch in a worker process.
+
+        A worker process which died breaks the whole pool, so the pool
+        is replaced and the requests of the batch fail with an error.
+
+        :param batch: List of tuples (header, data, response future).
+        """
+
+        executor = self._executor
+
+        try:
+            responses = await asyncio.get_event_loop().run_in_executor(executor,
+                                                                       _process_worker_batch,
+                                                                       [(h, d) for h, d, _ in batch])
+        except BrokenProcessPool:
+            # other batches of the broken pool may have replaced it already
+            if self._executor is executor:
+                executor.shutdown(wait=False)
+                self._executor = self._create_executor()
+
+            responses = [({"ok": False, "error": "Worker process died, the worker pool was restarted"}, b"")
+                         for _ in batch]
+
+        except Exception as e:
+            responses = [({"ok": False, "error": "Worker failed: {}".format(e)}, b"") for _ in batch]
+
+        finally:
+            self._batches.release()
+
+        _resolve(batch, responses)
+
+
+def _remove_stale_socket(path: str):
+    """Remove the socket file if no daemon listens on it.
+
+    :param path: The socket filepath.
+    :raise SocketInUseError: When a daemon listens on the socket.
+    """
+
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+
+    raise SocketInUseError("A daemon already listens on {}".format(path))
+
+
+def _resolve(batch: List,
+             responses: List[Message]):
+    """Set the results of the response futures of a batch.
+
+    :param batch: List of tuples (header, data, response future).
+    :param responses: The responses.
+    """
+
+    for (_, _, future), response in zip(batch, responses):
+        if not future.done():
+            future.set_result(response)
+
+
+def _completed(result) -> asyncio.Future:
+    """Get a future with the result already set.
+
+    :param result: The result.
+    :return: The future.
+    """
+
+    future = asyncio.get_event_loop().create_future()
+    future.set_result(result)
+
+    return future
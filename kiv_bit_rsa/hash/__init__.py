@@ -3,10 +3,14 @@ A simple module for hashing.
 
 Contains base class :py:class:`Hash` from which all
 hash implementations inherits.
-For now contains only MD5 hash class :py:class:`Md5`
+For now contains only MD5 hash - the pure Python class :py:class:`Md5`
+and :py:class:`HashlibMd5` backed by hashlib. The implementation
+is selected by :py:func:`set_backend` and :py:func:`get_hash_class`.
 """
 
 from .hash import Hash
 from .md5 import Md5
+from .hashlib_md5 import HashlibMd5
+from .backend import backends, get_backend, set_backend, get_hash_class
 
-__all__ = ["Hash", "Md5"]
+__all__ = ["Hash", "Md5", "HashlibMd5", "backends", "get_backend", "set_backend", "get_hash_class"]
@@ -0,0 +1,84 @@
+"""Selection of the hash implementations backend.
+
+The hash methods are available in more implementations (backends):
+* "python" - the pure Python reference implementation (default)
+* "hashlib" - delegating to the C implementation of :py:mod:`hashlib`
+
+The backend is selected by :py:func:`set_backend` or by the environment
+variable ``KIV_BIT_RSA_HASH_BACKEND``. All backends of one hash method
+produce the same digests and share the method name.
+"""
+
+import os
+from typing import Dict, List, Type
+
+from . import hashlib_md5
+from .hash import Hash
+from .hashlib_md5 import HashlibMd5
+from .md5 import Md5
+
+ENV_BACKEND = "KIV_BIT_RSA_HASH_BACKEND"
+"""Name of the environment variable selecting the backend"""
+
+DEFAULT_BACKEND = "python"
+"""Name of the default backend"""
+
+_backends: Dict[str, Dict[str, Type[Hash]]] = {
+    "python": {"MD5": Md5},
+}
+
+if hashlib_md5.available():
+    _backends["hashlib"] = {"MD5": HashlibMd5}
+
+_backend = os.environ.get(ENV_BACKEND, DEFAULT_BACKEND)
+
+# fall back to the reference implementation
+if _backend not in _backends:
+    _backend = DEFAULT_BACKEND
+
+
+def backends() -> List[str]:
+    """Get names of the available backends.
+
+    :return: The backend names.
+    """
+
+    return list(_backends)
+
+
+def get_backend() -> str:
+    """Get name of the selected backend.
+
+    :return: The backend name.
+    """
+
+    return _backend
+
+
+def set_backend(name: str):
+    """Select the backend.
+
+    :param name: The backend name, one of :py:func:`backends`.
+    :raise ValueError: When the backend is not available.
+    """
+
+    global _backend
+
+    if name not in _backends:
+        raise ValueError("Hash backend {} is not available".format(name))
+
+    _backend = name
+
+
+def get_hash_class(name: str) -> Type[Hash]:
+    """Get the hash class of method `name` from the selected backend.
+
+    :param name: The hash method name, e.g. "MD5".
+    :raise ValueError: When there is no hash method of the `name`.
+    :return: The hash class.
+    """
+
+    try:
+        return _backends[_backend][name]
+    except KeyError:
+        raise ValueError("Unknown hash method: {}".format(name))
@@ -44,6 +44,17 @@ class Hash(ABC):
         :param data: The data to update the hash with.
         """
 
+    @abstractmethod
+    def copy(self) -> Hash:
+        """Get a copy of the hash.
+
+        The copy can be updated independently of the original,
+        e.g. to hash a common prefix once and continue with
+        different suffixes.
+
+        :return: The copy of the hash.
+        """
+
     @abstractmethod
     def to_bytes(self) -> bytes:
         """Get the hash digest as bytes.
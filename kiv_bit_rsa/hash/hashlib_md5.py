@@ -0,0 +1,113 @@
+"""MD5 hash backed by :py:mod:`hashlib`.
+
+A drop-in alternative to the pure Python :py:class:`kiv_bit_rsa.hash.Md5`
+delegating to the C implementation of the standard library.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from .hash import Hash
+
+
+def _new(data: bytes = b''):
+    """Create a new hashlib MD5 object.
+
+    MD5 is used for integrity, so it is allowed also where
+    the interpreter restricts it for security uses (FIPS mode).
+
+    :param data: The initial data.
+    :return: The hashlib MD5 object.
+    """
+
+    try:
+        return hashlib.md5(data, usedforsecurity=False)
+    except TypeError:
+        return hashlib.md5(data)
+
+
+def available() -> bool:
+    """Check if hashlib provides MD5.
+
+    :return: True if hashlib MD5 can be used, False otherwise.
+    """
+
+    try:
+        _new()
+    except (AttributeError, ValueError):
+        return False
+
+    return True
+
+
+class HashlibMd5(Hash):
+    """Md5 hash representation backed by hashlib."""
+
+    _block_size = 64
+
+    _name = "MD5"
+
+    def __init__(self,
+                 data: bytes = None):
+        """Initialize an MD5 hasher with optional initial data.
+
+        :param data: The initial data.
+        """
+
+        self._md5 = _new()
+
+        if data is not None:
+            self._md5.update(data)
+
+    @classmethod
+    def chunk_size(cls) -> int:
+        """Get size of the Md5 data chunk.
+
+        :return: Size of the chunk in bytes = 64 B.
+        """
+
+        return cls._block_size
+
+    @classmethod
+    def name(cls) -> str:
+        """Get hash methods name.
+
+        :return: The name of the hash method.
+        """
+        return cls._name
+
+    def update(self,
+               data: bytes):
+        """Update the hash with `data`.
+
+        :param data: The data to update the hash with.
+        """
+
+        self._md5.update(data)
+
+    def copy(self) -> HashlibMd5:
+        """Get a copy of the hash.
+
+        :return: The copy of the hash.
+        """
+
+        other = self.__class__.__new__(self.__class__)
+        other._md5 = self._md5.copy()
+
+        return other
+
+    def to_bytes(self) -> bytes:
+        """Get the hash digest as bytes.
+
+        :return: The digest as bytes.
+        """
+
+        return self._md5.digest()
+
+    def to_hex(self) -> str:
+        """Get the hash digest as a hex string.
+
+        :return: The digest as a hex string.
+        """
+        return self._md5.hexdigest()
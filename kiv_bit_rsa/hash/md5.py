@@ -2,10 +2,12 @@
 """
 
 from __future__ import annotations
-from struct import iter_unpack, pack
-from typing import Tuple, List, cast
+from struct import Struct, pack
+from typing import Tuple, List, Union, Dict, Iterable, Optional
 
+from . import md5_multi
 from .hash import Hash
+from .md5_engine import Compress, build_compress, round_table
 
 
 class Md5(Hash):
@@ -21,12 +23,23 @@ class Md5(Hash):
 
     Every data chuck's hash is added to the values
     a, b, c, d.
+
+    The chunks are compressed by one of the engines:
+    * "unrolled" - straight-line code generated from per-round tables (default)
+    * "reference" - the generic loop in :py:meth:`_hash_chunk`
     """
 
     _block_size = 64
 
+    _words = Struct("<16I")
+
+    _midstate = Struct("<4IQ")
+
     _name = "MD5"
 
+    _engines: Dict[str, Compress] = {}
+    _engine = "reference"
+
     _a_init = 0x67452301
     _b_init = 0xefcdab89
     _c_init = 0x98badcfe
@@ -63,15 +76,16 @@ class Md5(Hash):
 
         self._buffer = bytearray()
         self._size = 0
+        self._digest: Optional[bytes] = None
 
-        self._state = [
+        self._state: Tuple[int, int, int, int] = (
             self._a_init,
             self._b_init,
             self._c_init,
             self._d_init
-        ]
+        )
 
-        if data:
+        if data is not None:
             self.update(data)
 
     @classmethod
@@ -95,40 +109,196 @@ class Md5(Hash):
         """
         return cls._name
 
+    @classmethod
+    def engines(cls) -> List[str]:
+        """Get names of the available compression engines.
+
+        :return: The engine names.
+        """
+
+        return list(cls._engines)
+
+    @classmethod
+    def engine(cls) -> str:
+        """Get name of the selected compression engine.
+
+        :return: The engine name.
+        """
+
+        return cls._engine
+
+    @classmethod
+    def set_engine(cls,
+                   name: str):
+        """Select the compression engine used by all hashers.
+
+        :param name: The engine name, one of :py:meth:`engines`.
+        :raise ValueError: When there is no engine named `name`.
+        """
+
+        if name not in cls._engines:
+            raise ValueError("Unknown MD5 engine: {}".format(name))
+
+        cls._engine = name
+
+    @classmethod
+    def hash_many(cls,
+                  messages: Iterable[bytes]) -> List[bytes]:
+        """Compute digests of many messages at once.
+
+        When NumPy is installed the messages are hashed in one vectorised
+        pass (see :py:mod:`kiv_bit_rsa.hash.md5_multi`), otherwise one by one.
+        The result is the same as ``[Md5(m).to_bytes() for m in messages]``.
+
+        :param messages: The messages to hash.
+        :return: The digests in the order of `messages`.
+        """
+
+        messages = list(messages)
+
+        if md5_multi.available() and len(messages) > 1:
+            init = (cls._a_init, cls._b_init, cls._c_init, cls._d_init)
+            return md5_multi.hash_many(messages, init, round_table(cls._k, cls._s))
+
+        return [cls(message).to_bytes() for message in messages]
+
     def update(self,
-               data: bytes):
+               data: Union[bytes, bytearray, memoryview]):
         """Update the hash with `data`.
 
+        Accepts any object supporting the buffer protocol (bytes, bytearray,
+        memoryview, mmap, ...). Only the unaligned head and tail of `data`
+        are copied into the internal buffer, whole 64 byte blocks are hashed
+        directly from a memoryview of `data`.
+
         :param data: The data to update the hash with.
         """
 
-        # TODO: optimize
+        with memoryview(data) as view:
+            if view.ndim != 1 or view.itemsize != 1:
+                with view.cast("B") as flat:
+                    self._update(flat)
+            else:
+                self._update(view)
+
+    def _update(self,
+                data: memoryview):
+        """Update the hash with a flat byte memoryview.
+
+        :param data: The data to update the hash with.
+        """
+
+        length = len(data)
+        block_size = self._block_size
+
+        self._size += length
+        self._digest = None
+
+        start = 0
 
-        for byte in data:
-            self._buffer.append(byte)
-            self._size += 1 % 64
+        # fill the pending buffer first
+        if self._buffer:
+            start = min(block_size - len(self._buffer), length)
+            self._buffer += data[:start]
 
-            if len(self._buffer) == 64:
-                hashed = self._hash_chunk(self._buffer)
+            if len(self._buffer) < block_size:
+                return
 
-                self._state = [(s + h) & 0xffffffff for s, h in zip(self._state, hashed)]
+            self._state = self._compress(self._state, self._buffer, 0, block_size)
+            self._buffer.clear()
 
-                self._buffer.clear()
+        # hash whole blocks straight from the input
+        end = start + (length - start) // block_size * block_size
+
+        if start < end:
+            self._state = self._compress(self._state, data, start, end)
+
+        # keep the unaligned tail
+        if end < length:
+            self._buffer += data[end:]
+
+    def copy(self) -> Md5:
+        """Get a copy of the hash.
+
+        Only the pending buffer (less than 64 bytes) is copied,
+        the state and the cached digest are immutable and shared.
+
+        :return: The copy of the hash.
+        """
+
+        other = self.__class__.__new__(self.__class__)
+        other._buffer = bytearray(self._buffer)
+        other._size = self._size
+        other._digest = self._digest
+        other._state = self._state
+
+        return other
 
     def to_bytes(self) -> bytes:
         """Get the hash digest as bytes.
 
+        The digest is computed only once and cached until the next update.
+
         :return: The digest as bytes.
         """
 
-        return b''.join([pack("<I", i) for i in self._finalize()])
+        if self._digest is None:
+            self._digest = pack("<4I", *self._finalize())
+
+        return self._digest
 
     def to_hex(self) -> str:
         """Get the hash digest as a hex string.
 
         :return: The digest as a hex string.
         """
-        return ''.join([format(i, '>02x') for i in self.to_bytes()])
+        return self.to_bytes().hex()
+
+    @property
+    def hashed_size(self) -> int:
+        """Get the number of hashed bytes."""
+        return self._size
+
+    def midstate(self) -> bytes:
+        """Export the internal state of the hash.
+
+        The midstate consists of the state words A, B, C, D,
+        the number of hashed bytes and the pending (not yet
+        compressed) bytes. Hashing can be resumed from it
+        by :py:meth:`from_midstate`.
+
+        :return: The serialized midstate.
+        """
+
+        return self._midstate.pack(*self._state, self._size) + bytes(self._buffer)
+
+    @classmethod
+    def from_midstate(cls,
+                      midstate: bytes) -> Md5:
+        """Create a hash resumed from an exported midstate.
+
+        :param midstate: The midstate exported by :py:meth:`midstate`.
+        :raise ValueError: When the midstate is malformed.
+        :return: The resumed hash.
+        """
+
+        header_size = cls._midstate.size
+
+        if len(midstate) < header_size:
+            raise ValueError("MD5 midstate is too short")
+
+        *state, size = cls._midstate.unpack_from(midstate)
+        buffer = midstate[header_size:]
+
+        if len(buffer) != size % cls._block_size:
+            raise ValueError("MD5 midstate pending bytes do not match the hashed size")
+
+        h = cls()
+        h._state = tuple(state)
+        h._size = size
+        h._buffer = bytearray(buffer)
+
+        return h
 
     @staticmethod
     def _f(b: int,
@@ -210,20 +380,19 @@ class Md5(Hash):
 
     @classmethod
     def _hash_chunk(cls,
+                    state: Tuple[int, int, int, int],
                     chunk: bytes) -> Tuple[int, int, int, int]:
-        """Hash the data chunk.
+        """Hash the data chunk into the `state`.
 
+        :param state: The hash state before the chunk - tuple of ints (A, B, C, D)
         :param chunk: The 64 bytes long chunk to hash.
-        :return: The chunk hash - tuple of ints (A, B, C, D)
+        :return: The hash state after the chunk - tuple of ints (A, B, C, D)
         """
 
-        a: int = cls._a_init
-        b: int = cls._b_init
-        c: int = cls._c_init
-        d: int = cls._d_init
+        a, b, c, d = state
 
         # extract 32 bit uints from chunk
-        chunk: List[int] = [i[0] for i in iter_unpack("<I", chunk)]
+        chunk: Tuple[int, ...] = cls._words.unpack(chunk)
 
         for i in range(64):
             k = cls._k[i]
@@ -248,7 +417,48 @@ class Md5(Hash):
             c = b
             b = (b + cls._rotate_left(f, s)) & 0xffffffff
 
-        return a, b, c, d
+        return ((state[0] + a) & 0xffffffff,
+                (state[1] + b) & 0xffffffff,
+                (state[2] + c) & 0xffffffff,
+                (state[3] + d) & 0xffffffff)
+
+    @classmethod
+    def _hash_blocks(cls,
+                     state: Tuple[int, int, int, int],
+                     data: bytes,
+                     start: int,
+                     end: int) -> Tuple[int, int, int, int]:
+        """Hash the whole chunks of `data` between `start` and `end` into the `state`.
+
+        This is the reference compression engine.
+
+        :param state: The hash state before the chunks - tuple of ints (A, B, C, D)
+        :param data: The data to hash.
+        :param start: Offset of the first chunk.
+        :param end: Offset after the last chunk.
+        :return: The hash state after the chunks - tuple of ints (A, B, C, D)
+        """
+
+        for offset in range(start, end, cls._block_size):
+            state = cls._hash_chunk(state, data[offset:offset + cls._block_size])
+
+        return state
+
+    def _compress(self,
+                  state: Tuple[int, int, int, int],
+                  data: bytes,
+                  start: int,
+                  end: int) -> Tuple[int, int, int, int]:
+        """Hash the whole chunks of `data` between `start` and `end` with the selected engine.
+
+        :param state: The hash state before the chunks - tuple of ints (A, B, C, D)
+        :param data: The data to hash.
+        :param start: Offset of the first chunk.
+        :param end: Offset after the last chunk.
+        :return: The hash state after the chunks - tuple of ints (A, B, C, D)
+        """
+
+        return self._engines[self._engine](state, data, start, end)
 
     def _finalize(self) -> Tuple[int, int, int, int]:
         """Get the finalized hash.
@@ -264,10 +474,16 @@ class Md5(Hash):
             block += b'\x00'
 
         # add data size at the end
-        block += pack("<Q", self._size * 8)
+        block += pack("<Q", (self._size * 8) & 0xffffffffffffffff)
+
+        # padding may overflow into a second block
+        return self._compress(self._state, block, 0, len(block))
 
-        hashed = self._hash_chunk(block)
 
-        result = tuple(((s + h) & 0xffffffff) for s, h in zip(self._state, hashed))
+Md5._engines["reference"] = Md5._hash_blocks
 
-        return cast(Tuple[int, int, int, int], result)
+try:
+    Md5._engines["unrolled"] = build_compress(Md5._k, Md5._s)
+    Md5._engine = "unrolled"
+except Exception:  # pragma: no cover - keep the reference engine if generation fails
+    pass
@@ -0,0 +1,109 @@
+"""Straight-line MD5 compression engine.
+
+The engine is generated at import time from precomputed per-round tables
+of (K, s, message index) into a single function with all 64 rounds unrolled.
+The generated code uses only local variables, there are no function calls,
+branches or table lookups inside the rounds.
+"""
+
+from struct import Struct
+from typing import Callable, List, Sequence, Tuple
+
+State = Tuple[int, int, int, int]
+
+Compress = Callable[[State, bytes, int, int], State]
+"""Compression function ``compress(state, data, start, end) -> state``
+hashing the whole 64 byte blocks of `data` between offsets `start` and `end`."""
+
+_words = Struct("<16I")
+
+# round functions on local names b, c, d (only the low 32 bits of the result are significant)
+_functions = [
+    "({d} ^ ({b} & ({c} ^ {d})))",
+    "({c} ^ ({d} & ({b} ^ {c})))",
+    "({b} ^ {c} ^ {d})",
+    "({c} ^ ({b} | ~{d}))",
+]
+
+
+def round_table(k: Sequence[int],
+                s: Sequence[int]) -> List[Tuple[int, int, int]]:
+    """Build the per-round table of (K, s, message index) tuples.
+
+    :param k: The 64 additive round constants.
+    :param s: The 64 rotation amounts.
+    :return: List of 64 tuples (K, s, message index).
+    """
+
+    table = []
+
+    for i in range(64):
+        if i < 16:
+            m = i
+        elif i < 32:
+            m = (5 * i + 1) % 16
+        elif i < 48:
+            m = (3 * i + 5) % 16
+        else:
+            m = (7 * i) % 16
+
+        table.append((k[i], s[i], m))
+
+    return table
+
+
+def generate_source(table: Sequence[Tuple[int, int, int]]) -> str:
+    """Generate source code of the unrolled compression function.
+
+    Instead of shifting the values a, b, c, d after every round the roles
+    of the local variables rotate, so every round is just two assignments.
+    The sum `b + rotated` is left unmasked and is only masked when added
+    to the state at the end of the block, the next round masks it anyway.
+
+    :param table: The per-round table from :py:func:`round_table`.
+    :return: Source code of function ``compress(state, data, start, end)``.
+    """
+
+    names = "abcd"
+    words = ", ".join("x{}".format(i) for i in range(16))
+
+    lines = [
+        "def compress(state, data, start, end):",
+        "    a0, b0, c0, d0 = state",
+        "    for offset in range(start, end, 64):",
+        "        {} = unpack_from(data, offset)".format(words),
+        "        a = a0; b = b0; c = c0; d = d0",
+    ]
+
+    for i, (k, s, m) in enumerate(table):
+        a, b, c, d = (names[(j - i) % 4] for j in range(4))
+        f = _functions[i // 16].format(b=b, c=c, d=d)
+
+        lines.append("        t = ({a} + {f} + x{m} + {k:#010x}) & 0xffffffff".format(a=a, f=f, m=m, k=k))
+        lines.append("        {a} = {b} + (((t << {s}) & 0xffffffff) | (t >> {r}))".format(a=a, b=b, s=s, r=32 - s))
+
+    lines += [
+        "        a0 = (a0 + a) & 0xffffffff",
+        "        b0 = (b0 + b) & 0xffffffff",
+        "        c0 = (c0 + c) & 0xffffffff",
+        "        d0 = (d0 + d) & 0xffffffff",
+        "    return a0, b0, c0, d0",
+    ]
+
+    return "\n".join(lines) + "\n"
+
+
+def build_compress(k: Sequence[int],
+                   s: Sequence[int]) -> Compress:
+    """Build the unrolled compression function for the MD5 constants.
+
+    :param k: The 64 additive round constants.
+    :param s: The 64 rotation amounts.
+    :return: The compression function.
+    """
+
+    namespace = {"unpack_from": _words.unpack_from}
+    code = compile(generate_source(round_table(k, s)), "<md5-unrolled>", "exec")
+    exec(code, namespace)
+
+    return namespace["compress"]
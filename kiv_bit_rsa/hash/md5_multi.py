@@ -0,0 +1,115 @@
+"""Multi-buffer MD5 using NumPy.
+
+Hashes many messages at once by running the 64 MD5 rounds over
+uint32 NumPy lanes - one lane per message. NumPy is optional,
+:py:func:`available` tells whether the vectorised path can be used.
+NumPy is imported only when the lanes are used, so importing the hash
+module does not pay its import time.
+"""
+
+import importlib.util
+from struct import pack
+from typing import List, Sequence, Tuple
+
+_numpy_available = None
+
+
+def available() -> bool:
+    """Check if the vectorised multi-buffer hashing is available.
+
+    NumPy is only looked up, not imported.
+
+    :return: True if NumPy is installed, False otherwise.
+    """
+
+    global _numpy_available
+
+    if _numpy_available is None:
+        _numpy_available = importlib.util.find_spec("numpy") is not None
+
+    return _numpy_available
+
+
+def _pad(message: bytes) -> bytes:
+    """Pad the message to whole MD5 blocks.
+
+    :param message: The message.
+    :return: The padded message.
+    """
+
+    padding = b'\x80' + b'\x00' * ((55 - len(message)) % 64)
+
+    return b''.join([message, padding, pack("<Q", (len(message) * 8) & 0xffffffffffffffff)])
+
+
+def hash_many(messages: Sequence[bytes],
+              init: Tuple[int, int, int, int],
+              table: Sequence[Tuple[int, int, int]]) -> List[bytes]:
+    """Compute MD5 digests of all `messages` in one vectorised pass.
+
+    Every message is one lane of the uint32 state vectors. The lanes are
+    ordered by their block count, so the lanes still active in the j-th
+    block are always a prefix and the finished lanes are masked out
+    by slicing.
+
+    :param messages: The messages to hash.
+    :param init: The initial hash state - tuple of ints (A, B, C, D)
+    :param table: The per-round table of (K, s, message index) tuples.
+    :return: The digests in the order of `messages`.
+    """
+
+    if not available():
+        raise RuntimeError("NumPy is not installed")
+
+    import numpy
+
+    padded = [_pad(bytes(message)) for message in messages]
+    order = sorted(range(len(padded)), key=lambda i: len(padded[i]), reverse=True)
+    padded = [padded[i] for i in order]
+
+    # number of lanes still having the j-th block
+    counts = numpy.bincount([len(p) // 64 for p in padded])[::-1].cumsum()[::-1]
+
+    state = numpy.empty((4, len(padded)), dtype=numpy.uint32)
+    state[:] = numpy.array(init, dtype=numpy.uint32)[:, None]
+
+    rounds = [(numpy.uint32(k), numpy.uint32(s), numpy.uint32(32 - s), m) for k, s, m in table]
+
+    for block in range(1, len(counts)):
+        active = int(counts[block])
+        start = (block - 1) * 64
+
+        data = b''.join([p[start:start + 64] for p in padded[:active]])
+        x = numpy.frombuffer(data, dtype="<u4").reshape(active, 16).T.copy()
+
+        a, b, c, d = (part.copy() for part in state[:, :active])
+
+        for i, (k, s, r, m) in enumerate(rounds):
+            if i < 16:
+                f = d ^ (b & (c ^ d))
+            elif i < 32:
+                f = c ^ (d & (b ^ c))
+            elif i < 48:
+                f = b ^ c ^ d
+            else:
+                f = c ^ (b | ~d)
+
+            f += a
+            f += k
+            f += x[m]
+
+            a, d, c = d, c, b
+            b = b + ((f << s) | (f >> r))
+
+        state[0, :active] += a
+        state[1, :active] += b
+        state[2, :active] += c
+        state[3, :active] += d
+
+    digests = state.T.astype("<u4").tobytes()
+    result = [b''] * len(padded)
+
+    for lane, i in enumerate(order):
+        result[i] = digests[lane * 16:lane * 16 + 16]
+
+    return result
@@ -4,6 +4,8 @@ A simple math module containing a couple of mathematical functions
 used by the RSA cipher.
 """
 
-from .math import random_prime, is_prime, mod_inverse
+from .math import random_prime, random_primes, is_prime, mod_inverse, small_primes, PrimeSearchStats
+from .math import PRIMALITY_MILLER_RABIN, PRIMALITY_BPSW, PRIMALITY_FIPS, PRIMALITY_POLICIES
 
-__all__ = ["random_prime", "is_prime", "mod_inverse"]
+__all__ = ["random_prime", "random_primes", "is_prime", "mod_inverse", "small_primes", "PrimeSearchStats",
+           "PRIMALITY_MILLER_RABIN", "PRIMALITY_BPSW", "PRIMALITY_FIPS", "PRIMALITY_POLICIES"]
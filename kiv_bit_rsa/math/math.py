@@ -1,30 +1,147 @@
 """Useful mathematical functions for the RSA cipher.
 """
 
+import multiprocessing
+import random
 from random import getrandbits
 from random import randrange
+from typing import Iterator, List, Optional
+
+
+def small_primes(limit: int) -> List[int]:
+    """Get all primes smaller than `limit` using the sieve of Eratosthenes.
+
+    :param limit: The upper bound (exclusive).
+    :return: List of the primes in ascending order.
+    """
+
+    sieve = bytearray([1]) * max(limit, 2)
+    sieve[0] = sieve[1] = 0
+
+    for i in range(2, int(limit ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit, i)))
+
+    return [i for i in range(limit) if sieve[i]]
+
+
+SMALL_PRIMES_LIMIT = 8192
+"""Upper bound of the small primes used for sieving the prime candidates"""
+
+_small_primes = small_primes(SMALL_PRIMES_LIMIT)[1:]
+
+
+class PrimeSearchStats:
+    """Counters of a random prime search.
+
+    * `windows` - number of sieved windows of candidates
+    * `sieved` - candidates rejected by the small primes sieve
+    * `tested` - candidates tested by the primality test
+    """
+
+    def __init__(self):
+        """Initialize zero counters."""
+        self.windows = 0
+        self.sieved = 0
+        self.tested = 0
+
+    def __repr__(self):
+        return "PrimeSearchStats(windows={}, sieved={}, tested={})".format(self.windows, self.sieved, self.tested)
+
+
+PRIMALITY_MILLER_RABIN = "miller-rabin"
+"""Primality policy - Miller-Rabin test with `rounds` random bases"""
+
+PRIMALITY_BPSW = "bpsw"
+"""Primality policy - Baillie-PSW test (base 2 strong probable prime test and strong Lucas test)"""
+
+PRIMALITY_FIPS = "fips"
+"""Primality policy - Baillie-PSW test and bit-length adaptive number of Miller-Rabin rounds"""
+
+PRIMALITY_POLICIES = (PRIMALITY_MILLER_RABIN, PRIMALITY_BPSW, PRIMALITY_FIPS)
+"""All primality policies"""
+
+_deterministic_bases = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)
+"""Miller-Rabin bases deterministic for all numbers below 2^64"""
+
+_fips_rounds = ((1536, 3), (1024, 4), (512, 7), (0, 40))
+"""Tuples (minimal bit length, Miller-Rabin rounds) modeled on FIPS 186-4, Appendix C.3"""
 
 
 def is_prime(num: int,
-             rounds: int = 40) -> bool:
+             rounds: int = 40,
+             policy: str = PRIMALITY_BPSW) -> bool:
     """Test if `num` is prime number.
 
-    Uses the Miller-Rabin probabilistic primality test.
-    The certainty of error is (1/4)^`rounds`.
+    Numbers below 2^64 are tested by the deterministic Miller-Rabin test,
+    bigger numbers by the test selected by `policy`:
+    * :py:data:`PRIMALITY_MILLER_RABIN` - Miller-Rabin probabilistic test
+      with `rounds` random bases, the certainty of error is (1/4)^`rounds`.
+    * :py:data:`PRIMALITY_BPSW` - Baillie-PSW test, no composite passing
+      it is known.
+    * :py:data:`PRIMALITY_FIPS` - Baillie-PSW test followed by a number
+      of random base Miller-Rabin rounds decreasing with the bit length.
 
     :param num: The number to be tested for primality.
-    :param rounds: Number of testing rounds.
+    :param rounds: Number of testing rounds of the Miller-Rabin policy.
+    :param policy: The primality testing policy.
+    :raise ValueError: When the policy is unknown.
     :return: True if `num` is prime, False otherwise
     """
 
+    if policy not in PRIMALITY_POLICIES:
+        raise ValueError("Unknown primality policy: {}".format(policy))
+
     num = int(num)
 
-    if num == 1 or num == 2:
-        return True
+    if num < 4:
+        return num > 1
+
+    # trial division by the first small primes
+    for p in _small_primes[:25]:
+        if num % p == 0:
+            return num == p
 
     if num % 2 == 0:
         return False
 
+    if num < 1 << 64:
+        return all(_strong_probable_prime(num, a) for a in _deterministic_bases)
+
+    if policy == PRIMALITY_MILLER_RABIN:
+        return _miller_rabin(num, rounds)
+
+    if not _strong_probable_prime(num, 2) or not _strong_lucas_probable_prime(num):
+        return False
+
+    if policy == PRIMALITY_FIPS:
+        extra = next(r for bits, r in _fips_rounds if num.bit_length() >= bits)
+        return _miller_rabin(num, extra)
+
+    return True
+
+
+def _miller_rabin(num: int,
+                  rounds: int) -> bool:
+    """Miller-Rabin test of odd `num` > 3 with `rounds` random bases.
+
+    :param num: The number to be tested for primality.
+    :param rounds: Number of testing rounds.
+    :return: True if `num` is probably prime, False otherwise
+    """
+
+    return all(_strong_probable_prime(num, randrange(2, num - 1)) for _ in range(rounds))
+
+
+def _strong_probable_prime(num: int,
+                           base: int) -> bool:
+    """Strong probable prime (one Miller-Rabin round) test of odd `num` > 3.
+
+    :param num: The number to be tested for primality.
+    :param base: The base of the test.
+    :return: True if `num` is a strong probable prime to `base`, False otherwise
+    """
+
     r = 0
     s = num - 1
 
@@ -32,42 +149,263 @@ def is_prime(num: int,
         r += 1
         s //= 2
 
-    for _ in range(rounds):
-        a = randrange(2, num - 1)
-        x = pow(a, s, num)
+    x = pow(base, s, num)
+
+    if x == 1 or x == num - 1:
+        return True
+
+    for _ in range(r - 1):
+        x = pow(x, 2, num)
+        if x == num - 1:
+            return True
+
+    return False
+
+
+def _isqrt(num: int) -> int:
+    """Compute the integer square root of `num`.
+
+    :param num: Non-negative integer.
+    :return: The biggest integer whose square is not bigger than `num`.
+    """
+
+    if num < 2:
+        return num
+
+    x = 1 << ((num.bit_length() + 1) // 2)
+
+    while True:
+        y = (x + num // x) // 2
+
+        if y >= x:
+            return x
+
+        x = y
+
+
+def _jacobi(a: int,
+            n: int) -> int:
+    """Compute the Jacobi symbol (a/n) for odd positive `n`.
+
+    :param a: The numerator.
+    :param n: The denominator.
+    :return: The Jacobi symbol - -1, 0 or 1.
+    """
+
+    a %= n
+    result = 1
+
+    while a:
+        while a % 2 == 0:
+            a //= 2
+
+            if n % 8 in (3, 5):
+                result = -result
+
+        a, n = n, a
+
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+
+        a %= n
+
+    return result if n == 1 else 0
+
+
+def _strong_lucas_probable_prime(num: int) -> bool:
+    """Strong Lucas probable prime test of odd `num` > 3.
+
+    Parameters are chosen by the Selfridge's method A: D is the first
+    of 5, -7, 9, -11, ... with the Jacobi symbol (D/num) = -1,
+    P = 1 and Q = (1 - D) / 4.
+
+    :param num: The number to be tested for primality.
+    :return: True if `num` is a strong Lucas probable prime, False otherwise
+    """
+
+    # no suitable D exists for squares
+    if _isqrt(num) ** 2 == num:
+        return False
 
-        if x == 1 or x == num - 1:
-            continue
+    d = 5
 
-        for _ in range(r - 1):
-            x = pow(x, 2, num)
-            if x == num - 1:
-                break
-        else:
+    while True:
+        jacobi = _jacobi(d, num)
+
+        if jacobi == -1:
+            break
+
+        if jacobi == 0 and abs(d) != num:
             return False
 
-    return True
+        d = -d - 2 if d > 0 else -d + 2
+
+    q = (1 - d) // 4
+
+    # num + 1 = k * 2^s, k odd
+    s = 0
+    k = num + 1
+
+    while k % 2 == 0:
+        s += 1
+        k //= 2
+
+    # U_1, V_1, Q^1
+    u = 1
+    v = 1
+    q_k = q % num
+
+    for bit in bin(k)[3:]:
+        # index doubling
+        u = u * v % num
+        v = (v * v - 2 * q_k) % num
+        q_k = q_k * q_k % num
+
+        if bit == '1':
+            # index increment, halving modulo odd num
+            u, v = (u + v) % num, (d * u + v) % num
+
+            if u % 2:
+                u += num
+            if v % 2:
+                v += num
+
+            u //= 2
+            v //= 2
+            q_k = q_k * q % num
+
+    if u == 0 or v == 0:
+        return True
+
+    for _ in range(s - 1):
+        v = (v * v - 2 * q_k) % num
+
+        if v == 0:
+            return True
 
+        q_k = q_k * q_k % num
 
-def random_prime(n_bits: int):
+    return False
+
+
+def random_prime(n_bits: int,
+                 stats: Optional[PrimeSearchStats] = None,
+                 policy: str = PRIMALITY_BPSW) -> int:
     """Generate a prime number with length of `n_bits`.
 
-    :param n_bits: Number of bits of the prime.
+    The two most significant bits are set, so a product of two
+    such primes has exactly 2 * `n_bits` bits.
+
+    The candidates are searched incrementally in windows of odd numbers
+    following a random start. Every window is first sieved by the small
+    primes, so most composites are rejected without any modular
+    exponentiation, only the survivors are tested by :py:func:`is_prime`.
+
+    :param n_bits: Number of bits of the prime, at least 2.
+    :param stats: Counters to update with the search statistics.
+    :param policy: The primality testing policy, see :py:func:`is_prime`.
     :return: Random prime.
     """
 
+    if n_bits < 2:
+        raise ValueError("Prime must have at least 2 bits")
+
+    if n_bits == 2:
+        return 3
+
+    lower = 3 << (n_bits - 2)
+    upper = 1 << n_bits
+    window = max(n_bits, 64)
+
+    # all candidates are bigger than the sieving primes, so no prime is sieved out
+    primes = [p for p in _small_primes if p < lower]
+
     while True:
+        # make sure the number is odd and has exactly n_bits
+        start = getrandbits(n_bits) | lower | 1
+        count = min(window, (upper - start + 1) // 2)
+
+        # sieve[i] tells if the candidate start + 2 * i can be prime
+        sieve = bytearray([1]) * count
+
+        for p in primes:
+            # the first i with p | start + 2 * i
+            i = -start * ((p + 1) // 2) % p
+            sieve[i::p] = bytes(len(range(i, count, p)))
+
+        survivors = [i for i in range(count) if sieve[i]]
+
+        if stats is not None:
+            stats.windows += 1
+            stats.sieved += count - len(survivors)
+
+        for i in survivors:
+            if stats is not None:
+                stats.tested += 1
+
+            if is_prime(start + 2 * i, policy=policy):
+                return start + 2 * i
+
+
+def _prime_worker(n_bits: int,
+                  results: multiprocessing.Queue):
+    """Search random primes forever and put them into `results`.
+
+    The worker blocks while the `results` queue is full.
+
+    :param n_bits: Number of bits of the primes.
+    :param results: The queue for the found primes.
+    """
+
+    # the forked workers would otherwise share the parent random state
+    random.seed()
+
+    while True:
+        results.put(random_prime(n_bits))
+
+
+def random_primes(n_bits: int,
+                  workers: Optional[int] = None) -> Iterator[int]:
+    """Generate random primes with length of `n_bits` in parallel.
+
+    Every worker process searches its own random candidates, the primes
+    are yielded in the order they are found. When `workers` found primes
+    wait to be taken, the workers block. The workers are terminated when
+    the iterator is closed (or garbage collected), so the searches still
+    running are cancelled.
+
+    :param n_bits: Number of bits of the primes.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :return: Iterator of random primes.
+    """
+
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1:
+        while True:
+            yield random_prime(n_bits)
+
+    # bounded, so the idle workers block instead of searching primes nobody takes
+    results = multiprocessing.Queue(maxsize=workers)
+    processes = [multiprocessing.Process(target=_prime_worker, args=(n_bits, results), daemon=True)
+                 for _ in range(workers)]
+
+    try:
+        for process in processes:
+            process.start()
 
-        num = getrandbits(n_bits)
+        while True:
+            yield results.get()
 
-        # make sure the number is odd
-        num |= 1
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
 
-        # make sure the number has exactly n_bits
-        num |= (2 << (n_bits - 1))
+        for process in processes:
+            process.join()
 
-        if is_prime(num):
-            return num
+        results.close()
 
 
 def mod_inverse(a: int,
@@ -0,0 +1,90 @@
+"""Helpers for running work in a pool of worker processes."""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar, Tuple
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def bounded_map(func: Callable[[T], R],
+                items: Iterable[T],
+                workers: Optional[int] = None,
+                in_flight: Optional[int] = None,
+                initializer: Optional[Callable] = None,
+                initargs: Tuple = (),
+                finalizer: Optional[Callable] = None) -> Iterator[R]:
+    """Map `func` over `items` in a pool of worker processes.
+
+    Unlike :py:meth:`concurrent.futures.Executor.map` the `items` are consumed
+    lazily - at most `in_flight` items are submitted and not yet yielded,
+    so memory stays bounded even for huge or endless iterables.
+    The results are yielded in the order of `items`.
+
+    With a single worker everything runs in the calling process, the `finalizer`
+    is then called when the work is done, so the calling process does not keep
+    what the `initializer` stored (e.g. a key in a module global).
+
+    :param func: The function to map, must be picklable.
+    :param items: The items to map `func` over.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param in_flight: Maximal number of pending items, defaults to 4 * `workers`.
+    :param initializer: Function called once in every worker before any work.
+    :param initargs: Arguments of the `initializer`.
+    :param finalizer: Function undoing the `initializer` in the calling process.
+    :return: Iterator of the results.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    in_flight = in_flight or 4 * workers
+
+    if workers == 1:
+        try:
+            if initializer:
+                initializer(*initargs)
+
+            yield from map(func, items)
+        finally:
+            if finalizer:
+                finalizer()
+
+        return
+
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+
+        for item in items:
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+
+            pending.append(executor.submit(func, item))
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def batched(items: Iterable[T],
+            size: int) -> Iterator[List[T]]:
+    """Group the `items` into lists of `size` items.
+
+    Cheap tasks are submitted to :py:func:`bounded_map` in batches,
+    so the per task overhead of the pool is paid once per batch.
+
+    :param items: The items.
+    :param size: Number of items in a batch, the last batch may be shorter.
+    :return: Iterator of the batches.
+    """
+
+    batch = []
+
+    for item in items:
+        batch.append(item)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
@@ -7,6 +7,9 @@ to string representation.
 
 from .rsa import Rsa
 from .key import Key, PublicKey, PrivateKey, KeyPair
-from .key_formatter import KeyFormatter, TomlKeyFormatter, KeyFormatError
+from .key_formatter import KeyFormatter, TomlKeyFormatter, BinaryKeyFormatter, KeyFormatError
+from .key_formatter import detect_key_formatter, load_key
+from .key_cache import KeyCache, KeyCacheStats, get_key_cache
 
-__all__ = ["Rsa", "KeyFormatter", "TomlKeyFormatter", "Key", "PublicKey", "PrivateKey", "KeyPair"]
+__all__ = ["Rsa", "KeyFormatter", "TomlKeyFormatter", "BinaryKeyFormatter", "detect_key_formatter", "load_key",
+           "Key", "PublicKey", "PrivateKey", "KeyPair", "KeyCache", "KeyCacheStats", "get_key_cache"]
@@ -1,11 +1,21 @@
 """RSA public key, private key and key pair.
 """
-import math
+import hashlib
 from abc import ABC
+from typing import Optional, Tuple
+
+from kiv_bit_rsa.math import mod_inverse
 
 
 class Key(ABC):
-    """Base class for RSA keys."""
+    """Base class for RSA keys.
+
+    Keys are immutable and hashable - two keys are equal when they
+    are of the same type and have the same exponent and modulus,
+    so they can be used as dict keys in caches and keyrings.
+    """
+
+    __slots__ = ("_exp", "_mod", "_byte_size")
 
     def __init__(self,
                  exp: int,
@@ -15,8 +25,47 @@ class Key(ABC):
         :param exp: The key exponent.
         :param mod: The key modulus.
         """
-        self._exp = exp
-        self._mod = mod
+        self._set("_exp", exp)
+        self._set("_mod", mod)
+        self._set("_byte_size", (mod.bit_length() + 7) // 8)
+
+    def _set(self,
+             name: str,
+             value):
+        """Set attribute of the immutable key, only for initialization.
+
+        :param name: The attribute name.
+        :param value: The attribute value.
+        """
+        object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Key is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Key is immutable")
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+
+        return self._exp == other._exp and self._mod == other._mod
+
+    def __hash__(self):
+        return hash((type(self), self._exp, self._mod))
+
+    def __reduce__(self):
+        return type(self), self._args()
+
+    def __repr__(self):
+        return "{}({} bits, {})".format(type(self).__name__, self.bit_length(), self.fingerprint().hex()[:16])
+
+    def _args(self) -> Tuple:
+        """Get the arguments of the constructor creating an equal key.
+
+        :return: The constructor arguments.
+        """
+        return self._exp, self._mod
 
     @property
     def exp(self) -> int:
@@ -38,7 +87,24 @@ class Key(ABC):
 
         :return: The number of bytes.
         """
-        return math.ceil(self._mod.bit_length() / 8)
+        return self._byte_size
+
+    def bit_length(self) -> int:
+        """Get the number of bits of the key modulus.
+
+        :return: The number of bits.
+        """
+        return self._mod.bit_length()
+
+    def fingerprint(self) -> bytes:
+        """Get the fingerprint of the key.
+
+        The fingerprint is the SHA-256 digest of the big endian key modulus,
+        so both keys of a key pair have the same fingerprint.
+
+        :return: The fingerprint.
+        """
+        return hashlib.sha256(self._mod.to_bytes(self._byte_size, "big")).digest()
 
     def encrypt(self,
                 num: int) -> int:
@@ -54,7 +120,7 @@ class Key(ABC):
         if num >= self._mod:
             raise OverflowError("Integer {} is too big for encryption".format(num))
 
-        return pow(num, self._exp, self._mod)
+        return self._pow(num)
 
     def decrypt(self,
                 num: int) -> int:
@@ -70,20 +136,157 @@ class Key(ABC):
         if num >= self._mod:
             raise OverflowError("Integer {} is too big for decryption".format(num))
 
+        return self._pow(num)
+
+    def _pow(self,
+             num: int) -> int:
+        """Compute `num` ^ exp mod mod.
+
+        :param num: The base.
+        :return: The modular power.
+        """
+
         return pow(num, self._exp, self._mod)
 
 
 class PublicKey(Key):
     """RSA public key."""
 
+    __slots__ = ()
+
 
 class PrivateKey(Key):
-    """RSA private key."""
+    """RSA private key.
+
+    The private key can optionally carry the CRT components - the primes
+    p, q and the values dP = d mod (p - 1), dQ = d mod (q - 1),
+    qInv = q^-1 mod p. With them the modular power is computed with the
+    Chinese remainder theorem (Garner's recombination) which is about
+    3-4 times faster than the full-size power.
+    """
+
+    __slots__ = ("_p", "_q", "_dp", "_dq", "_qinv")
+
+    def __init__(self,
+                 exp: int,
+                 mod: int,
+                 p: Optional[int] = None,
+                 q: Optional[int] = None,
+                 dp: Optional[int] = None,
+                 dq: Optional[int] = None,
+                 qinv: Optional[int] = None):
+        """Initialize RSA private key.
+
+        When only the primes `p` and `q` are given, the rest
+        of the CRT components is computed.
+
+        :param exp: The key exponent.
+        :param mod: The key modulus.
+        :param p: The first prime factor of the modulus.
+        :param q: The second prime factor of the modulus.
+        :param dp: The exponent modulo p - 1.
+        :param dq: The exponent modulo q - 1.
+        :param qinv: The inverse of q modulo p.
+        :raise ValueError: When the CRT components do not match the key.
+        """
+        super().__init__(exp, mod)
+
+        if (p is None) != (q is None):
+            raise ValueError("Both primes p and q must be given")
+
+        if p is not None:
+            if p * q != mod or p == q:
+                raise ValueError("Primes p and q are not factors of the modulus")
+
+            dp = exp % (p - 1) if dp is None else dp
+            dq = exp % (q - 1) if dq is None else dq
+            qinv = mod_inverse(q, p) if qinv is None else qinv
+
+            if dp != exp % (p - 1) or dq != exp % (q - 1) or qinv * q % p != 1:
+                raise ValueError("CRT components do not match the key")
+
+        self._set("_p", p)
+        self._set("_q", q)
+        self._set("_dp", dp)
+        self._set("_dq", dq)
+        self._set("_qinv", qinv)
+
+    def __repr__(self):
+        return "{}({} bits, {}, crt={})".format(type(self).__name__, self.bit_length(),
+                                                self.fingerprint().hex()[:16], self.has_crt)
+
+    def _args(self) -> Tuple:
+        """Get the arguments of the constructor creating an equal key.
+
+        :return: The constructor arguments.
+        """
+        return self._exp, self._mod, self._p, self._q, self._dp, self._dq, self._qinv
+
+    @property
+    def has_crt(self) -> bool:
+        """Check if the key carries the CRT components.
+        :return: True if the CRT components are present.
+        """
+        return self._p is not None
+
+    @property
+    def p(self) -> Optional[int]:
+        """Get the first prime factor of the modulus.
+        :return: The prime p or None.
+        """
+        return self._p
+
+    @property
+    def q(self) -> Optional[int]:
+        """Get the second prime factor of the modulus.
+        :return: The prime q or None.
+        """
+        return self._q
+
+    @property
+    def dp(self) -> Optional[int]:
+        """Get the exponent modulo p - 1.
+        :return: The dP or None.
+        """
+        return self._dp
+
+    @property
+    def dq(self) -> Optional[int]:
+        """Get the exponent modulo q - 1.
+        :return: The dQ or None.
+        """
+        return self._dq
+
+    @property
+    def qinv(self) -> Optional[int]:
+        """Get the inverse of q modulo p.
+        :return: The qInv or None.
+        """
+        return self._qinv
+
+    def _pow(self,
+             num: int) -> int:
+        """Compute `num` ^ exp mod mod, using CRT if possible.
+
+        :param num: The base.
+        :return: The modular power.
+        """
+
+        if self._p is None:
+            return pow(num, self._exp, self._mod)
+
+        m1 = pow(num, self._dp, self._p)
+        m2 = pow(num, self._dq, self._q)
+        h = self._qinv * (m1 - m2) % self._p
+
+        return m2 + h * self._q
 
 
 class KeyPair:
     """Pair consisting of RSA private key and public key."""
 
+    __slots__ = ("_private_key", "_public_key")
+
     def __init__(self, private_key: PrivateKey, public_key: PublicKey):
         """Initialize key pair.
 
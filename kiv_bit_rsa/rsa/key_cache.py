@@ -0,0 +1,186 @@
+"""Process-wide cache of parsed RSA keys.
+
+Parsing keys (especially from TOML with multi-thousand-digit integers)
+is slow, so the parsed keys are cached:
+* by the SHA-256 digest of the key string - see :py:meth:`KeyCache.from_string`
+* by the key file identity (path, device, inode, size and modification time)
+  - see :py:meth:`KeyCache.load` - so a repeated load does not even read the file
+
+The keys are immutable, so one instance can be shared by all the callers.
+The cache holds at most `max_size` entries, the least recently used
+entries are evicted first.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from kiv_bit_rsa.rsa.key import Key
+
+DEFAULT_MAX_SIZE = 128
+"""Default maximal number of cached entries"""
+
+
+class KeyCacheStats:
+    """Counters of a key cache.
+
+    * `hits` - lookups which found the key
+    * `misses` - lookups which had to parse the key
+    * `evictions` - entries evicted because of the size bound
+    * `size` - current number of entries
+    """
+
+    def __init__(self,
+                 hits: int = 0,
+                 misses: int = 0,
+                 evictions: int = 0,
+                 size: int = 0):
+        """Initialize the counters."""
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.size = size
+
+    def __repr__(self):
+        return "KeyCacheStats(hits={}, misses={}, evictions={}, size={})".format(self.hits,
+                                                                                 self.misses,
+                                                                                 self.evictions,
+                                                                                 self.size)
+
+
+class KeyCache:
+    """LRU cache of parsed keys, safe to use from more threads."""
+
+    def __init__(self,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """Initialize an empty key cache.
+
+        :param max_size: Maximal number of cached entries.
+        """
+
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive")
+
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = KeyCacheStats()
+
+    def from_string(self,
+                    string: str,
+                    parse: Callable[[str], Key],
+                    namespace: Hashable = None) -> Key:
+        """Get the key parsed from `string`, parse it by `parse` on miss.
+
+        :param string: The key string representation.
+        :param parse: Function parsing the string into a key.
+        :param namespace: Identification of the string format, e.g. the formatter class.
+        :return: The key.
+        """
+
+        digest = hashlib.sha256(string.encode("utf8")).digest()
+
+        return self._get(("string", namespace, digest), lambda: parse(string))
+
+    def load(self,
+             path: str,
+             parse: Callable[[bytes], Key],
+             namespace: Hashable = None) -> Key:
+        """Get the key loaded from file `path`, read and parse it by `parse` on miss.
+
+        The entry is identified by the path, device, inode, size and modification
+        time of the file, so a changed file is loaded again. A file rewritten with
+        the same size within the modification time resolution is not detected,
+        use :py:meth:`invalidate` after such changes.
+
+        The file is read as bytes, so the `parse` decides how to decode it.
+
+        :param path: The key filepath.
+        :param parse: Function parsing the file content (bytes) into a key.
+        :param namespace: Identification of the file format, e.g. the formatter class.
+        :raise OSError: When the file can not be read.
+        :return: The key.
+        """
+
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        entry = ("file", namespace, path, stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+        def read():
+            with open(path, "rb") as file:
+                return parse(file.read())
+
+        return self._get(entry, read)
+
+    def invalidate(self,
+                   path: Optional[str] = None):
+        """Remove the entries of the key file `path` or all the entries.
+
+        :param path: The key filepath, None to clear the whole cache.
+        """
+
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                path = os.path.realpath(path)
+
+                for entry in [e for e in self._entries if e[0] == "file" and e[2] == path]:
+                    del self._entries[entry]
+
+    def stats(self) -> KeyCacheStats:
+        """Get a snapshot of the cache counters.
+
+        :return: The counters.
+        """
+
+        with self._lock:
+            return KeyCacheStats(self._stats.hits, self._stats.misses, self._stats.evictions, len(self._entries))
+
+    def _get(self,
+             entry: Hashable,
+             create: Callable[[], Key]) -> Key:
+        """Get the cached key of the `entry` or create and cache it.
+
+        The key is created outside of the lock, errors are not cached.
+
+        :param entry: The cache entry identification.
+        :param create: Function creating the key.
+        :return: The key.
+        """
+
+        with self._lock:
+            key = self._entries.get(entry)
+
+            if key is not None:
+                self._entries.move_to_end(entry)
+                self._stats.hits += 1
+                return key
+
+            self._stats.misses += 1
+
+        key = create()
+
+        with self._lock:
+            self._entries[entry] = key
+            self._entries.move_to_end(entry)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._stats.evictions += 1
+
+        return key
+
+
+_key_cache = KeyCache()
+
+
+def get_key_cache() -> KeyCache:
+    """Get the process-wide key cache.
+
+    :return: The key cache.
+    """
+
+    return _key_cache
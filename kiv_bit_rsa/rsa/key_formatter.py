@@ -1,9 +1,13 @@
 """RSA key formatters for converting keys to string representation"""
 
+import base64
+import binascii
 from abc import abstractmethod, ABC
+from struct import Struct
 
 import toml
 from kiv_bit_rsa.rsa.key import Key, PublicKey, PrivateKey
+from kiv_bit_rsa.rsa.key_cache import get_key_cache
 from kiv_bit_rsa.exception import KivBitRsaError
 
 
@@ -11,6 +15,20 @@ class KeyFormatError(KivBitRsaError):
     """RSA key string is in wrong format"""
 
 
+def _decode(data: bytes) -> str:
+    """Decode the text of a key.
+
+    :param data: The key bytes representation.
+    :raise KeyFormatError: When the bytes are not UTF-8 text.
+    :return: The key string representation.
+    """
+
+    try:
+        return data.decode("utf8")
+    except UnicodeDecodeError:
+        raise KeyFormatError('Key is not a text.')
+
+
 class KeyFormatter(ABC):
     """Base class for RSA key formatting.
     """
@@ -33,9 +51,54 @@ class KeyFormatter(ABC):
         :return: The Key.
         """
 
+    def to_bytes(self,
+                 key: Key) -> bytes:
+        """Convert `key` to bytes representation, as stored in key files.
+
+        :param key: The key to convert to bytes.
+        :return: The key bytes representation.
+        """
+
+        return self.to_string(key).encode("utf8")
+
+    def from_bytes(self,
+                   data: bytes) -> Key:
+        """Parse key bytes representation into Key.
+
+        :param data: The key bytes representation.
+        :raise KeyFormatError: When key bytes are in bad format.
+        :return: The Key.
+        """
+
+        return self.from_string(_decode(data))
+
+    def load(self,
+             path: str) -> Key:
+        """Load key from file `path`.
+
+        :param path: The key filepath.
+        :raise OSError: When the file can not be read.
+        :return: The Key.
+        """
+
+        with open(path, "rb") as file:
+            return self.from_bytes(file.read())
+
 
 class TomlKeyFormatter(KeyFormatter):
-    """Key formatter that uses TOML format."""
+    """Key formatter that uses TOML format.
+
+    The parsed keys are cached in the process-wide key cache
+    (see :py:mod:`kiv_bit_rsa.rsa.key_cache`), unless disabled.
+    """
+
+    def __init__(self,
+                 use_cache: bool = True):
+        """Initialize TOML key formatter.
+
+        :param use_cache: Use the process-wide key cache.
+        """
+        self._cache = get_key_cache() if use_cache else None
 
     def to_string(self, key: Key) -> str:
         """Convert `key` to string representation in TOML format.
@@ -55,6 +118,13 @@ class TomlKeyFormatter(KeyFormatter):
         key_dict["exp"] = key.exp
         key_dict["mod"] = key.mod
 
+        if isinstance(key, PrivateKey) and key.has_crt:
+            key_dict["p"] = key.p
+            key_dict["q"] = key.q
+            key_dict["dp"] = key.dp
+            key_dict["dq"] = key.dq
+            key_dict["qinv"] = key.qinv
+
         doc = {"rsa-key": key_dict}
 
         return toml.dumps(doc)
@@ -68,6 +138,34 @@ class TomlKeyFormatter(KeyFormatter):
         :return: The Key.
         """
 
+        if self._cache:
+            return self._cache.from_string(string, self._parse, type(self))
+
+        return self._parse(string)
+
+    def load(self,
+             path: str) -> Key:
+        """Load key in TOML format from file `path`.
+
+        :param path: The key filepath.
+        :raise OSError: When the file can not be read.
+        :raise KeyFormatError: When key file is in bad format.
+        :return: The Key.
+        """
+
+        if self._cache:
+            return self._cache.load(path, lambda data: self._parse(_decode(data)), type(self))
+
+        return super().load(path)
+
+    def _parse(self, string: str) -> Key:
+        """Parse key string representation in TOML format into Key.
+
+        :param string: The key string representation.
+        :raise KeyFormatError: When key string is in bad format.
+        :return: The Key.
+        """
+
         try:
             doc = toml.loads(string)
 
@@ -84,9 +182,166 @@ class TomlKeyFormatter(KeyFormatter):
 
             if key['type'] == 'public':
                 return PublicKey(key['exp'], key['mod'])
-            else:
-                return PrivateKey(key['exp'], key['mod'])
 
-        except ...:
+            # keys without the CRT components are still valid
+            crt = {name: key[name] for name in ('p', 'q', 'dp', 'dq', 'qinv') if name in key}
+
+            if not all(isinstance(value, int) for value in crt.values()):
+                raise Exception()
+
+            return PrivateKey(key['exp'], key['mod'], **crt)
+
+        except Exception:
             raise KeyFormatError('Key TOML string is in bad format.')
 
+
+class BinaryKeyFormatter(KeyFormatter):
+    """Key formatter that uses compact binary format.
+
+    The format is a header followed by the key integers::
+
+        magic "KBRK" | version (1 B) | type (1 B) | flags (1 B) | reserved (1 B)
+        length (4 B) | exp
+        length (4 B) | mod
+        [length (4 B) | p, q, dp, dq, qinv]   only with the CRT flag
+
+    All numbers are unsigned big endian. The string representation
+    is the base64 encoded bytes representation.
+    """
+
+    MAGIC = b"KBRK"
+    """The magic bytes at the start of the key"""
+
+    VERSION = 1
+    """The format version"""
+
+    TYPE_PUBLIC = 0
+    """Type of a public key"""
+
+    TYPE_PRIVATE = 1
+    """Type of a private key"""
+
+    FLAG_CRT = 1
+    """Flag of a private key with the CRT components"""
+
+    _header = Struct(">4sBBBB")
+    _length = Struct(">I")
+
+    def to_string(self, key: Key) -> str:
+        """Convert `key` to base64 encoded binary format.
+
+        :param key: The key to convert to string.
+        :return: The key string representation.
+        """
+
+        return base64.b64encode(self.to_bytes(key)).decode("ascii")
+
+    def from_string(self, string: str) -> Key:
+        """Parse key string representation in base64 encoded binary format into Key.
+
+        :param string: The key string representation.
+        :raise KeyFormatError: When key string is in bad format.
+        :return: The Key.
+        """
+
+        try:
+            data = base64.b64decode(string.encode("ascii"), validate=True)
+        except (binascii.Error, UnicodeEncodeError):
+            raise KeyFormatError('Key binary string is in bad format.')
+
+        return self.from_bytes(data)
+
+    def to_bytes(self, key: Key) -> bytes:
+        """Convert `key` to binary format.
+
+        :param key: The key to convert to bytes.
+        :return: The key bytes representation.
+        """
+
+        if isinstance(key, PublicKey):
+            key_type = self.TYPE_PUBLIC
+        elif isinstance(key, PrivateKey):
+            key_type = self.TYPE_PRIVATE
+        else:
+            raise NotImplementedError("Can not format object of type: {}".format(type(key)))
+
+        numbers = [key.exp, key.mod]
+        flags = 0
+
+        if isinstance(key, PrivateKey) and key.has_crt:
+            numbers += [key.p, key.q, key.dp, key.dq, key.qinv]
+            flags |= self.FLAG_CRT
+
+        parts = [self._header.pack(self.MAGIC, self.VERSION, key_type, flags, 0)]
+
+        for num in numbers:
+            size = (num.bit_length() + 7) // 8
+            parts.append(self._length.pack(size))
+            parts.append(num.to_bytes(size, "big"))
+
+        return b"".join(parts)
+
+    def from_bytes(self, data: bytes) -> Key:
+        """Parse key in binary format into Key.
+
+        :param data: The key bytes representation.
+        :raise KeyFormatError: When key bytes are in bad format.
+        :return: The Key.
+        """
+
+        try:
+            magic, version, key_type, flags, _ = self._header.unpack_from(data)
+
+            if magic != self.MAGIC or version != self.VERSION or key_type not in (self.TYPE_PUBLIC, self.TYPE_PRIVATE):
+                raise ValueError("Bad header")
+
+            if flags & ~self.FLAG_CRT or (flags and key_type == self.TYPE_PUBLIC):
+                raise ValueError("Bad flags")
+
+            numbers = []
+            offset = self._header.size
+
+            for _ in range(7 if flags & self.FLAG_CRT else 2):
+                size, = self._length.unpack_from(data, offset)
+                offset += self._length.size
+
+                if offset + size > len(data):
+                    raise ValueError("Truncated number")
+
+                numbers.append(int.from_bytes(data[offset:offset + size], "big"))
+                offset += size
+
+            if offset != len(data):
+                raise ValueError("Trailing data")
+
+            if key_type == self.TYPE_PUBLIC:
+                return PublicKey(*numbers)
+
+            return PrivateKey(*numbers)
+
+        except Exception:
+            raise KeyFormatError('Key binary data is in bad format.')
+
+
+def detect_key_formatter(data: bytes) -> KeyFormatter:
+    """Get the formatter of key data by its content.
+
+    :param data: The key bytes representation (or at least its start).
+    :return: :py:class:`BinaryKeyFormatter` for binary keys, :py:class:`TomlKeyFormatter` otherwise.
+    """
+
+    if data.startswith(BinaryKeyFormatter.MAGIC):
+        return BinaryKeyFormatter()
+
+    return TomlKeyFormatter()
+
+
+def load_key(data: bytes) -> Key:
+    """Parse key in any supported format, the format is detected.
+
+    :param data: The key bytes representation.
+    :raise KeyFormatError: When key is in bad format.
+    :return: The Key.
+    """
+
+    return detect_key_formatter(data).from_bytes(data)
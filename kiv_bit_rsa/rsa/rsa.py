@@ -1,12 +1,15 @@
 """RSA cipher key generation and encryption/decryption.
 """
 
-from math import gcd, ceil
+from math import gcd
 from random import randint
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
 
-from kiv_bit_rsa.math import random_prime, mod_inverse
+from kiv_bit_rsa.math import random_primes, mod_inverse
 from kiv_bit_rsa.exception import KivBitRsaError
+from kiv_bit_rsa.parallel import bounded_map, batched
 from kiv_bit_rsa.rsa.key import PrivateKey, PublicKey, KeyPair, Key
+from kiv_bit_rsa.rsa.stream import read_blocks, write_blocks, non_empty
 
 
 class RsaError(KivBitRsaError):
@@ -25,6 +28,14 @@ class DecryptError(RsaError):
     """Decryption failed."""
 
 
+class PublicExponentError(RsaError):
+    """Public exponent can not be used."""
+
+
+Buffer = Union[bytearray, memoryview]
+"""Writable bytes buffer"""
+
+
 class Rsa:
     """RSA cipher."""
 
@@ -43,34 +54,84 @@ class Rsa:
     BYTE_ORDER = 'big'
     """Message bytes to int byte order."""
 
-    def generate_keys(self, n_bits: int = 2048) -> KeyPair:
+    BATCH_SIZE = 64
+    """Number of blocks processed by a worker process in one task"""
+
+    def generate_keys(self,
+                      n_bits: int = 2048,
+                      public_exponent: Optional[int] = None,
+                      workers: int = 1) -> KeyPair:
         """Generate RSA private and public keys of size n_bits.
 
+        The public exponent is either fixed (commonly 65537, which makes
+        the public key operations much cheaper) or random (as big as
+        the modulus). The private key carries the CRT components.
+
+        With more `workers` the primes p and q are searched concurrently
+        in worker processes, the first two suitable primes found win.
+
         :param n_bits: Number of key modulus bits.
+        :param public_exponent: The fixed public exponent, random if None.
+        :param workers: Number of worker processes searching the primes.
         :raise KeyTooShortError: When given key size is too small.
+        :raise PublicExponentError: When the public exponent is not odd or smaller than 3.
         :return: The key pair.
         """
 
         if n_bits < self.KEY_LEN_MIN:
             raise KeyTooShortError('Key is too small. Minimum is {}'.format(self.KEY_LEN_MIN))
 
-        p = random_prime(n_bits // 2)
-        q = random_prime(n_bits // 2)
+        if public_exponent is not None and (public_exponent < 3 or public_exponent % 2 == 0):
+            raise PublicExponentError('Public exponent must be an odd number bigger than 2.')
+
+        p, q = self._random_primes(n_bits // 2, public_exponent, workers)
 
         n = p * q
         x = (p - 1) * (q - 1)
 
-        # get random number for public key
-        while True:
-            e = randint(1, x - 1)
+        if public_exponent is not None:
+            e = public_exponent
+        else:
+            # get random number for public key
+            while True:
+                e = randint(1, x - 1)
 
-            if gcd(e, x) == 1:
-                break
+                if gcd(e, x) == 1:
+                    break
 
         # get multiplicative inverse for private key
         d = mod_inverse(e, x)
 
-        return KeyPair(PrivateKey(d, n), PublicKey(e, n))
+        return KeyPair(PrivateKey(d, n, p, q), PublicKey(e, n))
+
+    @staticmethod
+    def _random_primes(n_bits: int,
+                       public_exponent: Optional[int],
+                       workers: int) -> Tuple[int, int]:
+        """Generate two distinct primes usable with the public exponent - gcd(e, p - 1) = 1.
+
+        :param n_bits: Number of bits of the primes.
+        :param public_exponent: The fixed public exponent or None for any primes.
+        :param workers: Number of worker processes searching the primes.
+        :return: Tuple of random primes (p, q).
+        """
+
+        found = []
+        primes = random_primes(n_bits, workers)
+
+        try:
+            for prime in primes:
+                if public_exponent is not None and gcd(public_exponent, prime - 1) != 1:
+                    continue
+
+                if prime not in found:
+                    found.append(prime)
+
+                if len(found) == 2:
+                    return found[0], found[1]
+        finally:
+            # cancel the searches still running
+            primes.close()
 
     def encrypt(self,
                 message: bytes,
@@ -83,11 +144,12 @@ class Rsa:
         :return: Encrypted `message`.
         """
 
-        p = int.from_bytes(self._pad_message(message, key.byte_size()), self.BYTE_ORDER)
+        size = key.byte_size()
+        p = int.from_bytes(self._pad_message(message, size), self.BYTE_ORDER)
 
         c = key.encrypt(p)
 
-        return c.to_bytes(key.byte_size(), self.BYTE_ORDER)
+        return c.to_bytes(size, self.BYTE_ORDER)
 
     def decrypt(self,
                 cipher: bytes,
@@ -114,6 +176,285 @@ class Rsa:
 
         return unpadded
 
+    def encrypt_many(self,
+                     messages: Iterable[bytes],
+                     key: Key) -> List[bytes]:
+        """Encrypt each of the `messages` with key `key`.
+
+        Same as calling :py:meth:`encrypt` for each message, but the constants
+        of the key are computed once and the padding is added arithmetically
+        without building the padded bytes.
+
+        :param messages: The messages to encrypt.
+        :param key: The encryption key.
+        :raise OverflowError: When some message is too long for encryption padding.
+        :return: The encrypted messages.
+        """
+
+        size = key.byte_size()
+
+        return [c.to_bytes(size, self.BYTE_ORDER) for c in self._encrypt_ints(messages, key, size)]
+
+    def encrypt_many_into(self,
+                          messages: Iterable[bytes],
+                          key: Key,
+                          buffer: Buffer,
+                          offset: int = 0) -> int:
+        """Encrypt each of the `messages` with key `key` into the `buffer`.
+
+        The ciphers (each :py:meth:`Key.byte_size` bytes long)
+        are written one after another starting at `offset`.
+
+        :param messages: The messages to encrypt.
+        :param key: The encryption key.
+        :param buffer: The buffer where to write the ciphers.
+        :param offset: The position in the `buffer` of the first cipher.
+        :raise OverflowError: When some message is too long for encryption padding.
+        :raise ValueError: When the `buffer` is too small.
+        :return: The number of bytes written.
+        """
+
+        size = key.byte_size()
+        start = offset
+
+        for c in self._encrypt_ints(messages, key, size):
+            if offset + size > len(buffer):
+                raise ValueError("Buffer is too small")
+
+            buffer[offset:offset + size] = c.to_bytes(size, self.BYTE_ORDER)
+            offset += size
+
+        return offset - start
+
+    def decrypt_many(self,
+                     ciphers: Iterable[bytes],
+                     key: Key) -> List[bytes]:
+        """Decrypt each of the `ciphers` with key `key`.
+
+        Same as calling :py:meth:`decrypt` for each cipher, but the constants
+        of the key are computed once.
+
+        :param ciphers: The ciphers to decrypt, each :py:meth:`Key.byte_size` bytes long.
+        :param key: The decryption key.
+        :raise DecryptError: When some cipher has wrong length or is wrongly decrypted.
+        :return: The decrypted messages.
+        """
+
+        return list(self._decrypt_messages(ciphers, key))
+
+    def decrypt_many_into(self,
+                          ciphers: Iterable[bytes],
+                          key: Key,
+                          buffer: Buffer,
+                          offset: int = 0) -> List[int]:
+        """Decrypt each of the `ciphers` with key `key` into the `buffer`.
+
+        The messages are written one after another starting at `offset`.
+
+        :param ciphers: The ciphers to decrypt, each :py:meth:`Key.byte_size` bytes long.
+        :param key: The decryption key.
+        :param buffer: The buffer where to write the messages.
+        :param offset: The position in the `buffer` of the first message.
+        :raise DecryptError: When some cipher has wrong length or is wrongly decrypted.
+        :raise ValueError: When the `buffer` is too small.
+        :return: The lengths of the messages.
+        """
+
+        lengths = []
+
+        for message in self._decrypt_messages(ciphers, key):
+            length = len(message)
+
+            if offset + length > len(buffer):
+                raise ValueError("Buffer is too small")
+
+            buffer[offset:offset + length] = message
+            offset += length
+            lengths.append(length)
+
+        return lengths
+
+    def _encrypt_ints(self,
+                      messages: Iterable[bytes],
+                      key: Key,
+                      size: int) -> Iterator[int]:
+        """Pad and encrypt the `messages` into integers.
+
+        The message padded by :py:meth:`_pad_message` to `size` bytes
+        (``00 FF .. FF 00 message``) is the big endian integer
+        ``2^(8 * (size - 1)) - 2^(8 * (len + 1)) + message``.
+
+        :param messages: The messages to encrypt.
+        :param key: The encryption key.
+        :param size: The key size in bytes.
+        :raise OverflowError: When some message is too long for encryption padding.
+        :return: Iterator of the encrypted integers.
+        """
+
+        top = 1 << 8 * (size - 1)
+        max_length = size - 3
+        byte_order = self.BYTE_ORDER
+        encrypt = key.encrypt
+
+        for message in messages:
+            length = len(message)
+
+            if length > max_length:
+                raise OverflowError('Message is too long for padding to {} bytes'.format(size))
+
+            yield encrypt(top - (1 << 8 * (length + 1)) + int.from_bytes(message, byte_order))
+
+    def _decrypt_messages(self,
+                          ciphers: Iterable[bytes],
+                          key: Key) -> Iterator[bytes]:
+        """Decrypt the `ciphers` and remove the padding.
+
+        :param ciphers: The ciphers to decrypt.
+        :param key: The decryption key.
+        :raise DecryptError: When some cipher has wrong length or is wrongly decrypted.
+        :return: Iterator of the decrypted messages.
+        """
+
+        size = key.byte_size()
+        mod = key.mod
+        byte_order = self.BYTE_ORDER
+        decrypt = key.decrypt
+        unpad = self._unpad_message
+
+        for cipher in ciphers:
+            if len(cipher) != size:
+                raise DecryptError("Cipher block is truncated.")
+
+            c = int.from_bytes(cipher, byte_order)
+
+            if c >= mod:
+                raise DecryptError("Cipher block is too big for the key.")
+
+            try:
+                message = unpad(decrypt(c).to_bytes(size, byte_order))
+            except WrongPaddingError:
+                raise DecryptError("Message can not be decrypted.")
+
+            yield message
+
+    def block_size(self,
+                   key: Key) -> int:
+        """Get the maximal length of a message encrypted into one block.
+
+        :param key: The encryption key.
+        :return: The number of bytes.
+        """
+
+        return key.byte_size() - 3
+
+    def encrypt_stream(self,
+                       messages: Iterable[bytes],
+                       key: Key,
+                       workers: Optional[int] = 1) -> Iterator[bytes]:
+        """Encrypt a stream of messages with key `key`, each message into one cipher block.
+
+        Every cipher block has :py:meth:`Key.byte_size` bytes. An empty stream
+        is encrypted into a block of an empty message, so a message short enough
+        is encrypted exactly like by :py:meth:`encrypt`.
+
+        The blocks are encrypted in batches of :py:attr:`BATCH_SIZE` by :py:meth:`encrypt_many`.
+        With more `workers` the batches are encrypted in worker processes,
+        the key is sent to every worker only once.
+        The cipher blocks are yielded in the order of the messages.
+
+        :param messages: The messages, each at most :py:meth:`block_size` bytes long.
+        :param key: The encryption key.
+        :param workers: Number of worker processes, None for the number of CPUs.
+        :raise OverflowError: When some message is too long for encryption padding.
+        :return: Iterator of the cipher blocks.
+        """
+
+        batches = batched(non_empty(messages), self.BATCH_SIZE)
+
+        if workers == 1:
+            results = (self.encrypt_many(batch, key) for batch in batches)
+        else:
+            results = bounded_map(_encrypt_batch, batches, workers,
+                                  initializer=_init_worker, initargs=(self, key), finalizer=_reset_worker)
+
+        for batch in results:
+            yield from batch
+
+    def decrypt_stream(self,
+                       ciphers: Iterable[bytes],
+                       key: Key,
+                       workers: Optional[int] = 1) -> Iterator[bytes]:
+        """Decrypt a stream of cipher blocks created by :py:meth:`encrypt_stream`.
+
+        With more `workers` the blocks are decrypted in parallel
+        like in :py:meth:`encrypt_stream`.
+
+        The blocks are independent, so a stream missing whole blocks (e.g. cut
+        at a block boundary) is NOT detected - it silently decrypts into
+        a shorter message. Only a partial block raises :py:exc:`DecryptError`.
+        Sign the cipher or the message when truncation matters.
+
+        :param ciphers: The cipher blocks, each :py:meth:`Key.byte_size` bytes long.
+        :param key: The decryption key.
+        :param workers: Number of worker processes, None for the number of CPUs.
+        :raise DecryptError: When some block is truncated or wrongly decrypted.
+        :return: Iterator of the messages.
+        """
+
+        batches = batched(ciphers, self.BATCH_SIZE)
+
+        if workers == 1:
+            results = (self.decrypt_many(batch, key) for batch in batches)
+        else:
+            results = bounded_map(_decrypt_batch, batches, workers,
+                                  initializer=_init_worker, initargs=(self, key), finalizer=_reset_worker)
+
+        for batch in results:
+            yield from batch
+
+    def encrypt_file(self,
+                     plaintext: BinaryIO,
+                     cipher: BinaryIO,
+                     key: Key,
+                     workers: Optional[int] = 1) -> int:
+        """Encrypt file `plaintext` of any size with key `key` into file `cipher`.
+
+        The file is read and encrypted block by block, so the memory
+        usage does not depend on the file size.
+
+        :param plaintext: The file to encrypt.
+        :param cipher: The file where to write the cipher blocks.
+        :param key: The encryption key.
+        :param workers: Number of worker processes, None for the number of CPUs.
+        :raise OverflowError: When the key is too short for encryption padding.
+        :return: The number of bytes written.
+        """
+
+        blocks = read_blocks(plaintext, max(1, self.block_size(key)))
+
+        return write_blocks(cipher, self.encrypt_stream(blocks, key, workers))
+
+    def decrypt_file(self,
+                     cipher: BinaryIO,
+                     plaintext: BinaryIO,
+                     key: Key,
+                     workers: Optional[int] = 1) -> int:
+        """Decrypt file `cipher` created by :py:meth:`encrypt_file` with key `key` into file `plaintext`.
+
+        A file cut at a block boundary is not detected, see :py:meth:`decrypt_stream`.
+
+        :param cipher: The file to decrypt.
+        :param plaintext: The file where to write the decrypted message.
+        :param key: The decryption key.
+        :param workers: Number of worker processes, None for the number of CPUs.
+        :raise DecryptError: When the last cipher block is truncated or some block is wrongly decrypted.
+        :return: The number of bytes written.
+        """
+
+        blocks = read_blocks(cipher, key.byte_size())
+
+        return write_blocks(plaintext, self.decrypt_stream(blocks, key, workers))
+
     def _pad_message(self,
                      message: bytes,
                      length: int) -> bytes:
@@ -163,3 +504,45 @@ class Rsa:
                 ))
 
         return message[message_start:]
+
+
+_worker_rsa = None
+_worker_key = None
+
+
+def _init_worker(rsa: Rsa,
+                 key: Key):
+    """Store the cipher and the key in a worker process.
+
+    :param rsa: The cipher.
+    :param key: The key used by all the tasks of the worker.
+    """
+
+    global _worker_rsa, _worker_key
+    _worker_rsa = rsa
+    _worker_key = key
+
+
+def _reset_worker():
+    """Forget the cipher and the key stored by :py:func:`_init_worker`."""
+    _init_worker(None, None)
+
+
+def _encrypt_batch(messages: List[bytes]) -> List[bytes]:
+    """Encrypt a batch of messages in a worker process.
+
+    :param messages: The messages.
+    :return: The cipher blocks.
+    """
+
+    return _worker_rsa.encrypt_many(messages, _worker_key)
+
+
+def _decrypt_batch(ciphers: List[bytes]) -> List[bytes]:
+    """Decrypt a batch of cipher blocks in a worker process.
+
+    :param ciphers: The cipher blocks.
+    :return: The messages.
+    """
+
+    return _worker_rsa.decrypt_many(ciphers, _worker_key)
@@ -0,0 +1,75 @@
+"""Reading and writing of block streams.
+
+The streams are processed by generator pipelines - only a few
+blocks are held in memory at a time, regardless of the stream size.
+"""
+
+from typing import BinaryIO, Iterable, Iterator
+
+
+def read_blocks(file: BinaryIO,
+                size: int) -> Iterator[bytes]:
+    """Read the `file` in blocks of `size` bytes.
+
+    Short reads (e.g. from pipes) are retried, so every block
+    except the last one has exactly `size` bytes.
+
+    :param file: The file to read.
+    :param size: The block size in bytes.
+    :return: Iterator of the blocks.
+    """
+
+    if size <= 0:
+        raise ValueError("Block size must be positive")
+
+    while True:
+        block = file.read(size)
+
+        if not block:
+            return
+
+        while len(block) < size:
+            rest = file.read(size - len(block))
+
+            if not rest:
+                break
+
+            block += rest
+
+        yield block
+
+
+def write_blocks(file: BinaryIO,
+                 blocks: Iterable[bytes]) -> int:
+    """Write the `blocks` into the `file`.
+
+    :param file: The file to write into.
+    :param blocks: The blocks to write.
+    :return: The number of bytes written.
+    """
+
+    written = 0
+
+    for block in blocks:
+        file.write(block)
+        written += len(block)
+
+    return written
+
+
+def non_empty(blocks: Iterable[bytes]) -> Iterator[bytes]:
+    """Yield the `blocks` or a single empty block when there are none.
+
+    :param blocks: The blocks.
+    :return: Iterator of at least one block.
+    """
+
+    empty = True
+
+    for block in blocks:
+        empty = False
+        yield block
+
+    if empty:
+        yield b""
+
@@ -3,8 +3,19 @@
 Signature module takes care about file signing and signatures verifying.
 """
 
-from .signature import Signature
-from .signable import Signable, SignableBinaryIO
-from .signature_formatter import SignatureFormatter, TomlSignatureFormatter, SignatureFormatError
+from .signature import Signature, TreeSignature
+from .tree import HashTree, SignableTree
+from .signable import Signable, SignableBinaryIO, SignableIncrementalIO, SignableMmapFile, SignableCachedFile
+from .signable import signable_file
+from .digest_cache import DigestCache, DigestCacheError, DigestCacheStats
+from .signature_formatter import SignatureFormatter, TomlSignatureFormatter, BinarySignatureFormatter
+from .signature_formatter import SignatureFormatError, detect_signature_formatter, load_signature
+from .checkpoint import Checkpoint
+from .bulk import VerifyResult, ManifestError, read_manifest, verify_many
+from .directory import hash_directory, sign_directory, verify_directory, walk_files
+from .checkpoint_formatter import CheckpointFormatter, TomlCheckpointFormatter, CheckpointFormatError
 
-__all__ = ["Signature", "Signable", "SignableBinaryIO", "SignatureFormatter", "TomlSignatureFormatter"]
+__all__ = ["Signature", "TreeSignature", "HashTree", "Signable", "SignableBinaryIO", "SignableIncrementalIO",
+           "SignableMmapFile", "SignableCachedFile", "SignableTree", "DigestCache", "DigestCacheError", "DigestCacheStats", "signable_file", "SignatureFormatter", "TomlSignatureFormatter",
+           "BinarySignatureFormatter", "detect_signature_formatter", "load_signature", "VerifyResult", "ManifestError", "read_manifest", "verify_many", "hash_directory",
+           "sign_directory", "verify_directory", "walk_files", "Checkpoint", "CheckpointFormatter", "TomlCheckpointFormatter"]
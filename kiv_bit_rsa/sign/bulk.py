@@ -0,0 +1,196 @@
+"""Bulk verification of many signed files in parallel.
+
+The files to verify are listed in a manifest - a text file with one
+``FILE<TAB>SIGNATURE`` pair per line. Empty lines and lines starting
+with ``#`` are ignored, relative paths are relative to the manifest.
+"""
+
+import os
+from typing import Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from kiv_bit_rsa.exception import KivBitRsaError
+from kiv_bit_rsa.parallel import bounded_map
+from kiv_bit_rsa.rsa import Key
+from kiv_bit_rsa.rsa.rsa import DecryptError
+from kiv_bit_rsa.sign.digest_cache import DigestCache
+from kiv_bit_rsa.sign.signable import signable_file
+from kiv_bit_rsa.sign.signature import TreeSignature
+from kiv_bit_rsa.sign.signature_formatter import load_signature
+from kiv_bit_rsa.sign.tree import SignableTree
+
+
+class ManifestError(KivBitRsaError):
+    """Manifest is in wrong format"""
+
+
+class VerifyResult:
+    """Result of verification of one file."""
+
+    def __init__(self,
+                 file: str,
+                 signature: str,
+                 size: Optional[int],
+                 verified: bool,
+                 error: Optional[str] = None):
+        """Initialize a verification result.
+
+        :param file: The filepath.
+        :param signature: The signature filepath.
+        :param size: The file size in bytes, None if the file can not be read.
+        :param verified: True if the file matches the signature.
+        :param error: Description of the error which prevented the verification.
+        """
+        self.file = file
+        self.signature = signature
+        self.size = size
+        self.verified = verified
+        self.error = error
+
+    def to_dict(self) -> dict:
+        """Convert the result to a JSON serializable dict.
+
+        :return: The result dict.
+        """
+
+        return {
+            "file": self.file,
+            "signature": self.signature,
+            "size": self.size,
+            "verified": self.verified,
+            "error": self.error,
+        }
+
+
+def read_manifest(manifest: TextIO,
+                  base_dir: str = ".") -> List[Tuple[str, str]]:
+    """Read the (file, signature) pairs of a manifest.
+
+    :param manifest: The manifest.
+    :param base_dir: The directory of the relative paths.
+    :raise ManifestError: When some line is not a pair of paths separated by tab.
+    :return: The pairs of filepaths.
+    """
+
+    entries = []
+
+    for number, line in enumerate(manifest, 1):
+        line = line.rstrip("\r\n")
+
+        if not line.strip() or line.startswith("#"):
+            continue
+
+        parts = line.split("\t")
+
+        if len(parts) != 2 or not all(parts):
+            raise ManifestError("Line {} is not in format FILE<TAB>SIGNATURE".format(number))
+
+        entries.append((os.path.join(base_dir, parts[0]), os.path.join(base_dir, parts[1])))
+
+    return entries
+
+
+def _size(path: str) -> int:
+    """Get the file size for scheduling, 0 for files which can not be read.
+
+    :param path: The filepath.
+    :return: The size in bytes.
+    """
+
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+_worker_key = None
+_worker_digest_cache = None
+
+
+def _init_worker(key: Key,
+                 digest_cache: Optional[str]):
+    """Store the verification key and open the digest cache in a worker process.
+
+    :param key: The key used by all the tasks of the worker.
+    :param digest_cache: The digest cache filepath, None to hash every file.
+    """
+
+    global _worker_key, _worker_digest_cache
+    _reset_worker()
+    _worker_key = key
+    _worker_digest_cache = DigestCache(digest_cache) if digest_cache else None
+
+
+def _reset_worker():
+    """Forget the key and close the digest cache stored by :py:func:`_init_worker`.
+
+    With a single worker they are stored in the calling process,
+    so they are released when the work is done.
+    """
+
+    global _worker_key, _worker_digest_cache
+    _worker_key = None
+
+    if _worker_digest_cache is not None:
+        cache, _worker_digest_cache = _worker_digest_cache, None
+        cache.close()
+
+
+def _verify(entry: Tuple[str, str]) -> VerifyResult:
+    """Verify one file in a worker process.
+
+    :param entry: The pair of the file and the signature filepaths.
+    :return: The result.
+    """
+
+    path, signature_path = entry
+    size = None
+
+    try:
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+
+            with open(signature_path, "rb") as f:
+                signature = load_signature(f.read())
+
+            if isinstance(signature, TreeSignature):
+                signable = SignableTree(path, signature.tree.leaf_size, 1)
+            else:
+                signable = signable_file(file, _worker_digest_cache)
+
+            return VerifyResult(path, signature_path, size, signature.verify(signable, _worker_key))
+
+    except (DecryptError, OverflowError):
+        # a signature without the key fingerprint checked with a wrong key,
+        # the cipher may be even too big for the modulus of the wrong key
+        return VerifyResult(path, signature_path, size, False)
+
+    except (OSError, KivBitRsaError) as e:
+        return VerifyResult(path, signature_path, size, False, str(e) or type(e).__name__)
+
+
+def verify_many(entries: Iterable[Tuple[str, str]],
+                key: Key,
+                workers: Optional[int] = None,
+                digest_cache: Optional[str] = None) -> Iterator[VerifyResult]:
+    """Verify many files against their signatures in parallel.
+
+    The files are verified from the largest to the smallest, so the big files
+    do not end up running alone at the end. The results are yielded in this order.
+    The key is sent to every worker process only once.
+
+    :param entries: The pairs of the file and the signature filepaths.
+    :param key: The verification key.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param digest_cache: Filepath of the :py:class:`DigestCache` shared by the workers.
+    :raise DigestCacheError: When the digest cache file can not be used.
+    :return: Iterator of the results.
+    """
+
+    entries = sorted(entries, key=lambda entry: _size(entry[0]), reverse=True)
+
+    if digest_cache:
+        # create the cache before the workers share it, a bad cache file fails here
+        DigestCache(digest_cache).close()
+
+    return bounded_map(_verify, entries, workers,
+                       initializer=_init_worker, initargs=(key, digest_cache), finalizer=_reset_worker)
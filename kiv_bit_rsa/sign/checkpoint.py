@@ -0,0 +1,192 @@
+"""Hash checkpoints for incremental hashing of append-only files.
+
+A checkpoint is trusted as it is stored: the midstate is resumed
+without rehashing the bytes it stands for, so a checkpoint modified
+by somebody who can also compute its guard digest yields a wrong
+signature. Keep the checkpoints where only the signer can write.
+"""
+
+from __future__ import annotations
+
+import os
+from struct import pack
+from typing import BinaryIO, Iterable, Optional, Tuple, Type
+
+from kiv_bit_rsa.hash import Md5
+
+
+class Checkpoint:
+    """Resumable hash state of an append-only file.
+
+    :py:class:`Checkpoint` holds the hash midstate after the first
+    `size` bytes of a file. To detect truncated or rewritten files it
+    holds also the guard digest - a digest of the midstate, the size and
+    :py:attr:`GUARD_WINDOWS` windows of :py:attr:`GUARD_SIZE` bytes spread
+    evenly over the hashed part of the file (the first and the last bytes
+    included) - and the identity (device and inode) of the file, so a file
+    replaced by a new one (e.g. by rename) is detected.
+
+    Files up to ``GUARD_WINDOWS * GUARD_SIZE`` bytes are guarded whole.
+    In larger files only the windows are compared, so an in-place rewrite
+    of the file between them is NOT detected and the hash is resumed from
+    a stale state. Use the checkpoints only for truly append-only files.
+    """
+
+    GUARD_SIZE = 4096
+    """Size of the guard windows in bytes"""
+
+    GUARD_WINDOWS = 64
+    """Number of the guard windows"""
+
+    def __init__(self,
+                 hash_class: Type[Md5],
+                 midstate: bytes,
+                 size: int,
+                 guard_digest: bytes,
+                 file_id: Optional[Tuple[int, int]] = None):
+        """Initialize a checkpoint.
+
+        :param hash_class: The class used for hash.
+        :param midstate: The hash midstate after `size` bytes.
+        :param size: The number of hashed bytes.
+        :param guard_digest: Digest of the midstate, the size and the guard windows.
+        :param file_id: Tuple (device, inode) of the file, None if unknown.
+        :raise ValueError: When the midstate is malformed or was not taken after `size` bytes.
+        """
+
+        if hash_class.from_midstate(midstate).hashed_size != size:
+            raise ValueError("Midstate does not match the hashed size")
+
+        self._hash_class = hash_class
+        self._midstate = midstate
+        self._size = size
+        self._guard_digest = guard_digest
+        self._file_id = file_id
+
+    @classmethod
+    def create(cls,
+               h: Md5,
+               file: BinaryIO) -> Checkpoint:
+        """Create a checkpoint of hash `h` of the `file`.
+
+        The file position is left unchanged.
+
+        :param h: The hash of the `file` content up to the current position.
+        :param file: The hashed file, must be seekable.
+        :return: The checkpoint.
+        """
+
+        size = file.tell()
+        midstate = h.midstate()
+
+        try:
+            guard_digest = cls._compute_guard_digest(type(h), midstate, file, size)
+        finally:
+            file.seek(size)
+
+        return Checkpoint(type(h), midstate, size, guard_digest, _file_id(file))
+
+    def resume(self,
+               file: BinaryIO) -> Optional[Md5]:
+        """Resume hashing of the `file` from this checkpoint.
+
+        Checks that the file was not replaced, is not shorter than
+        the checkpoint and that the guard digest did not change.
+        On success the file is positioned right after the already
+        hashed bytes.
+
+        :param file: The hashed file, must be seekable.
+        :return: The resumed hash or None when the file was replaced, truncated or rewritten.
+        """
+
+        if self._file_id is not None and _file_id(file) not in (None, self._file_id):
+            return None
+
+        if file.seek(0, 2) < self._size:
+            return None
+
+        if self._compute_guard_digest(self._hash_class, self._midstate, file, self._size) != self._guard_digest:
+            return None
+
+        file.seek(self._size)
+
+        return self._hash_class.from_midstate(self._midstate)
+
+    @classmethod
+    def _compute_guard_digest(cls,
+                              hash_class: Type[Md5],
+                              midstate: bytes,
+                              file: BinaryIO,
+                              size: int) -> bytes:
+        """Compute the guard digest of the first `size` bytes of `file`.
+
+        :param hash_class: The class used for hash.
+        :param midstate: The hash midstate after `size` bytes.
+        :param file: The file.
+        :param size: The number of bytes guarded.
+        :return: The digest.
+        """
+
+        h = hash_class(pack("<Q", size) + midstate)
+
+        for offset in cls._guard_offsets(size):
+            file.seek(offset)
+            h.update(file.read(min(cls.GUARD_SIZE, size - offset)))
+
+        return h.to_bytes()
+
+    @classmethod
+    def _guard_offsets(cls,
+                       size: int) -> Iterable[int]:
+        """Get the offsets of the guard windows of the first `size` bytes.
+
+        :param size: The number of bytes guarded.
+        :return: The offsets.
+        """
+
+        if size <= cls.GUARD_SIZE * cls.GUARD_WINDOWS:
+            return range(0, size, cls.GUARD_SIZE)
+
+        last = size - cls.GUARD_SIZE
+
+        return [i * last // (cls.GUARD_WINDOWS - 1) for i in range(cls.GUARD_WINDOWS)]
+
+    @property
+    def hash_method(self) -> Type[Md5]:
+        """Get the hash method."""
+        return self._hash_class
+
+    @property
+    def midstate(self) -> bytes:
+        """Get the hash midstate."""
+        return self._midstate
+
+    @property
+    def size(self) -> int:
+        """Get the number of hashed bytes."""
+        return self._size
+
+    @property
+    def guard_digest(self) -> bytes:
+        """Get the digest of the midstate, the size and the guard windows."""
+        return self._guard_digest
+
+    @property
+    def file_id(self) -> Optional[Tuple[int, int]]:
+        """Get the tuple (device, inode) of the file, None if unknown."""
+        return self._file_id
+
+
+def _file_id(file: BinaryIO) -> Optional[Tuple[int, int]]:
+    """Get the identity of the `file`.
+
+    :param file: The file.
+    :return: Tuple (device, inode), None for streams without a file descriptor.
+    """
+
+    try:
+        stat = os.fstat(file.fileno())
+    except (AttributeError, OSError, ValueError):
+        return None
+
+    return stat.st_dev, stat.st_ino
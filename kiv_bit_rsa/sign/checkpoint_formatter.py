@@ -0,0 +1,100 @@
+"""Checkpoint formatters for converting hash checkpoints to string representation."""
+import base64
+from abc import abstractmethod, ABC
+
+import toml
+from kiv_bit_rsa.exception import KivBitRsaError
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.sign.checkpoint import Checkpoint
+
+
+class CheckpointFormatError(KivBitRsaError):
+    """Checkpoint string is in wrong format"""
+
+
+class CheckpointFormatter(ABC):
+    """Base class for Checkpoint formatting.
+    """
+
+    @abstractmethod
+    def to_string(self,
+                  checkpoint: Checkpoint) -> str:
+        """Convert `checkpoint` to string representation.
+
+        :param checkpoint: The checkpoint to convert to string.
+        :return: The checkpoint string representation.
+        """
+
+    @abstractmethod
+    def from_string(self,
+                    string: str) -> Checkpoint:
+        """Parse checkpoint string representation into Checkpoint instance.
+
+        :param string: The checkpoint string representation.
+        :return: The Checkpoint.
+        """
+
+
+class TomlCheckpointFormatter(CheckpointFormatter):
+    """Checkpoint formatter that uses TOML format."""
+
+    def to_string(self, checkpoint: Checkpoint) -> str:
+        """Convert `checkpoint` to string representation in TOML format.
+        :param checkpoint: The checkpoint to convert to string.
+        :return: The checkpoint string representation.
+        """
+
+        checkpoint_dict = {}
+
+        if checkpoint.hash_method == Md5:
+            checkpoint_dict["hash-method"] = "MD5"
+        else:
+            raise NotImplementedError("Can not format hash method of type: {}".format(checkpoint.hash_method))
+
+        checkpoint_dict["size"] = checkpoint.size
+        checkpoint_dict["midstate"] = base64.b64encode(checkpoint.midstate).decode("utf8")
+        checkpoint_dict["guard-digest"] = checkpoint.guard_digest.hex()
+
+        if checkpoint.file_id is not None:
+            checkpoint_dict["device"], checkpoint_dict["inode"] = checkpoint.file_id
+
+        doc = {"checkpoint": checkpoint_dict}
+
+        return toml.dumps(doc)
+
+    def from_string(self, string: str) -> Checkpoint:
+        """Parse checkpoint string representation
+        in TOML format into Checkpoint instance.
+
+        :param string: The checkpoint string representation.
+        :raise CheckpointFormatError: When checkpoint string is in bad format.
+        :return: The Checkpoint.
+        """
+
+        try:
+            doc = toml.loads(string)
+
+            checkpoint = doc['checkpoint']
+
+            if checkpoint['hash-method'] != 'MD5':
+                raise ValueError("Unknown hash method")
+
+            if not isinstance(checkpoint['size'], int) or checkpoint['size'] < 0:
+                raise ValueError("Bad size")
+
+            file_id = None
+
+            if 'device' in checkpoint or 'inode' in checkpoint:
+                file_id = (checkpoint['device'], checkpoint['inode'])
+
+                if not all(isinstance(i, int) for i in file_id):
+                    raise ValueError("Bad file identity")
+
+            return Checkpoint(Md5,
+                              base64.b64decode(checkpoint['midstate'].encode("utf8"), validate=True),
+                              checkpoint['size'],
+                              bytes.fromhex(checkpoint['guard-digest']),
+                              file_id)
+
+        except Exception:
+            raise CheckpointFormatError('Checkpoint TOML string is in bad format.')
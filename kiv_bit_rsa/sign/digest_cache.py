@@ -0,0 +1,298 @@
+"""Persistent cache of file digests.
+
+Hashing large files again and again is the dominant cost of repeated
+verification of mostly unchanged files. The :py:class:`DigestCache`
+stores the digests in a single SQLite file, keyed by the file identity
+(device, inode, size and modification time in nanoseconds) and the hash
+method name, so a digest of an unchanged file costs only a ``stat``.
+
+A file rewritten with the same size and the modification time set back
+is not detected, so the cache trusts everybody who can modify the files
+and the cache file itself. Use the cache only where this holds.
+
+The cache holds at most `max_entries` digests. When the bound is
+exceeded, the least recently used tenth of the entries is evicted.
+The use times of the hits are kept in memory and written in one
+transaction, so a warm lookup does not write into the file.
+"""
+
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from kiv_bit_rsa.exception import KivBitRsaError
+
+DEFAULT_MAX_ENTRIES = 1000000
+"""Default maximal number of cached digests"""
+
+FLUSH_HITS = 1000
+"""Number of hits after which their use times are written into the file"""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    method TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    used REAL NOT NULL,
+    PRIMARY KEY (dev, ino, size, mtime_ns, method)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS digests_used ON digests (used);
+"""
+
+
+class DigestCacheError(KivBitRsaError):
+    """Digest cache file can not be used"""
+
+
+@contextmanager
+def _translate_errors():
+    """Translate the SQLite errors into :py:class:`DigestCacheError`."""
+
+    try:
+        yield
+    except sqlite3.Error as e:
+        raise DigestCacheError(str(e) or type(e).__name__) from e
+
+
+class DigestCacheStats:
+    """Counters of a digest cache.
+
+    * `hits` - lookups which found the digest
+    * `misses` - lookups which did not find the digest
+    * `evictions` - entries evicted because of the size bound
+    * `size` - current number of entries
+    """
+
+    def __init__(self,
+                 hits: int = 0,
+                 misses: int = 0,
+                 evictions: int = 0,
+                 size: int = 0):
+        """Initialize the counters."""
+        self.hits = hits
+        self.misses = misses
+        self.evictions = evictions
+        self.size = size
+
+    def __repr__(self):
+        return "DigestCacheStats(hits={}, misses={}, evictions={}, size={})".format(self.hits,
+                                                                                    self.misses,
+                                                                                    self.evictions,
+                                                                                    self.size)
+
+
+class DigestCache:
+    """LRU cache of file digests stored in a single SQLite file.
+
+    More processes may share one cache file, every process
+    (e.g. every worker of a pool) opens its own :py:class:`DigestCache`.
+    """
+
+    def __init__(self,
+                 path: str,
+                 max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Open the digest cache, create the cache file if it does not exist.
+
+        :param path: The cache filepath.
+        :param max_entries: Maximal number of cached digests.
+        :raise DigestCacheError: When the file is not a digest cache.
+        """
+
+        if max_entries <= 0:
+            raise ValueError("Cache size must be positive")
+
+        self._path = path
+        self._max_entries = max_entries
+        self._stats = DigestCacheStats()
+        self._used = {}
+
+        with _translate_errors():
+            self._connection = sqlite3.connect(path, timeout=30, isolation_level=None)
+
+            try:
+                # the rollback journal exists only during a write, so the cache stays a single file
+                self._connection.execute("PRAGMA journal_mode=DELETE")
+                self._connection.executescript(_SCHEMA)
+                self._size = self._count()
+            except sqlite3.Error:
+                self._connection.close()
+                raise
+
+    def get(self,
+            stat: os.stat_result,
+            method: str) -> Optional[bytes]:
+        """Get the cached digest of a file.
+
+        :param stat: The file status, e.g. from :py:func:`os.fstat`.
+        :param method: The hash method name.
+        :raise DigestCacheError: When the cache file can not be read.
+        :return: The digest, None if it is not cached.
+        """
+
+        key = _key(stat, method)
+
+        with _translate_errors():
+            row = self._connection.execute("SELECT digest FROM digests "
+                                           "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND method = ?",
+                                           key).fetchone()
+
+        if row is None:
+            self._stats.misses += 1
+            return None
+
+        self._stats.hits += 1
+        self._used[key] = time.time()
+
+        if len(self._used) >= FLUSH_HITS:
+            self.flush()
+
+        return bytes(row[0])
+
+    def put(self,
+            stat: os.stat_result,
+            method: str,
+            digest: bytes):
+        """Store the digest of a file.
+
+        :param stat: The file status taken before the file was hashed.
+        :param method: The hash method name.
+        :param digest: The digest.
+        :raise DigestCacheError: When the cache file can not be written.
+        """
+
+        with _translate_errors():
+            self._connection.execute("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                     _key(stat, method) + (digest, time.time()))
+
+        self._size += 1
+
+        if self._size > self._max_entries:
+            self._evict()
+
+    def flush(self):
+        """Write the use times of the hits into the cache file.
+
+        :raise DigestCacheError: When the cache file can not be written.
+        """
+
+        if not self._used:
+            return
+
+        with _translate_errors():
+            self._connection.execute("BEGIN")
+
+            try:
+                self._connection.executemany("UPDATE digests SET used = ? "
+                                             "WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND method = ?",
+                                             [(used,) + key for key, used in self._used.items()])
+                self._connection.execute("COMMIT")
+            except sqlite3.Error:
+                self._connection.execute("ROLLBACK")
+                raise
+
+        self._used.clear()
+
+    def clear(self):
+        """Remove all the cached digests.
+
+        :raise DigestCacheError: When the cache file can not be written.
+        """
+
+        self._used.clear()
+
+        with _translate_errors():
+            self._connection.execute("DELETE FROM digests")
+
+        self._size = 0
+
+    def stats(self) -> DigestCacheStats:
+        """Get a snapshot of the cache counters.
+
+        :raise DigestCacheError: When the cache file can not be read.
+        :return: The counters.
+        """
+
+        with _translate_errors():
+            size = self._count()
+
+        return DigestCacheStats(self._stats.hits, self._stats.misses, self._stats.evictions, size)
+
+    def close(self):
+        """Write the use times of the hits and close the cache file.
+
+        :raise DigestCacheError: When the cache file can not be written.
+        """
+
+        try:
+            self.flush()
+        finally:
+            self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __getstate__(self):
+        raise TypeError("DigestCache can not be pickled, open the cache in every process")
+
+    @property
+    def path(self) -> str:
+        """Get the cache filepath."""
+        return self._path
+
+    def _count(self) -> int:
+        """Count the cached digests.
+
+        :return: Number of the entries.
+        """
+
+        return self._connection.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+
+    def _evict(self):
+        """Evict the least recently used entries down to 90 % of the size bound.
+
+        The size is counted again, as other processes may share the file.
+        """
+
+        self.flush()
+
+        with _translate_errors():
+            excess = self._count() - (self._max_entries - self._max_entries // 10)
+
+            if excess > 0:
+                self._connection.execute("DELETE FROM digests WHERE (dev, ino, size, mtime_ns, method) IN "
+                                         "(SELECT dev, ino, size, mtime_ns, method FROM digests "
+                                         "ORDER BY used LIMIT ?)",
+                                         (excess,))
+                self._stats.evictions += excess
+
+            self._size = self._count()
+
+
+def _key(stat: os.stat_result,
+         method: str) -> tuple:
+    """Get the cache key of a file.
+
+    :param stat: The file status.
+    :param method: The hash method name.
+    :return: Tuple (device, inode, size, modification time, method).
+    """
+
+    return _int64(stat.st_dev), _int64(stat.st_ino), stat.st_size, stat.st_mtime_ns, method
+
+
+def _int64(value: int) -> int:
+    """Map an unsigned 64-bit integer onto the signed SQLite integer.
+
+    :param value: The unsigned integer.
+    :return: The signed integer.
+    """
+
+    return value - (1 << 64) if value >= 1 << 63 else value
@@ -0,0 +1,316 @@
+"""Signing of whole directories by a single signed manifest.
+
+The directory is walked and its files are hashed in parallel worker
+processes. The file digests are written into a manifest with one
+``DIGEST<TAB>SIZE<TAB>PATH`` line per file, preceded by a header naming
+the hash method. Only the digest of the manifest is signed, so a tree
+of any number of files costs a single private key operation.
+
+The walk is streamed and the manifest is hashed while it is written,
+so memory stays flat regardless of the number of files. Within every
+directory the entries are sorted by name, so the manifest of the same
+content is always the same. The paths are relative to the directory,
+separated by ``/``, with backslash, tab, carriage return and newline
+escaped by a backslash.
+
+Only regular files (and symlinks to them) are signed, symlinks
+to directories are not followed.
+"""
+
+import os
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Set, Tuple, Type
+
+from kiv_bit_rsa.hash import Hash
+from kiv_bit_rsa.parallel import bounded_map, batched
+from kiv_bit_rsa.rsa import Key
+from kiv_bit_rsa.sign.digest_cache import DigestCache
+from kiv_bit_rsa.sign.signable import Signable, signable_file
+from kiv_bit_rsa.sign.signature import Signature
+
+MANIFEST_HEADER = "# kiv-bit-rsa tree manifest 1"
+"""First line of the manifest"""
+
+BATCH_SIZE = 32
+"""Number of files hashed by one worker task"""
+
+_ESCAPES = [("\\", "\\\\"), ("\t", "\\t"), ("\r", "\\r"), ("\n", "\\n")]
+
+
+def escape_path(path: str) -> str:
+    """Escape the path for a manifest line.
+
+    :param path: The relative path.
+    :return: The escaped path.
+    """
+
+    for char, escaped in _ESCAPES:
+        path = path.replace(char, escaped)
+
+    return path
+
+
+def walk_files(root: str,
+               exclude: Iterable[str] = ()) -> Iterator[str]:
+    """Walk the files of the directory `root`.
+
+    The directories are walked depth first, files of a directory
+    are yielded before its subdirectories, both sorted by name.
+    Only the listing of one directory and the names of the directories
+    waiting to be walked are held in memory.
+
+    :param root: The directory path.
+    :param exclude: Relative paths of the files to skip.
+    :return: Iterator of the file paths relative to `root`, separated by ``/``.
+    """
+
+    exclude = set(exclude)
+    stack = [""]
+
+    while stack:
+        directory = stack.pop()
+        files = []
+        directories = []
+
+        with os.scandir(os.path.join(root, directory)) as entries:
+            for entry in entries:
+                path = directory + entry.name
+
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(path + "/")
+                elif entry.is_file() and path not in exclude:
+                    files.append(path)
+
+        yield from sorted(files)
+
+        stack.extend(sorted(directories, reverse=True))
+
+
+def relative_exclude(root: str,
+                     paths: Iterable[Optional[str]]) -> Set[str]:
+    """Get the relative paths of those `paths` which lie in the directory `root`.
+
+    Used to keep the manifest and the signature out of the signed tree.
+
+    :param root: The directory path.
+    :param paths: The filepaths, None values are ignored.
+    :return: The paths relative to `root`, separated by ``/``.
+    """
+
+    root = os.path.realpath(root)
+    exclude = set()
+
+    for path in paths:
+        if path is None:
+            continue
+
+        path = os.path.realpath(path)
+
+        if os.path.commonpath([root, path]) == root and path != root:
+            exclude.add(os.path.relpath(path, root).replace(os.sep, "/"))
+
+    return exclude
+
+
+_worker_root = None
+_worker_hash_class = None
+_worker_digest_cache = None
+
+
+def _init_worker(root: str,
+                 hash_class: Type[Hash],
+                 digest_cache: Optional[str]):
+    """Store the directory and the hash class and open the digest cache in a worker process.
+
+    :param root: The directory path.
+    :param hash_class: The class used for hash.
+    :param digest_cache: The digest cache filepath, None to hash every file.
+    """
+
+    global _worker_root, _worker_hash_class, _worker_digest_cache
+    _reset_worker()
+    _worker_root = root
+    _worker_hash_class = hash_class
+    _worker_digest_cache = DigestCache(digest_cache) if digest_cache else None
+
+
+def _reset_worker():
+    """Forget the directory and close the digest cache stored by :py:func:`_init_worker`.
+
+    With a single worker they are stored in the calling process,
+    so they are released when the work is done.
+    """
+
+    global _worker_root, _worker_hash_class, _worker_digest_cache
+    _worker_root = None
+    _worker_hash_class = None
+
+    if _worker_digest_cache is not None:
+        cache, _worker_digest_cache = _worker_digest_cache, None
+        cache.close()
+
+
+def _hash_files(paths: List[str]) -> List[Tuple[str, int, str]]:
+    """Hash a batch of files in a worker process.
+
+    :param paths: The relative file paths.
+    :return: List of tuples (path, size, hex digest).
+    """
+
+    entries = []
+
+    for path in paths:
+        with open(os.path.join(_worker_root, path), "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            digest = signable_file(file, _worker_digest_cache).digest(_worker_hash_class)
+            entries.append((path, size, digest.hex()))
+
+    return entries
+
+
+def hash_directory(root: str,
+                   hash_class: Type[Hash],
+                   workers: Optional[int] = None,
+                   exclude: Iterable[str] = (),
+                   digest_cache: Optional[str] = None) -> Iterator[Tuple[str, int, str]]:
+    """Hash the files of the directory `root` in parallel.
+
+    :param root: The directory path.
+    :param hash_class: The class used for hash.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param exclude: Relative paths of the files to skip.
+    :param digest_cache: Filepath of the :py:class:`DigestCache` shared by the workers.
+    :raise OSError: When some file can not be read.
+    :raise DigestCacheError: When the digest cache file can not be used.
+    :return: Iterator of tuples (path, size, hex digest) in the order of :py:func:`walk_files`.
+    """
+
+    if digest_cache:
+        # create the cache before the workers share it, a bad cache file fails here
+        DigestCache(digest_cache).close()
+
+    batches = bounded_map(_hash_files,
+                          batched(walk_files(root, exclude), BATCH_SIZE),
+                          workers,
+                          initializer=_init_worker,
+                          initargs=(root, hash_class, digest_cache),
+                          finalizer=_reset_worker)
+
+    for batch in batches:
+        yield from batch
+
+
+def write_manifest(root: str,
+                   manifest: BinaryIO,
+                   hash_class: Type[Hash],
+                   workers: Optional[int] = None,
+                   exclude: Iterable[str] = (),
+                   digest_cache: Optional[str] = None) -> Hash:
+    """Hash the directory `root` and write its manifest.
+
+    :param root: The directory path.
+    :param manifest: The file to write the manifest into, may be None to only compute its hash.
+    :param hash_class: The class used for hash of the files and of the manifest.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param exclude: Relative paths of the files to skip.
+    :param digest_cache: Filepath of the :py:class:`DigestCache` of the files.
+    :raise OSError: When some file can not be read.
+    :raise DigestCacheError: When the digest cache file can not be used.
+    :return: The hash of the manifest.
+    """
+
+    h = hash_class()
+
+    def write(line):
+        data = (line + "\n").encode("utf8", "surrogateescape")
+        h.update(data)
+
+        if manifest is not None:
+            manifest.write(data)
+
+    write(MANIFEST_HEADER)
+    write("# hash-method: " + hash_class.name())
+
+    for path, size, digest in hash_directory(root, hash_class, workers, exclude, digest_cache):
+        write("{}\t{}\t{}".format(digest, size, escape_path(path)))
+
+    return h
+
+
+class _SignableHash(Signable):
+    """Signable with an already computed hash."""
+
+    def __init__(self,
+                 h: Hash):
+        """Initialize a signable of a computed hash.
+
+        :param h: The hash.
+        """
+        self._hash = h
+
+    def hash(self,
+             hash_class: Type[Hash]) -> Hash:
+        """Get the objects hash.
+
+        :return: A copy of the hash.
+        """
+
+        return self._hash.copy()
+
+
+def sign_directory(root: str,
+                   manifest: BinaryIO,
+                   hash_class: Type[Hash],
+                   key: Key,
+                   workers: Optional[int] = None,
+                   exclude: Iterable[str] = (),
+                   digest_cache: Optional[str] = None) -> Signature:
+    """Sign the directory `root` by a signed manifest.
+
+    The returned signature is an ordinary signature of the manifest
+    file, so the manifest alone can be verified by :py:meth:`Signature.verify`.
+
+    :param root: The directory path.
+    :param manifest: The file to write the manifest into.
+    :param hash_class: The class used for hash.
+    :param key: The encryption key.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param exclude: Relative paths of the files to skip.
+    :param digest_cache: Filepath of the :py:class:`DigestCache` of the files.
+    :raise OSError: When some file can not be read.
+    :raise DigestCacheError: When the digest cache file can not be used.
+    :return: The signature of the manifest.
+    """
+
+    h = write_manifest(root, manifest, hash_class, workers, exclude, digest_cache)
+
+    return Signature.sign(_SignableHash(h), hash_class, key)
+
+
+def verify_directory(root: str,
+                     signature: Signature,
+                     key: Key,
+                     workers: Optional[int] = None,
+                     exclude: Iterable[str] = (),
+                     digest_cache: Optional[str] = None) -> bool:
+    """Verify the directory `root` against the signature of its manifest.
+
+    The manifest is computed again from the directory content (without
+    being stored), so any changed, added or removed file is detected.
+
+    :param root: The directory path.
+    :param signature: The signature created by :py:func:`sign_directory`.
+    :param key: The decryption key.
+    :param workers: Number of worker processes, defaults to the number of CPUs.
+    :param exclude: Relative paths of the files to skip.
+    :param digest_cache: Filepath of the :py:class:`DigestCache` of the files.
+    :raise OSError: When some file can not be read.
+    :raise DigestCacheError: When the digest cache file can not be used.
+    :return: True if the directory matches the signature.
+    """
+
+    if not signature.matches_key(key):
+        return False
+
+    h = write_manifest(root, None, signature.hash_method, workers, exclude, digest_cache)
+
+    return signature.verify(_SignableHash(h), key)
@@ -1,9 +1,18 @@
 """Definition of signable objects."""
 
+import mmap
+import os
+import stat
+import time
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Type
+from typing import BinaryIO, Type, Optional
 
-from kiv_bit_rsa.hash import Hash
+from kiv_bit_rsa.hash import Hash, Md5
+from kiv_bit_rsa.sign.checkpoint import Checkpoint
+from kiv_bit_rsa.sign.digest_cache import DigestCache
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+"""Default size of the read buffer in bytes"""
 
 
 class Signable(ABC):
@@ -17,36 +26,317 @@ class Signable(ABC):
         :return: The hash.
         """
 
+    def digest(self,
+               hash_class: Type[Hash]) -> bytes:
+        """Get the objects hash digest.
+
+        Signables which can get the digest without hashing
+        (e.g. from a :py:class:`DigestCache`) override this.
+
+        :param hash_class: The class used for hash.
+        :return: The digest.
+        """
+
+        return self.hash(hash_class).to_bytes()
+
+
+def _read_into(file: BinaryIO,
+               h: Hash,
+               buffer_size: int = DEFAULT_BUFFER_SIZE):
+    """Update hash `h` with the rest of the `file`.
+
+    The file is read into one reusable preallocated buffer.
+
+    :param file: The file or any binary stream.
+    :param h: The hash to update.
+    :param buffer_size: Size of the read buffer in bytes.
+    """
+
+    if not hasattr(file, "readinto"):
+        for chunk in iter(lambda: file.read(buffer_size), b''):
+            h.update(chunk)
+        return
+
+    buffer = bytearray(buffer_size)
+
+    with memoryview(buffer) as view:
+        while True:
+            n = file.readinto(buffer)
+
+            if not n:
+                break
+
+            h.update(view[:n])
+
+
+def _seekable(file: BinaryIO) -> bool:
+    """Check whether the `file` can be rewound.
+
+    :param file: The file or any binary stream.
+    :return: True if the stream is seekable.
+    """
+
+    try:
+        return file.seekable()
+    except (AttributeError, OSError, ValueError):
+        return False
+
 
 class SignableBinaryIO(Signable):
     """Signable file/binary io for use with signatures.
     """
 
     def __init__(self,
-                 file: BinaryIO):
+                 file: BinaryIO,
+                 prefix: Optional[Hash] = None,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
         """Initialize a signable file/binary io.
 
+        Files sharing a common header can hash the header once and pass
+        it as `prefix` - the stream is then hashed (from its current
+        position) on top of a copy of the `prefix`.
+
         :param file: The input file or any binary stream to sign.
+        :param prefix: The hash of the data preceding the stream.
+        :param buffer_size: Size of the read buffer in bytes.
         """
         self._file = file
+        self._prefix = prefix
+        self._buffer_size = buffer_size
+        self._start = None
         self._hash = None
 
     def hash(self,
              hash_class: Type[Hash]) -> Hash:
         """Get the objects hash.
 
+        The stream is read only once per hash class, every call returns
+        a copy of the hash with an already finalized digest. Hashing
+        by another class rewinds the stream, if it is seekable.
+
+        :param hash_class: The class used for hash, the class of the `prefix` if given.
+        :raise ValueError: When `hash_class` is not the class of the `prefix`
+                           or the stream was already read and can not be rewound.
         :return: The hash.
         """
 
+        if self._prefix and type(self._prefix) is not hash_class:
+            raise ValueError("The prefix is hashed by {}, not by {}"
+                             .format(type(self._prefix).__name__, hash_class.__name__))
+
+        if self._hash and type(self._hash) is hash_class:
+            return self._hash.copy()
+
         if self._hash:
-            return self._hash
+            if self._start is None:
+                raise ValueError("The stream was already hashed by {} and can not be rewound"
+                                 .format(type(self._hash).__name__))
+
+            self._file.seek(self._start)
+        elif _seekable(self._file):
+            self._start = self._file.tell()
+
+        h = self._prefix.copy() if self._prefix else hash_class()
+        _read_into(self._file, h, self._buffer_size)
+
+        # finalize once, copies share the digest
+        h.to_bytes()
+
+        self._hash = h
+
+        return h.copy()
+
+
+class SignableIncrementalIO(Signable):
+    """Signable append-only file hashed incrementally from a checkpoint.
+
+    When the file still matches the checkpoint, only the bytes appended
+    after the checkpoint are hashed. When it was truncated or rewritten,
+    the whole file is rehashed. A new checkpoint is created after hashing.
+    """
+
+    def __init__(self,
+                 file: BinaryIO,
+                 checkpoint: Optional[Checkpoint] = None):
+        """Initialize a signable append-only file.
+
+        :param file: The input file, must be seekable.
+        :param checkpoint: The checkpoint of the previous hashing.
+        """
+        self._file = file
+        self._checkpoint = checkpoint
+        self._resumed = False
+        self._hash = None
+
+    def hash(self,
+             hash_class: Type[Md5]) -> Md5:
+        """Get the objects hash.
+
+        :param hash_class: The class used for hash, must support midstate export.
+        :return: The hash.
+        """
+
+        if self._hash and type(self._hash) is hash_class:
+            return self._hash.copy()
+
+        h = None
+
+        if self._checkpoint and self._checkpoint.hash_method == hash_class:
+            h = self._checkpoint.resume(self._file)
+
+        self._resumed = h is not None
+
+        if h is None:
+            self._file.seek(0)
+            h = hash_class()
+
+        _read_into(self._file, h)
+
+        self._checkpoint = Checkpoint.create(h, self._file)
+
+        h.to_bytes()
+        self._hash = h
+
+        return h.copy()
+
+    @property
+    def checkpoint(self) -> Optional[Checkpoint]:
+        """Get the checkpoint - after hashing the checkpoint of the current file content."""
+        return self._checkpoint
+
+    @property
+    def resumed(self) -> bool:
+        """Get whether the hashing was resumed from the checkpoint."""
+        return self._resumed
+
+
+class SignableMmapFile(Signable):
+    """Signable regular file hashed through a memory map.
+
+    The whole file (regardless of the current position) is hashed
+    straight from the mapped memory without any copies.
+    """
+
+    def __init__(self,
+                 file: BinaryIO):
+        """Initialize a signable memory mapped file.
+
+        :param file: The input file, must be a regular file with a file descriptor.
+        """
+        self._file = file
+        self._hash = None
+
+    def hash(self,
+             hash_class: Type[Hash]) -> Hash:
+        """Get the objects hash.
+
+        :return: The hash.
+        """
+
+        if self._hash and type(self._hash) is hash_class:
+            return self._hash.copy()
 
         h = hash_class()
-        block_size = h.chunk_size()
+        fd = self._file.fileno()
 
-        for chunk in iter(lambda: self._file.read(block_size), b''):
-            h.update(chunk)
+        # empty files can not be mapped
+        if os.fstat(fd).st_size > 0:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                if hasattr(mapped, "madvise"):
+                    mapped.madvise(mmap.MADV_SEQUENTIAL)
 
+                h.update(mapped)
+
+        h.to_bytes()
         self._hash = h
 
+        return h.copy()
+
+
+class SignableCachedFile(Signable):
+    """Signable regular file with the digest looked up in a :py:class:`DigestCache`.
+
+    The digest of an unchanged file costs only a ``stat``. On a miss the file
+    is hashed through a memory map and the digest is stored, unless the file
+    changed while it was hashed or was modified less than `RACY_NS` ago -
+    a write within the timestamp granularity of the file system would
+    not change the modification time.
+    """
+
+    RACY_NS = 2 * 10 ** 9
+    """Minimal age of the modification time of a cached file in nanoseconds"""
+
+    def __init__(self,
+                 file: BinaryIO,
+                 cache: DigestCache):
+        """Initialize a signable file with cached digest.
+
+        :param file: The input file, must be a regular file with a file descriptor.
+        :param cache: The digest cache.
+        """
+        self._file = file
+        self._cache = cache
+        self._signable = SignableMmapFile(file)
+
+    def hash(self,
+             hash_class: Type[Hash]) -> Hash:
+        """Get the objects hash.
+
+        The full hash object can not be restored from a digest,
+        so the file is always hashed. The digest is stored in the cache.
+
+        :return: The hash.
+        """
+
+        before = os.fstat(self._file.fileno())
+        h = self._signable.hash(hash_class)
+        after = os.fstat(self._file.fileno())
+
+        unchanged = (before.st_size, before.st_mtime_ns) == (after.st_size, after.st_mtime_ns)
+
+        if unchanged and time.time_ns() - before.st_mtime_ns >= self.RACY_NS:
+            self._cache.put(before, hash_class.name(), h.to_bytes())
+
         return h
+
+    def digest(self,
+               hash_class: Type[Hash]) -> bytes:
+        """Get the objects hash digest, from the cache if the file did not change.
+
+        :param hash_class: The class used for hash.
+        :return: The digest.
+        """
+
+        digest = self._cache.get(os.fstat(self._file.fileno()), hash_class.name())
+
+        if digest is not None:
+            return digest
+
+        return self.hash(hash_class).to_bytes()
+
+
+def signable_file(file: BinaryIO,
+                  digest_cache: Optional[DigestCache] = None) -> Signable:
+    """Get a signable for the `file`.
+
+    Regular files are memory mapped (with the digest looked up
+    in the `digest_cache` if given), other streams (pipes,
+    sockets, in-memory streams...) are read into a buffer.
+
+    :param file: The input file or any binary stream to sign.
+    :param digest_cache: The digest cache of regular files.
+    :return: The signable object.
+    """
+
+    try:
+        regular = stat.S_ISREG(os.fstat(file.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        regular = False
+
+    if regular and digest_cache is not None:
+        return SignableCachedFile(file, digest_cache)
+
+    if regular:
+        return SignableMmapFile(file)
+
+    return SignableBinaryIO(file)
@@ -2,29 +2,34 @@
 
 from __future__ import annotations
 
-from typing import Type
+from typing import Type, BinaryIO, Optional
 from kiv_bit_rsa.hash import Hash
 from kiv_bit_rsa.rsa import Key, Rsa
 from kiv_bit_rsa.sign.signable import Signable
+from kiv_bit_rsa.sign.tree import HashTree, SignableTree
 
 
 class Signature:
     """An object signature.
 
     :py:class:`Signature` holds the signed hash (with an RSA
-    cipher encryption key) and info about the hash algorithm.
+    cipher encryption key), info about the hash algorithm
+    and optionally the fingerprint of the signing key.
     """
 
     def __init__(self,
                  hash_class: Type[Hash],
-                 digest_cipher: bytes):
+                 digest_cipher: bytes,
+                 key_fingerprint: Optional[bytes] = None):
         """Initialize a signature of an object.
 
         :param hash_class: The class used for hash.
         :param digest_cipher: Encrypted hash digest.
+        :param key_fingerprint: Fingerprint of the signing key (see :py:meth:`Key.fingerprint`).
         """
         self._hash_class = hash_class
         self._digest_cipher = digest_cipher
+        self._key_fingerprint = key_fingerprint
 
     @classmethod
     def sign(cls,
@@ -39,10 +44,9 @@ class Signature:
         :return: The signature of object `signable`.
         """
 
-        h = signable.hash(hash_class)
-        digest_cipher = Rsa().encrypt(h.to_bytes(), key)
+        digest_cipher = Rsa().encrypt(signable.digest(hash_class), key)
 
-        return Signature(hash_class, digest_cipher)
+        return Signature(hash_class, digest_cipher, key.fingerprint())
 
     def verify(self,
                signable: Signable,
@@ -54,10 +58,22 @@ class Signature:
         :return: True if the contents of the file match the signature.
         """
 
-        h = signable.hash(self._hash_class)
+        if not self.matches_key(key):
+            return False
+
         digest = Rsa().decrypt(self._digest_cipher, key)
 
-        return digest == h.to_bytes()
+        return digest == signable.digest(self._hash_class)
+
+    def matches_key(self,
+                    key: Key) -> bool:
+        """Check that the `key` is from the key pair which created this signature.
+
+        :param key: The decryption key.
+        :return: False if the signature carries a fingerprint of another key.
+        """
+
+        return self._key_fingerprint is None or self._key_fingerprint == key.fingerprint()
 
     @property
     def hash_method(self):
@@ -68,3 +84,81 @@ class Signature:
     def hash_cipher(self):
         """Get the hash cipher"""
         return self._digest_cipher
+
+    @property
+    def key_fingerprint(self) -> Optional[bytes]:
+        """Get the fingerprint of the signing key, None if unknown."""
+        return self._key_fingerprint
+
+
+class TreeSignature(Signature):
+    """A tree hash signature of a file.
+
+    :py:class:`TreeSignature` holds the signed root of the file
+    tree hash together with the leaf size and the leaf digests,
+    so also any byte range of the file can be verified alone.
+    """
+
+    def __init__(self,
+                 hash_class: Type[Hash],
+                 digest_cipher: bytes,
+                 tree: HashTree,
+                 key_fingerprint: Optional[bytes] = None):
+        """Initialize a tree hash signature of a file.
+
+        :param hash_class: The class used for hash.
+        :param digest_cipher: Encrypted root hash digest.
+        :param tree: The tree hash of the file.
+        :param key_fingerprint: Fingerprint of the signing key (see :py:meth:`Key.fingerprint`).
+        """
+        super().__init__(hash_class, digest_cipher, key_fingerprint)
+        self._tree = tree
+
+    @classmethod
+    def sign(cls,
+             signable: SignableTree,
+             hash_class: Type[Hash],
+             key: Key) -> TreeSignature:
+        """Create a tree hash signature of file `signable`.
+
+        :param signable: The signable file to sign.
+        :param hash_class: The class used for hash.
+        :param key: The encryption key.
+        :return: The signature of file `signable`.
+        """
+
+        tree = signable.tree(hash_class)
+        digest_cipher = Rsa().encrypt(tree.root().to_bytes(), key)
+
+        return TreeSignature(hash_class, digest_cipher, tree, key.fingerprint())
+
+    def verify_range(self,
+                     file: BinaryIO,
+                     key: Key,
+                     start: int,
+                     end: int) -> bool:
+        """Verify bytes ``[start, end)`` of the `file` against this signature.
+
+        Only the leaves overlapping the range are read from the `file`.
+
+        :param file: The file to verify, must be seekable.
+        :param key: The decryption key.
+        :param start: The first byte of the range.
+        :param end: The byte after the last byte of the range.
+        :return: True if the range matches the signature.
+        """
+
+        if not self.matches_key(key):
+            return False
+
+        digest = Rsa().decrypt(self._digest_cipher, key)
+
+        if digest != self._tree.root().to_bytes():
+            return False
+
+        return self._tree.verify_range(file, start, end)
+
+    @property
+    def tree(self) -> HashTree:
+        """Get the tree hash."""
+        return self._tree
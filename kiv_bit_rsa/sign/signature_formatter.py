@@ -1,11 +1,14 @@
 """Signature formatters for converting signatures to string representation."""
 import base64
+import binascii
 from abc import abstractmethod, ABC
+from struct import Struct
 
 import toml
 from kiv_bit_rsa.exception import KivBitRsaError
-from kiv_bit_rsa.hash import Md5
-from kiv_bit_rsa.sign import Signature
+from kiv_bit_rsa.hash import get_hash_class
+from kiv_bit_rsa.sign.signature import Signature, TreeSignature
+from kiv_bit_rsa.sign.tree import HashTree, SCHEME
 
 
 class SignatureFormatError(KivBitRsaError):
@@ -34,6 +37,32 @@ class SignatureFormatter(ABC):
         :return: The Signature.
         """
 
+    def to_bytes(self,
+                 signature: Signature) -> bytes:
+        """Convert `signature` to bytes representation, as stored in signature files.
+
+        :param signature: The signature to convert to bytes.
+        :return: The signature bytes representation.
+        """
+
+        return self.to_string(signature).encode("utf8")
+
+    def from_bytes(self,
+                   data: bytes) -> Signature:
+        """Parse signature bytes representation into Signature instance.
+
+        :param data: The signature bytes representation.
+        :raise SignatureFormatError: When signature bytes are in bad format.
+        :return: The Signature.
+        """
+
+        try:
+            string = data.decode("utf8")
+        except UnicodeDecodeError:
+            raise SignatureFormatError('Signature is not a text.')
+
+        return self.from_string(string)
+
 
 class TomlSignatureFormatter(SignatureFormatter):
     """Signature formatter that uses TOML format."""
@@ -46,13 +75,21 @@ class TomlSignatureFormatter(SignatureFormatter):
 
         signature_dict = {}
 
-        if signature.hash_method == Md5:
+        if signature.hash_method.name() == "MD5":
             signature_dict["hash-method"] = "MD5"
         else:
             raise NotImplementedError("Can not format hash method of type: {}".format(signature.hash_method))
 
         signature_dict["hash-cipher"] = base64.encodebytes(signature.hash_cipher).decode("utf8")
 
+        if signature.key_fingerprint is not None:
+            signature_dict["key-fingerprint"] = signature.key_fingerprint.hex()
+
+        if isinstance(signature, TreeSignature):
+            signature_dict["scheme"] = SCHEME
+            signature_dict["leaf-size"] = signature.tree.leaf_size
+            signature_dict["leaf-digests"] = base64.b64encode(b''.join(signature.tree.leaf_digests)).decode("utf8")
+
         doc = {"signature": signature_dict}
 
         return toml.dumps(doc)
@@ -72,11 +109,197 @@ class TomlSignatureFormatter(SignatureFormatter):
             signature = doc['signature']
 
             if signature['hash-method'] == 'MD5':
-                return Signature(Md5, base64.decodebytes(signature['hash-cipher'].encode("utf8")))
+                hash_class = get_hash_class('MD5')
             else:
                 raise NotImplementedError(
                     "Can not load signature with hash method of type: {}".format(signature['hash-method']))
 
-        except ...:
+            cipher = base64.decodebytes(signature['hash-cipher'].encode("utf8"))
+            scheme = signature.get('scheme')
+            fingerprint = signature.get('key-fingerprint')
+
+            if fingerprint is not None:
+                fingerprint = bytes.fromhex(fingerprint)
+
+            if scheme is None:
+                return Signature(hash_class, cipher, fingerprint)
+
+            if scheme != SCHEME:
+                raise NotImplementedError("Can not load signature with scheme: {}".format(scheme))
+
+            digests = base64.b64decode(signature['leaf-digests'].encode("utf8"))
+            digest_size = len(hash_class().to_bytes())
+
+            if len(digests) % digest_size:
+                raise ValueError("Leaf digests are truncated")
+
+            leaves = [digests[i:i + digest_size] for i in range(0, len(digests), digest_size)]
+
+            return TreeSignature(hash_class, cipher, HashTree(hash_class, signature['leaf-size'], leaves), fingerprint)
+
+        except Exception:
             raise SignatureFormatError('Signature TOML string is in bad format.')
 
+
+class BinarySignatureFormatter(SignatureFormatter):
+    """Signature formatter that uses compact binary format.
+
+    The format is a fixed size header followed by the cipher::
+
+        magic "KBRS" | version (1 B) | hash method (1 B) | flags (1 B) | scheme (1 B)
+        cipher length (2 B) | key fingerprint (32 B, zeros if unknown)
+        cipher
+        [leaf size (8 B) | leaf digests]   only with the tree scheme
+
+    All numbers are unsigned big endian. The string representation
+    is the base64 encoded bytes representation.
+    """
+
+    MAGIC = b"KBRS"
+    """The magic bytes at the start of the signature"""
+
+    VERSION = 1
+    """The format version"""
+
+    HASH_METHODS = {"MD5": 1}
+    """Ids of the hash methods"""
+
+    FLAG_FINGERPRINT = 1
+    """Flag of a signature with the key fingerprint"""
+
+    SCHEME_PLAIN = 0
+    """Scheme of a signature of the whole content hash"""
+
+    SCHEME_TREE = 1
+    """Scheme of a tree hash signature"""
+
+    _header = Struct(">4sBBBBH32s")
+    _leaf_size = Struct(">Q")
+
+    def to_string(self, signature: Signature) -> str:
+        """Convert `signature` to base64 encoded binary format.
+
+        :param signature: The signature to convert to string.
+        :return: The signature string representation.
+        """
+
+        return base64.b64encode(self.to_bytes(signature)).decode("ascii")
+
+    def from_string(self, string: str) -> Signature:
+        """Parse signature string representation in base64 encoded binary format into Signature instance.
+
+        :param string: The signature string representation.
+        :raise SignatureFormatError: When signature string is in bad format.
+        :return: The Signature.
+        """
+
+        try:
+            data = base64.b64decode(string.encode("ascii"), validate=True)
+        except (binascii.Error, UnicodeEncodeError):
+            raise SignatureFormatError('Signature binary string is in bad format.')
+
+        return self.from_bytes(data)
+
+    def to_bytes(self, signature: Signature) -> bytes:
+        """Convert `signature` to binary format.
+
+        :param signature: The signature to convert to bytes.
+        :return: The signature bytes representation.
+        """
+
+        method = self.HASH_METHODS.get(signature.hash_method.name())
+
+        if method is None:
+            raise NotImplementedError("Can not format hash method of type: {}".format(signature.hash_method))
+
+        fingerprint = signature.key_fingerprint
+        flags = 0 if fingerprint is None else self.FLAG_FINGERPRINT
+
+        if fingerprint is not None and len(fingerprint) != 32:
+            raise ValueError("Key fingerprint must have 32 bytes")
+        scheme = self.SCHEME_TREE if isinstance(signature, TreeSignature) else self.SCHEME_PLAIN
+        cipher = signature.hash_cipher
+
+        parts = [self._header.pack(self.MAGIC, self.VERSION, method, flags, scheme, len(cipher), fingerprint or b""),
+                 cipher]
+
+        if scheme == self.SCHEME_TREE:
+            parts.append(self._leaf_size.pack(signature.tree.leaf_size))
+            parts.extend(signature.tree.leaf_digests)
+
+        return b"".join(parts)
+
+    def from_bytes(self, data: bytes) -> Signature:
+        """Parse signature in binary format into Signature instance.
+
+        :param data: The signature bytes representation.
+        :raise SignatureFormatError: When signature bytes are in bad format.
+        :return: The Signature.
+        """
+
+        try:
+            magic, version, method, flags, scheme, length, fingerprint = self._header.unpack_from(data)
+
+            if magic != self.MAGIC or version != self.VERSION or flags & ~self.FLAG_FINGERPRINT:
+                raise ValueError("Bad header")
+
+            names = [name for name, i in self.HASH_METHODS.items() if i == method]
+
+            if not names:
+                raise ValueError("Unknown hash method")
+
+            hash_class = get_hash_class(names[0])
+            fingerprint = fingerprint if flags & self.FLAG_FINGERPRINT else None
+            end = self._header.size + length
+            cipher = data[self._header.size:end]
+
+            if len(cipher) != length:
+                raise ValueError("Truncated cipher")
+
+            if scheme == self.SCHEME_PLAIN:
+                if end != len(data):
+                    raise ValueError("Trailing data")
+
+                return Signature(hash_class, cipher, fingerprint)
+
+            if scheme != self.SCHEME_TREE:
+                raise ValueError("Unknown scheme")
+
+            leaf_size, = self._leaf_size.unpack_from(data, end)
+            digests = data[end + self._leaf_size.size:]
+            digest_size = len(hash_class().to_bytes())
+
+            if len(digests) % digest_size:
+                raise ValueError("Leaf digests are truncated")
+
+            leaves = [digests[i:i + digest_size] for i in range(0, len(digests), digest_size)]
+
+            return TreeSignature(hash_class, cipher, HashTree(hash_class, leaf_size, leaves), fingerprint)
+
+        except Exception:
+            raise SignatureFormatError('Signature binary data is in bad format.')
+
+
+def detect_signature_formatter(data: bytes) -> SignatureFormatter:
+    """Get the formatter of signature data by its content.
+
+    :param data: The signature bytes representation (or at least its start).
+    :return: :py:class:`BinarySignatureFormatter` for binary signatures, :py:class:`TomlSignatureFormatter` otherwise.
+    """
+
+    if data.startswith(BinarySignatureFormatter.MAGIC):
+        return BinarySignatureFormatter()
+
+    return TomlSignatureFormatter()
+
+
+def load_signature(data: bytes) -> Signature:
+    """Parse signature in any supported format, the format is detected.
+
+    :param data: The signature bytes representation.
+    :raise SignatureFormatError: When signature is in bad format.
+    :return: The Signature.
+    """
+
+    return detect_signature_formatter(data).from_bytes(data)
+
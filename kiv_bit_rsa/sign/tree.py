@@ -0,0 +1,215 @@
+"""Tree hash (Merkle) of large files.
+
+The file is split into fixed-size leaves which are hashed independently
+(in parallel worker processes) and the leaf digests are combined into a root.
+"""
+
+from __future__ import annotations
+
+import os
+from struct import pack
+from typing import BinaryIO, List, Optional, Type
+
+from kiv_bit_rsa.hash import Hash
+from kiv_bit_rsa.parallel import bounded_map
+from kiv_bit_rsa.sign.signable import Signable, DEFAULT_BUFFER_SIZE
+
+DEFAULT_LEAF_SIZE = 4 * 1024 * 1024
+"""Default size of the tree leaves in bytes"""
+
+SCHEME = "tree"
+"""Name of the tree hash signature scheme"""
+
+_ROOT_HEADER = b"kiv-bit-rsa tree\x00"
+
+
+def _hash_leaf(task) -> bytes:
+    """Hash one leaf of a file.
+
+    :param task: Tuple (path, offset, size, hash class).
+    :return: The leaf digest.
+    """
+
+    path, offset, size, hash_class = task
+
+    with open(path, "rb") as file:
+        return _hash_range(file, offset, size, hash_class)
+
+
+def _hash_range(file: BinaryIO,
+                offset: int,
+                size: int,
+                hash_class: Type[Hash]) -> bytes:
+    """Hash `size` bytes of the `file` starting at `offset`.
+
+    :param file: The file.
+    :param offset: The start offset.
+    :param size: Number of bytes to hash.
+    :param hash_class: The class used for hash.
+    :return: The digest.
+    """
+
+    h = hash_class()
+    buffer = bytearray(min(size, DEFAULT_BUFFER_SIZE))
+
+    file.seek(offset)
+
+    with memoryview(buffer) as view:
+        while size > 0:
+            n = file.readinto(view[:min(size, len(buffer))])
+
+            if not n:
+                break
+
+            h.update(view[:n])
+            size -= n
+
+    return h.to_bytes()
+
+
+class HashTree:
+    """Tree hash of a file.
+
+    :py:class:`HashTree` holds the digests of all leaves of a file.
+    The leaf `i` covers bytes ``[i * leaf_size, (i + 1) * leaf_size)``.
+    """
+
+    def __init__(self,
+                 hash_class: Type[Hash],
+                 leaf_size: int,
+                 leaf_digests: List[bytes]):
+        """Initialize a tree hash.
+
+        :param hash_class: The class used for hash.
+        :param leaf_size: Size of the leaves in bytes.
+        :param leaf_digests: The digests of the leaves.
+        """
+
+        if leaf_size <= 0:
+            raise ValueError("Leaf size must be positive")
+
+        self._hash_class = hash_class
+        self._leaf_size = leaf_size
+        self._leaf_digests = leaf_digests
+
+    @classmethod
+    def compute(cls,
+                path: str,
+                hash_class: Type[Hash],
+                leaf_size: int = DEFAULT_LEAF_SIZE,
+                workers: Optional[int] = None) -> HashTree:
+        """Compute the tree hash of a file.
+
+        :param path: The filepath.
+        :param hash_class: The class used for hash.
+        :param leaf_size: Size of the leaves in bytes.
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        :return: The tree hash.
+        """
+
+        size = os.stat(path).st_size
+        tasks = ((path, offset, leaf_size, hash_class) for offset in range(0, size, leaf_size))
+
+        return HashTree(hash_class, leaf_size, list(bounded_map(_hash_leaf, tasks, workers)))
+
+    def root(self) -> Hash:
+        """Get the root hash of the tree.
+
+        The root is the hash of the leaf size and all leaf digests.
+
+        :return: The root hash.
+        """
+
+        h = self._hash_class(_ROOT_HEADER + pack(">Q", self._leaf_size))
+
+        for digest in self._leaf_digests:
+            h.update(digest)
+
+        return h
+
+    def verify_range(self,
+                     file: BinaryIO,
+                     start: int,
+                     end: int) -> bool:
+        """Verify that bytes ``[start, end)`` of the `file` match the tree.
+
+        Only the leaves overlapping the range are read.
+
+        :param file: The file, must be seekable.
+        :param start: The first byte of the range.
+        :param end: The byte after the last byte of the range.
+        :return: True if all the overlapping leaves match.
+        """
+
+        if start < 0 or end < start:
+            raise ValueError("Invalid byte range {}:{}".format(start, end))
+
+        first = start // self._leaf_size
+        last = (max(end, start + 1) - 1) // self._leaf_size
+
+        if last >= len(self._leaf_digests):
+            return False
+
+        for i in range(first, last + 1):
+            digest = _hash_range(file, i * self._leaf_size, self._leaf_size, self._hash_class)
+
+            if digest != self._leaf_digests[i]:
+                return False
+
+        return True
+
+    @property
+    def hash_method(self) -> Type[Hash]:
+        """Get the hash method."""
+        return self._hash_class
+
+    @property
+    def leaf_size(self) -> int:
+        """Get the leaf size in bytes."""
+        return self._leaf_size
+
+    @property
+    def leaf_digests(self) -> List[bytes]:
+        """Get the leaf digests."""
+        return self._leaf_digests
+
+
+class SignableTree(Signable):
+    """Signable file hashed as a tree of leaves in parallel."""
+
+    def __init__(self,
+                 path: str,
+                 leaf_size: int = DEFAULT_LEAF_SIZE,
+                 workers: Optional[int] = None):
+        """Initialize a signable tree hashed file.
+
+        :param path: The filepath.
+        :param leaf_size: Size of the leaves in bytes.
+        :param workers: Number of worker processes, defaults to the number of CPUs.
+        """
+        self._path = path
+        self._leaf_size = leaf_size
+        self._workers = workers
+        self._tree = None
+
+    def hash(self,
+             hash_class: Type[Hash]) -> Hash:
+        """Get the root hash of the file tree.
+
+        :return: The hash.
+        """
+
+        return self.tree(hash_class).root()
+
+    def tree(self,
+             hash_class: Type[Hash]) -> HashTree:
+        """Get the tree hash of the file.
+
+        :param hash_class: The class used for hash.
+        :return: The tree hash.
+        """
+
+        if not self._tree or self._tree.hash_method != hash_class:
+            self._tree = HashTree.compute(self._path, hash_class, self._leaf_size, self._workers)
+
+        return self._tree
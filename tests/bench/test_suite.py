@@ -0,0 +1,77 @@
+import pytest
+
+from kiv_bit_rsa.bench import Case, Result, measure, run, compare, all_cases
+from kiv_bit_rsa.bench.cases import md5_cases
+from kiv_bit_rsa.hash import Md5
+
+
+def report(**values):
+    return {"results": {name: Result(name, value, unit, 1).to_dict() for name, (value, unit) in values.items()}}
+
+
+def test_case_value():
+    assert Case("a", lambda: None, "ms").value(0.5) == 500
+    assert Case("a", lambda: None, "MB/s", 2000000).value(2) == 1
+    assert Case("a", lambda: None, "ops/s", 10).value(2) == 5
+
+    with pytest.raises(ValueError):
+        Case("a", lambda: None, "parsecs")
+
+
+def test_measure():
+    calls = []
+    case = Case("a", lambda: lambda: calls.append(bytearray(100000)), "ops/s", min_rounds=3)
+
+    result = measure(case, 0)
+    assert result.rounds == len(calls) == 3
+    assert result.peak_memory is None
+
+    result = measure(case, 0, memory=True)
+    assert result.peak_memory >= 100000
+
+
+def test_run_filter():
+    cases = [Case("x.a", lambda: lambda: None, "ms"), Case("x.b", lambda: lambda: None, "ms")]
+
+    assert list(run(cases, 0, "b")["results"]) == ["x.b"]
+    assert list(run(cases, 0)["results"]) == ["x.a", "x.b"]
+
+
+def test_compare():
+    baseline = report(fast=(100, "MB/s"), slow=(10, "ms"), gone=(1, "ms"))
+    current = report(fast=(80, "MB/s"), slow=(10.5, "ms"), new=(1, "ms"))
+
+    regressions = compare(baseline, current, 0.1)
+    assert [r.result.name for r in regressions] == ["fast"]
+    assert regressions[0].change == pytest.approx(-0.2)
+
+    regressions = compare(baseline, current, 0.01)
+    assert [r.result.name for r in regressions] == ["fast", "slow"]
+    assert regressions[1].change == pytest.approx(-0.05)
+
+    assert compare(current, baseline, 0.1) == []
+
+
+def test_all_cases_quick():
+    names = [case.name for case in all_cases(True)]
+
+    assert len(names) == len(set(names))
+    assert "md5.hash_many" in names
+    assert "rsa.decrypt.1024" in names
+    assert "signature.verify.64KiB" in names
+
+
+def test_md5_cases_keep_engine():
+    engine = Md5.engine()
+    cases = md5_cases(quick=True)
+
+    # stopped early, right after measuring a case of another engine
+    for case in cases:
+        case.setup()()
+
+        if not case.name.startswith("md5.{}.".format(engine)):
+            break
+
+    cases.close()
+
+    assert Md5.engine() == engine
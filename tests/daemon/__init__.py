@@ -0,0 +1,2 @@
+"""Tests for the daemon module.
+"""
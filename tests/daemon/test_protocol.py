@@ -0,0 +1,62 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+
+import pytest
+
+from kiv_bit_rsa.daemon import ProtocolError, encode_message, read_message, send_message, recv_message
+
+
+def _read(data):
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return [await read_message(reader), await read_message(reader)]
+
+    return asyncio.run(read())
+
+
+def test_read_message():
+    message = encode_message({"op": "sign"}, b"\x00data")
+
+    assert _read(message) == [({"op": "sign"}, b"\x00data"), None]
+
+
+def test_read_malformed_message():
+    message = encode_message({"op": "sign"}, b"data")
+
+    with pytest.raises(ProtocolError):
+        _read(message[:-1])
+
+    with pytest.raises(ProtocolError):
+        _read(encode_message([1, 2]))
+
+    with pytest.raises(ProtocolError):
+        _read(b"\xff\xff\xff\xff\x00\x00\x00\x00")
+
+
+def test_socket_messages():
+    a, b = socket.socketpair()
+
+    with a, b:
+        send_message(a, {"op": "encrypt"}, b"x" * 100000)
+        send_message(a, {"op": "ping"})
+
+        assert recv_message(b) == ({"op": "encrypt"}, b"x" * 100000)
+        assert recv_message(b) == ({"op": "ping"}, b"")
+
+        a.close()
+
+        with pytest.raises(ProtocolError):
+            recv_message(b)
+
+
+def test_client_imports_no_server():
+    modules = ("asyncio", "tracemalloc", "kiv_bit_rsa.daemon.server", "kiv_bit_rsa.bench")
+    code = "import sys, kiv_bit_rsa.cli, kiv_bit_rsa.daemon.client; sys.exit(any(m in sys.modules for m in {!r}))"
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert subprocess.run([sys.executable, "-c", code.format(modules)], cwd=root).returncode == 0
@@ -0,0 +1,219 @@
+import asyncio
+import os
+import socket
+import stat
+
+import pytest
+
+from kiv_bit_rsa.daemon import Client, DaemonError, Server, SocketInUseError, read_message, write_message
+from kiv_bit_rsa.daemon.server import PIPELINE_DEPTH
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import TomlSignatureFormatter
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+def _serve(server, client_calls, connections=1):
+    """Run the `server` on socketpairs and the blocking clients in threads."""
+
+    async def run():
+        async with server:
+            clients = []
+            handlers = []
+
+            for _ in range(connections):
+                server_socket, client_socket = socket.socketpair()
+                reader, writer = await asyncio.open_connection(sock=server_socket)
+                handlers.append(asyncio.ensure_future(server.handle(reader, writer)))
+                clients.append(Client(client_socket))
+
+            def call(client):
+                with client:
+                    return client_calls(client)
+
+            loop = asyncio.get_event_loop()
+            results = await asyncio.gather(*(loop.run_in_executor(None, call, c) for c in clients))
+            await asyncio.gather(*handlers)
+
+            return results
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_operations(keys, workers):
+    def calls(client):
+        client.ping()
+
+        signature = client.sign(b"Hello world!")
+        toml_signature = client.sign(b"Hello world!", "toml")
+        cipher = client.encrypt(b"secret" * 100)
+
+        return (client.verify(b"Hello world!", signature),
+                client.verify(b"Hello world?", signature),
+                client.verify(b"Hello world!", toml_signature),
+                client.decrypt(cipher),
+                toml_signature)
+
+    server = Server(keys.private_key, keys.public_key, workers)
+    [(verified, tampered, toml_verified, plaintext, toml_signature)] = _serve(server, calls)
+
+    assert verified and toml_verified and not tampered
+    assert plaintext == b"secret" * 100
+    assert TomlSignatureFormatter().from_bytes(toml_signature).key_fingerprint == keys.public_key.fingerprint()
+
+
+def test_concurrent_connections(keys):
+    def calls(client):
+        return [client.decrypt(client.encrypt(bytes([i]) * i)) for i in range(20)]
+
+    results = _serve(Server(keys.private_key, keys.public_key), calls, connections=4)
+
+    assert results == [[bytes([i]) * i for i in range(20)]] * 4
+
+
+def test_errors(keys):
+    def calls(client):
+        errors = []
+
+        for call in [lambda: client.sign(b"x"),
+                     lambda: client.sign(b"x", "xml"),
+                     lambda: client.verify(b"x", b"not a signature"),
+                     lambda: client.request({"op": "unknown"}),
+                     lambda: client.request({"op": "verify", "signature_size": 10})]:
+            try:
+                call()
+            except DaemonError as e:
+                errors.append(str(e))
+
+        # the connection is still usable after the errors
+        client.ping()
+
+        return errors
+
+    [errors] = _serve(Server(None, keys.public_key), calls)
+
+    assert len(errors) == 5
+    assert errors[0] == "The daemon has no private key"
+
+
+def test_pipelined_requests(keys):
+    async def run():
+        async with Server(keys.private_key, keys.public_key) as server:
+            server_socket, client_socket = socket.socketpair()
+            reader, writer = await asyncio.open_connection(sock=server_socket)
+            handler = asyncio.ensure_future(server.handle(reader, writer))
+
+            client_reader, client_writer = await asyncio.open_connection(sock=client_socket)
+
+            for i in range(10):
+                await write_message(client_writer, {"op": "encrypt"}, bytes([i]))
+
+            ciphers = [(await read_message(client_reader))[1] for _ in range(10)]
+
+            for cipher in ciphers:
+                await write_message(client_writer, {"op": "decrypt"}, cipher)
+
+            plaintexts = [(await read_message(client_reader))[1] for _ in range(10)]
+
+            client_writer.close()
+            await handler
+
+            return plaintexts
+
+    assert asyncio.run(run()) == [bytes([i]) for i in range(10)]
+
+
+def test_serve_unix(keys, tmp_path):
+    path = str(tmp_path / "daemon.sock")
+
+    # a stale socket left by a daemon which is not running
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(path)
+
+    async def run():
+        async with Server(keys.private_key, keys.public_key) as server:
+            listener = await server.serve_unix(path)
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+
+            def ping():
+                with Client.connect(path) as client:
+                    client.ping()
+
+            await asyncio.get_event_loop().run_in_executor(None, ping)
+
+            # a live socket is not taken over by another daemon
+            with pytest.raises(SocketInUseError):
+                await Server(keys.private_key, keys.public_key).serve_unix(path)
+
+            listener.close()
+            await listener.wait_closed()
+
+            return mode
+
+    assert asyncio.run(run()) == 0o600
+
+
+def test_pipeline_is_bounded(keys):
+    class SlowServer(Server):
+        release = None
+        pending = 0
+        most = 0
+
+        async def request(self, header, data=b""):
+            self.pending += 1
+            self.most = max(self.most, self.pending)
+            await self.release.wait()
+            self.pending -= 1
+
+            return {"ok": True}, b""
+
+    async def run():
+        async with SlowServer(keys.private_key, keys.public_key) as server:
+            server.release = asyncio.Event()
+            server_socket, client_socket = socket.socketpair()
+            reader, writer = await asyncio.open_connection(sock=server_socket)
+            handler = asyncio.ensure_future(server.handle(reader, writer))
+
+            client_reader, client_writer = await asyncio.open_connection(sock=client_socket)
+
+            for _ in range(100):
+                await write_message(client_writer, {"op": "ping"})
+
+            # the requests over the depth are left unread in the socket
+            await asyncio.sleep(0.2)
+            most = server.most
+            server.release.set()
+
+            responses = [await read_message(client_reader) for _ in range(100)]
+
+            client_writer.close()
+            await handler
+
+            return most, responses
+
+    most, responses = asyncio.run(run())
+
+    assert most == PIPELINE_DEPTH
+    assert all(header["ok"] for header, _ in responses)
+
+
+def test_broken_pool_is_restarted(keys):
+    server = Server(keys.private_key, keys.public_key)
+
+    def calls(client):
+        assert client.decrypt(client.encrypt(b"x")) == b"x"
+
+        for process in list(server._executor._processes.values()):
+            process.kill()
+            process.join()
+
+        with pytest.raises(DaemonError, match="restarted"):
+            client.encrypt(b"x")
+
+        return client.decrypt(client.encrypt(b"y"))
+
+    assert _serve(server, calls) == [b"y"]
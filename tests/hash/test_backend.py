@@ -0,0 +1,70 @@
+import hashlib
+import io
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5, HashlibMd5, backends, get_backend, set_backend, get_hash_class
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import Signature, SignableBinaryIO, TomlSignatureFormatter
+
+
+@pytest.fixture
+def backend():
+    name = get_backend()
+    yield
+    set_backend(name)
+
+
+def test_parity():
+    data = bytes(range(256)) * 10
+
+    for length in (0, 1, 55, 56, 64, 1000, len(data)):
+        assert HashlibMd5(data[:length]).to_bytes() == Md5(data[:length]).to_bytes()
+        assert HashlibMd5(data[:length]).to_hex() == Md5(data[:length]).to_hex()
+
+
+def test_interface():
+    hash1 = HashlibMd5(b"Hello")
+    hash2 = hash1.copy()
+    hash2.update(b" world!")
+
+    assert HashlibMd5.name() == Md5.name()
+    assert HashlibMd5.chunk_size() == Md5.chunk_size()
+    assert hash1.to_bytes() == hashlib.md5(b"Hello").digest()
+    assert hash2.to_hex() == "86fb269d190d2c85f6e0468ceca42a20"
+
+
+def test_select_backend(backend):
+    assert "python" in backends()
+
+    set_backend("python")
+    assert get_hash_class("MD5") is Md5
+
+    if "hashlib" in backends():
+        set_backend("hashlib")
+        assert get_hash_class("MD5") is HashlibMd5
+
+    with pytest.raises(ValueError):
+        set_backend("unknown")
+
+    with pytest.raises(ValueError):
+        get_hash_class("SHA0")
+
+
+@pytest.mark.parametrize("name", backends())
+def test_signature_backends(backend, name):
+    keys = Rsa().generate_keys(512)
+    formatter = TomlSignatureFormatter()
+
+    set_backend(name)
+    hash_class = get_hash_class("MD5")
+    assert hash_class is {"python": Md5, "hashlib": HashlibMd5}[name]
+
+    signature = Signature.sign(SignableBinaryIO(io.BytesIO(b"Hello world!")), hash_class, keys.private_key)
+
+    loaded = formatter.from_string(formatter.to_string(signature))
+    assert loaded.hash_method is hash_class
+    assert Rsa().decrypt(loaded.hash_cipher, keys.public_key) == hashlib.md5(b"Hello world!").digest()
+
+    assert loaded.verify(SignableBinaryIO(io.BytesIO(b"Hello world!")), keys.public_key)
+    assert not loaded.verify(SignableBinaryIO(io.BytesIO(b"Hello world?")), keys.public_key)
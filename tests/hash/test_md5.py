@@ -1,4 +1,14 @@
-from kiv_bit_rsa.hash import Md5
+import array
+import hashlib
+import mmap
+import os
+import subprocess
+import sys
+import tempfile
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5, md5_multi
 
 
 def test_hash_len():
@@ -48,3 +58,138 @@ def test_hash_update():
     hash2.update(b" world!")
     assert hash1.to_bytes() == hash2.to_bytes()
     assert hash1.to_hex() == hash2.to_hex()
+
+
+def _data(length):
+    return bytes((i * 31 + 7) & 0xff for i in range(length))
+
+
+def test_hashlib_parity():
+    data = _data(300)
+
+    for length in range(len(data) + 1):
+        assert Md5(data[:length]).to_bytes() == hashlib.md5(data[:length]).digest()
+
+
+def test_hashlib_parity_split_patterns():
+    data = _data(200)
+    expected = hashlib.md5(data).digest()
+
+    for first in range(len(data) + 1):
+        for second in (first, first + 1, first + 63, first + 64, first + 65):
+            hash1 = Md5(data[:first])
+            hash1.update(data[first:second])
+            hash1.update(data[second:])
+            assert hash1.to_bytes() == expected
+
+
+def test_hashlib_parity_chunk_sizes():
+    data = _data(1000)
+    expected = hashlib.md5(data).digest()
+
+    for size in range(1, 130):
+        hash1 = Md5()
+        for start in range(0, len(data), size):
+            hash1.update(data[start:start + size])
+        assert hash1.to_bytes() == expected
+
+
+def test_buffer_types():
+    data = _data(1000)
+    expected = hashlib.md5(data).digest()
+
+    assert Md5(bytearray(data)).to_bytes() == expected
+    assert Md5(memoryview(data)).to_bytes() == expected
+    assert Md5(memoryview(data)[100:]).to_bytes() == hashlib.md5(data[100:]).digest()
+
+    words = array.array("I", range(100))
+    assert Md5(words).to_bytes() == hashlib.md5(words).digest()
+
+
+def test_buffer_mmap():
+    data = _data(10000)
+
+    with tempfile.TemporaryFile() as file:
+        file.write(data)
+        file.flush()
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            assert Md5(mapped).to_bytes() == hashlib.md5(data).digest()
+
+
+def test_engines():
+    data = _data(1000)
+    engine = Md5.engine()
+
+    try:
+        for name in Md5.engines():
+            Md5.set_engine(name)
+
+            for length in (0, 55, 56, 64, 119, 120, 1000):
+                assert Md5(data[:length]).to_bytes() == hashlib.md5(data[:length]).digest()
+    finally:
+        Md5.set_engine(engine)
+
+
+def test_engine_unknown():
+    with pytest.raises(ValueError):
+        Md5.set_engine("unknown")
+
+
+def test_hash_many():
+    messages = [_data(length) for length in range(0, 300, 7)] + [b'', _data(55), _data(56), _data(64)]
+
+    assert Md5.hash_many(messages) == [Md5(message).to_bytes() for message in messages]
+
+
+def test_hash_many_fallback(monkeypatch):
+    monkeypatch.setattr(md5_multi, "_numpy_available", False)
+    messages = [_data(length) for length in range(0, 300, 7)]
+
+    assert Md5.hash_many(messages) == [hashlib.md5(message).digest() for message in messages]
+
+
+def test_numpy_imported_lazily():
+    code = "import sys, kiv_bit_rsa.hash; sys.exit('numpy' in sys.modules)"
+
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    assert subprocess.run([sys.executable, "-c", code], cwd=root).returncode == 0
+
+
+def test_copy():
+    data = _data(300)
+    hash1 = Md5(data[:100])
+    hash2 = hash1.copy()
+    hash2.update(data[100:])
+
+    assert hash1.to_bytes() == hashlib.md5(data[:100]).digest()
+    assert hash2.to_bytes() == hashlib.md5(data).digest()
+
+
+def test_digest_cache():
+    hash1 = Md5(b"Hello")
+    assert hash1.to_bytes() == hash1.to_bytes()
+    assert hash1.to_hex() == hashlib.md5(b"Hello").hexdigest()
+
+    hash1.update(b" world!")
+    assert hash1.to_hex() == "86fb269d190d2c85f6e0468ceca42a20"
+
+
+def test_midstate():
+    data = _data(300)
+
+    for split in (0, 10, 64, 100):
+        hash1 = Md5.from_midstate(Md5(data[:split]).midstate())
+        hash1.update(data[split:])
+        assert hash1.to_bytes() == hashlib.md5(data).digest()
+
+
+def test_midstate_malformed():
+    midstate = Md5(_data(100)).midstate()
+
+    with pytest.raises(ValueError):
+        Md5.from_midstate(midstate[:10])
+
+    with pytest.raises(ValueError):
+        Md5.from_midstate(midstate[:-1])
@@ -0,0 +1,2 @@
+"""Tests for the math module.
+"""
\ No newline at end of file
@@ -0,0 +1,84 @@
+import pytest
+
+from kiv_bit_rsa.math import random_prime, random_primes, is_prime, mod_inverse, small_primes, PrimeSearchStats
+from kiv_bit_rsa.math import PRIMALITY_POLICIES
+from kiv_bit_rsa.math.math import _strong_lucas_probable_prime, _strong_probable_prime
+
+
+def test_small_primes():
+    assert small_primes(30) == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    assert len(small_primes(8192)) == 1028
+
+
+def test_is_prime():
+    primes = set(small_primes(1000))
+
+    for policy in PRIMALITY_POLICIES:
+        for num in range(0, 1000):
+            assert is_prime(num, policy=policy) == (num in primes)
+
+
+def test_is_prime_big():
+    mersenne = [2 ** 127 - 1, 2 ** 521 - 1, 2 ** 607 - 1]
+
+    for policy in PRIMALITY_POLICIES:
+        for prime in mersenne:
+            assert is_prime(prime, policy=policy)
+            assert not is_prime(prime * (2 ** 89 - 1), policy=policy)
+
+    # strong pseudoprimes to all prime bases up to 23 and 37
+    assert not is_prime(3825123056546413051)
+    assert not is_prime(318665857834031151167461)
+
+
+def test_is_prime_unknown_policy():
+    with pytest.raises(ValueError):
+        is_prime(7, policy="guess")
+
+
+def test_strong_lucas():
+    # the first strong Lucas pseudoprimes (OEIS A217255)
+    pseudoprimes = [5459, 5777, 10877, 16109, 18971, 22499, 24569, 25199, 40309, 58519]
+    primes = set(small_primes(60000))
+
+    found = [num for num in range(5, 60000, 2) if _strong_lucas_probable_prime(num) and num not in primes]
+
+    assert found == pseudoprimes
+    assert not any(_strong_probable_prime(num, 2) for num in found)
+    assert all(_strong_lucas_probable_prime(num) for num in primes if num > 3)
+
+
+def test_random_prime_bits():
+    for n_bits in (2, 3, 4, 8, 16, 64, 256):
+        for _ in range(20):
+            prime = random_prime(n_bits)
+            assert prime.bit_length() == n_bits
+            assert is_prime(prime)
+
+
+def test_random_prime_stats():
+    stats = PrimeSearchStats()
+    prime = random_prime(512, stats)
+
+    assert is_prime(prime)
+    assert stats.windows >= 1
+    assert stats.tested >= 1
+    assert stats.sieved > stats.tested
+
+
+def test_mod_inverse():
+    assert mod_inverse(3, 11) == 4
+    assert mod_inverse(2, 4) is None
+
+
+def test_random_primes_parallel():
+    primes = random_primes(128, workers=2)
+
+    try:
+        found = [next(primes) for _ in range(3)]
+    finally:
+        primes.close()
+
+    for prime in found:
+        assert prime.bit_length() == 128
+        assert is_prime(prime)
@@ -0,0 +1,2 @@
+"""Tests for the rsa module.
+"""
\ No newline at end of file
@@ -0,0 +1,136 @@
+import pickle
+
+import pytest
+
+from kiv_bit_rsa.rsa import Rsa, PublicKey, PrivateKey
+from kiv_bit_rsa.rsa.rsa import PublicExponentError
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+def test_crt_generated(keys):
+    key = keys.private_key
+
+    assert key.has_crt
+    assert key.p * key.q == key.mod
+
+
+def test_crt_matches_plain(keys):
+    key = keys.private_key
+    plain = PrivateKey(key.exp, key.mod)
+
+    assert not plain.has_crt
+
+    for num in (0, 1, 2, 123456789, key.p, key.q, key.mod - 1):
+        assert key.decrypt(num) == plain.decrypt(num)
+        assert key.encrypt(num) == plain.encrypt(num)
+
+
+def test_crt_roundtrip(keys):
+    rsa = Rsa()
+    cipher = rsa.encrypt(b"Hello world!", keys.private_key)
+
+    assert rsa.decrypt(cipher, keys.public_key) == b"Hello world!"
+
+
+def test_crt_components_computed(keys):
+    key = keys.private_key
+    loaded = PrivateKey(key.exp, key.mod, key.p, key.q)
+
+    assert (loaded.dp, loaded.dq, loaded.qinv) == (key.dp, key.dq, key.qinv)
+
+
+def test_crt_invalid(keys):
+    key = keys.private_key
+
+    with pytest.raises(ValueError):
+        PrivateKey(key.exp, key.mod, key.p)
+
+    with pytest.raises(ValueError):
+        PrivateKey(key.exp, key.mod, key.p, key.q + 2)
+
+    with pytest.raises(ValueError):
+        PrivateKey(key.exp, key.mod, key.p, key.q, qinv=key.qinv + 1)
+
+
+def test_public_exponent():
+    rsa = Rsa()
+    keys = rsa.generate_keys(512, public_exponent=65537)
+
+    assert keys.public_key.exp == 65537
+    assert keys.private_key.p * keys.private_key.q == keys.public_key.mod
+    assert rsa.decrypt(rsa.encrypt(b"Hello world!", keys.public_key), keys.private_key) == b"Hello world!"
+
+    keys = rsa.generate_keys(64, public_exponent=3)
+    assert rsa.decrypt(rsa.encrypt(b"Hello", keys.public_key), keys.private_key) == b"Hello"
+
+
+def test_public_exponent_invalid():
+    with pytest.raises(PublicExponentError):
+        Rsa().generate_keys(512, public_exponent=65536)
+
+    with pytest.raises(PublicExponentError):
+        Rsa().generate_keys(512, public_exponent=1)
+
+
+def test_generate_keys_workers():
+    rsa = Rsa()
+    keys = rsa.generate_keys(256, public_exponent=65537, workers=2)
+
+    assert keys.private_key.p != keys.private_key.q
+    assert keys.public_key.mod.bit_length() == 256
+    assert rsa.decrypt(rsa.encrypt(b"Hello", keys.public_key), keys.private_key) == b"Hello"
+
+
+def test_key_immutable(keys):
+    key = keys.public_key
+
+    with pytest.raises(AttributeError):
+        key._mod = 5
+
+    with pytest.raises(AttributeError):
+        key.foo = 5
+
+    assert not hasattr(key, "__dict__")
+    assert not hasattr(keys.private_key, "__dict__")
+
+
+def test_key_hashable(keys):
+    public = keys.public_key
+    private = keys.private_key
+    plain = PrivateKey(private.exp, private.mod)
+
+    assert public == PublicKey(public.exp, public.mod)
+    assert private == plain
+    assert public != PrivateKey(public.exp, public.mod)
+    assert {public: 1, private: 2}[PublicKey(public.exp, public.mod)] == 1
+    assert {public: 1, private: 2}[plain] == 2
+
+
+def test_key_cached_sizes(keys):
+    key = keys.public_key
+
+    assert key.bit_length() == key.mod.bit_length() == 512
+    assert key.byte_size() == 64
+
+
+def test_key_fingerprint(keys):
+    public = keys.public_key
+
+    assert public.fingerprint() == keys.private_key.fingerprint()
+    assert public.fingerprint() == PublicKey(public.exp, public.mod).fingerprint()
+    assert public.fingerprint() != PublicKey(public.exp, public.mod - 2).fingerprint()
+    assert len(public.fingerprint()) == 32
+
+
+def test_key_pickle(keys):
+    for key in (keys.public_key, keys.private_key):
+        loaded = pickle.loads(pickle.dumps(key))
+
+        assert loaded == key
+        assert type(loaded) is type(key)
+
+    assert pickle.loads(pickle.dumps(keys.private_key)).has_crt
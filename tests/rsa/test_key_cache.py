@@ -0,0 +1,123 @@
+import os
+
+import pytest
+
+from kiv_bit_rsa.rsa import Rsa, TomlKeyFormatter, KeyFormatError, KeyCache, get_key_cache
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+def counting_parser():
+    calls = []
+    formatter = TomlKeyFormatter(use_cache=False)
+
+    def parse(data):
+        calls.append(data)
+        return formatter.from_bytes(data) if isinstance(data, bytes) else formatter.from_string(data)
+
+    return parse, calls
+
+
+def test_from_string(keys):
+    cache = KeyCache()
+    parse, calls = counting_parser()
+    string = TomlKeyFormatter().to_string(keys.public_key)
+
+    key = cache.from_string(string, parse)
+
+    assert key == keys.public_key
+    assert cache.from_string(string, parse) is key
+    assert len(calls) == 1
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.size) == (1, 1, 1)
+
+
+def test_lru_eviction(keys):
+    cache = KeyCache(2)
+    parse, calls = counting_parser()
+    formatter = TomlKeyFormatter()
+    strings = [formatter.to_string(keys.public_key), formatter.to_string(keys.private_key), "# comment\n" +
+               formatter.to_string(keys.public_key)]
+
+    cache.from_string(strings[0], parse)
+    cache.from_string(strings[1], parse)
+    cache.from_string(strings[0], parse)
+    cache.from_string(strings[2], parse)  # evicts strings[1]
+    cache.from_string(strings[0], parse)
+    cache.from_string(strings[1], parse)
+
+    assert calls == [strings[0], strings[1], strings[2], strings[1]]
+    assert cache.stats().evictions == 2
+    assert cache.stats().size == 2
+
+
+def test_load(keys, tmp_path):
+    cache = KeyCache()
+    parse, calls = counting_parser()
+    formatter = TomlKeyFormatter()
+    path = str(tmp_path / "key.toml")
+
+    with open(path, "w") as f:
+        f.write(formatter.to_string(keys.public_key))
+
+    assert cache.load(path, parse) == keys.public_key
+    assert cache.load(path, parse) == keys.public_key
+    assert len(calls) == 1
+
+    with open(path, "w") as f:
+        f.write(formatter.to_string(keys.private_key))
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    assert cache.load(path, parse) == keys.private_key
+    assert len(calls) == 2
+
+    cache.invalidate(path)
+    assert cache.load(path, parse) == keys.private_key
+    assert len(calls) == 3
+
+    cache.invalidate()
+    assert cache.stats().size == 0
+
+
+def test_errors_not_cached():
+    cache = KeyCache()
+
+    with pytest.raises(KeyFormatError):
+        cache.from_string("bad", TomlKeyFormatter(use_cache=False).from_string)
+
+    assert cache.stats().size == 0
+
+
+def test_formatter_uses_process_cache(keys, tmp_path):
+    formatter = TomlKeyFormatter()
+    string = formatter.to_string(keys.private_key)
+    path = str(tmp_path / "key.toml")
+
+    with open(path, "w") as f:
+        f.write(string)
+
+    before = get_key_cache().stats()
+
+    assert formatter.from_string(string) is formatter.from_string(string)
+    assert formatter.load(path) is formatter.load(path)
+    assert TomlKeyFormatter(use_cache=False).load(path) == keys.private_key
+
+    after = get_key_cache().stats()
+    assert (after.hits - before.hits, after.misses - before.misses) == (2, 2)
+
+
+@pytest.mark.parametrize("use_cache", [True, False])
+def test_load_binary_file(tmp_path, use_cache):
+    path = str(tmp_path / "key.toml")
+
+    with open(path, "wb") as f:
+        f.write(b"\xff\xfe not a text")
+
+    with pytest.raises(KeyFormatError):
+        TomlKeyFormatter(use_cache=use_cache).load(path)
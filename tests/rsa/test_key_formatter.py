@@ -0,0 +1,78 @@
+import pytest
+
+from kiv_bit_rsa.rsa import Rsa, TomlKeyFormatter, BinaryKeyFormatter, KeyFormatError, PrivateKey, PublicKey
+from kiv_bit_rsa.rsa import detect_key_formatter, load_key
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+def test_toml_roundtrip(keys):
+    formatter = TomlKeyFormatter()
+
+    public = formatter.from_string(formatter.to_string(keys.public_key))
+    private = formatter.from_string(formatter.to_string(keys.private_key))
+
+    assert isinstance(public, PublicKey)
+    assert (public.exp, public.mod) == (keys.public_key.exp, keys.public_key.mod)
+
+    assert isinstance(private, PrivateKey)
+    assert private.has_crt
+    assert (private.exp, private.mod, private.p, private.q) == \
+           (keys.private_key.exp, keys.private_key.mod, keys.private_key.p, keys.private_key.q)
+
+
+def test_toml_without_crt(keys):
+    string = '[rsa-key]\ntype = "private"\nexp = {}\nmod = {}\n'.format(keys.private_key.exp, keys.private_key.mod)
+    private = TomlKeyFormatter().from_string(string)
+
+    assert not private.has_crt
+    assert private.decrypt(12345) == keys.private_key.decrypt(12345)
+
+
+def test_toml_bad_format():
+    with pytest.raises(KeyFormatError):
+        TomlKeyFormatter().from_string('[rsa-key]\ntype = "secret"\nexp = 1\nmod = 2\n')
+
+    with pytest.raises(KeyFormatError):
+        TomlKeyFormatter().from_string('not a key')
+
+
+def test_binary_roundtrip(keys):
+    formatter = BinaryKeyFormatter()
+    plain = PrivateKey(keys.private_key.exp, keys.private_key.mod)
+
+    for key in (keys.public_key, keys.private_key, plain):
+        data = formatter.to_bytes(key)
+        loaded = formatter.from_bytes(data)
+
+        assert data.startswith(BinaryKeyFormatter.MAGIC)
+        assert type(loaded) is type(key) and loaded == key
+        assert isinstance(loaded, PublicKey) or loaded.has_crt == key.has_crt
+        assert formatter.from_string(formatter.to_string(key)) == key
+
+
+def test_binary_bad_format(keys):
+    formatter = BinaryKeyFormatter()
+    data = formatter.to_bytes(keys.private_key)
+
+    for bad in (b"", data[:-1], data + b"\x00", b"XXXX" + data[4:], data[:4] + b"\x02" + data[5:], b"KBRK"):
+        with pytest.raises(KeyFormatError):
+            formatter.from_bytes(bad)
+
+    with pytest.raises(KeyFormatError):
+        formatter.from_string("not base64!")
+
+
+def test_detect_format(keys):
+    for formatter in (TomlKeyFormatter(), BinaryKeyFormatter()):
+        for key in (keys.public_key, keys.private_key):
+            data = formatter.to_bytes(key)
+
+            assert type(detect_key_formatter(data)) is type(formatter)
+            assert load_key(data) == key
+
+    with pytest.raises(KeyFormatError):
+        load_key(b"\xff\xfe garbage")
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.rsa.rsa import DecryptError
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512, 65537)
+
+
+@pytest.fixture(scope="module")
+def messages(keys):
+    return [os.urandom(i) for i in range(Rsa().block_size(keys.public_key) + 1)]
+
+
+def test_encrypt_many_matches_encrypt(keys, messages):
+    rsa = Rsa()
+
+    assert rsa.encrypt_many(messages, keys.public_key) == [rsa.encrypt(m, keys.public_key) for m in messages]
+
+    with pytest.raises(OverflowError):
+        rsa.encrypt_many([bytes(keys.public_key.byte_size() - 2)], keys.public_key)
+
+
+def test_decrypt_many(keys, messages):
+    rsa = Rsa()
+    ciphers = rsa.encrypt_many(messages, keys.public_key)
+
+    assert rsa.decrypt_many(ciphers, keys.private_key) == messages
+    assert rsa.decrypt_many([memoryview(c) for c in ciphers], keys.private_key) == messages
+
+    with pytest.raises(DecryptError):
+        rsa.decrypt_many([ciphers[0][:-1]], keys.private_key)
+
+    with pytest.raises(DecryptError):
+        rsa.decrypt_many([b"\xff" * len(ciphers[0])], keys.private_key)
+
+    with pytest.raises(DecryptError):
+        rsa.decrypt_many(ciphers, keys.public_key)
+
+
+@pytest.mark.parametrize("buffer_type", [bytearray, lambda n: memoryview(bytearray(n))])
+def test_many_into(keys, messages, buffer_type):
+    rsa = Rsa()
+    size = keys.public_key.byte_size()
+    ciphers = buffer_type(1 + len(messages) * size)
+
+    assert rsa.encrypt_many_into(messages, keys.public_key, ciphers, 1) == len(messages) * size
+    assert bytes(ciphers[0:1]) == b"\x00"
+
+    views = [memoryview(ciphers)[1 + i * size:1 + (i + 1) * size] for i in range(len(messages))]
+    plaintext = buffer_type(sum(map(len, messages)))
+    lengths = rsa.decrypt_many_into(views, keys.private_key, plaintext)
+
+    assert lengths == [len(m) for m in messages]
+    assert bytes(plaintext) == b"".join(messages)
+
+    with pytest.raises(ValueError):
+        rsa.encrypt_many_into(messages, keys.public_key, buffer_type(size))
+
+    with pytest.raises(ValueError):
+        rsa.decrypt_many_into(views, keys.private_key, buffer_type(1))
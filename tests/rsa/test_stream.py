@@ -0,0 +1,123 @@
+import io
+import os
+
+import pytest
+
+from kiv_bit_rsa import parallel
+from kiv_bit_rsa.rsa import Rsa, rsa as rsa_module
+from kiv_bit_rsa.rsa.rsa import DecryptError
+from kiv_bit_rsa.rsa.stream import read_blocks
+
+
+class ShortReader(io.RawIOBase):
+    """Reader returning at most 3 bytes per read, like a pipe."""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._data.read(min(size, 3))
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512, 65537)
+
+
+def test_read_blocks():
+    assert list(read_blocks(io.BytesIO(b"abcdefg"), 3)) == [b"abc", b"def", b"g"]
+    assert list(read_blocks(io.BytesIO(b""), 3)) == []
+    assert list(read_blocks(ShortReader(b"abcdefghij"), 4)) == [b"abcd", b"efgh", b"ij"]
+
+
+@pytest.mark.parametrize("size", [0, 1, 60, 61, 62, 1000])
+def test_file_roundtrip(keys, size):
+    rsa = Rsa()
+    message = os.urandom(size)
+    cipher = io.BytesIO()
+
+    written = rsa.encrypt_file(io.BytesIO(message), cipher, keys.public_key)
+
+    blocks = max(1, -(-size // rsa.block_size(keys.public_key)))
+    assert written == len(cipher.getvalue()) == blocks * keys.public_key.byte_size()
+
+    plaintext = io.BytesIO()
+    rsa.decrypt_file(io.BytesIO(cipher.getvalue()), plaintext, keys.private_key)
+
+    assert plaintext.getvalue() == message
+
+
+def test_single_block_compatible(keys):
+    rsa = Rsa()
+    cipher = io.BytesIO()
+
+    rsa.encrypt_file(io.BytesIO(b"Hello world!"), cipher, keys.public_key)
+
+    assert rsa.decrypt(cipher.getvalue(), keys.private_key) == b"Hello world!"
+
+
+def test_truncated(keys):
+    rsa = Rsa()
+    cipher = io.BytesIO()
+
+    rsa.encrypt_file(io.BytesIO(os.urandom(200)), cipher, keys.public_key)
+
+    with pytest.raises(DecryptError):
+        rsa.decrypt_file(io.BytesIO(cipher.getvalue()[:-1]), io.BytesIO(), keys.private_key)
+
+
+def test_truncated_whole_block(keys):
+    # the blocks are independent, a missing whole block is not detected
+    rsa = Rsa()
+    message = os.urandom(200)
+    cipher = io.BytesIO()
+    plaintext = io.BytesIO()
+
+    rsa.encrypt_file(io.BytesIO(message), cipher, keys.public_key)
+    rsa.decrypt_file(io.BytesIO(cipher.getvalue()[:-keys.public_key.byte_size()]), plaintext, keys.private_key)
+
+    block_size = rsa.block_size(keys.public_key)
+    assert plaintext.getvalue() == message[:(len(message) - 1) // block_size * block_size]
+
+
+@pytest.mark.parametrize("size", [0, 61, 10000])
+def test_parallel_matches_sequential(keys, size):
+    rsa = Rsa()
+    message = os.urandom(size)
+    blocks = list(read_blocks(io.BytesIO(message), rsa.block_size(keys.public_key)))
+
+    ciphers = list(rsa.encrypt_stream(blocks, keys.private_key, workers=2))
+    assert ciphers == list(rsa.encrypt_stream(blocks, keys.private_key))
+
+    assert b"".join(rsa.decrypt_stream(ciphers, keys.public_key, workers=2)) == message
+
+
+def test_parallel_file_roundtrip(keys):
+    rsa = Rsa()
+    message = os.urandom(20000)
+    cipher = io.BytesIO()
+    plaintext = io.BytesIO()
+
+    rsa.encrypt_file(io.BytesIO(message), cipher, keys.public_key, workers=2)
+    rsa.decrypt_file(io.BytesIO(cipher.getvalue()), plaintext, keys.private_key, workers=2)
+
+    assert plaintext.getvalue() == message
+
+    with pytest.raises(DecryptError):
+        rsa.decrypt_file(io.BytesIO(cipher.getvalue()[:-1]), io.BytesIO(), keys.private_key, workers=2)
+
+
+def test_single_cpu_does_not_keep_key(keys, monkeypatch):
+    # workers=None on a single CPU runs the pool work in this process
+    monkeypatch.setattr(parallel.os, "cpu_count", lambda: 1)
+    rsa = Rsa()
+
+    ciphers = list(rsa.encrypt_stream([b"a", b"b"], keys.public_key, workers=None))
+    assert list(rsa.decrypt_stream(ciphers, keys.private_key, workers=None)) == [b"a", b"b"]
+
+    # the key is not kept after the work, even when it was stopped early
+    next(iter(rsa.decrypt_stream(ciphers, keys.private_key, workers=None)))
+    assert rsa_module._worker_key is None and rsa_module._worker_rsa is None
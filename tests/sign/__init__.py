@@ -0,0 +1,2 @@
+"""Tests for the sign module.
+"""
\ No newline at end of file
@@ -0,0 +1,88 @@
+import io
+import os
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import Signature, TreeSignature, SignableTree, signable_file, TomlSignatureFormatter
+from kiv_bit_rsa.sign import ManifestError, read_manifest, verify_many
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+@pytest.fixture
+def tree(tmp_path, keys):
+    formatter = TomlSignatureFormatter()
+
+    for i, size in enumerate([10, 5000, 300]):
+        path = tmp_path / "file{}".format(i)
+        path.write_bytes(os.urandom(size))
+
+        with open(str(path), "rb") as f:
+            signature = Signature.sign(signable_file(f), Md5, keys.private_key)
+
+        (tmp_path / "file{}.sig".format(i)).write_bytes(formatter.to_bytes(signature))
+
+    path = str(tmp_path / "file3")
+    open(path, "wb").write(os.urandom(20000))
+    signature = TreeSignature.sign(SignableTree(path, 4096, 1), Md5, keys.private_key)
+    (tmp_path / "file3.sig").write_bytes(formatter.to_bytes(signature))
+
+    return tmp_path
+
+
+def test_read_manifest():
+    manifest = io.StringIO("# comment\n\na b\tb.sig\n/abs\t/abs.sig\r\n")
+
+    assert read_manifest(manifest, "base") == [("base/a b", "base/b.sig"), ("/abs", "/abs.sig")]
+
+    with pytest.raises(ManifestError):
+        read_manifest(io.StringIO("file only\n"))
+
+    with pytest.raises(ManifestError):
+        read_manifest(io.StringIO("a\tb\tc\n"))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_verify_many(tree, keys, workers):
+    (tree / "file2").write_bytes(b"tampered")
+    (tree / "bad.sig").write_bytes(b"not a signature")
+
+    entries = [(str(tree / "file{}".format(i)), str(tree / "file{}.sig".format(i))) for i in range(4)]
+    entries += [(str(tree / "missing"), str(tree / "file0.sig")), (str(tree / "file0"), str(tree / "bad.sig"))]
+
+    results = list(verify_many(entries, keys.public_key, workers))
+
+    sizes = [r.size or 0 for r in results]
+    assert sizes == sorted(sizes, reverse=True)
+    assert os.path.basename(results[0].file) == "file3"
+
+    by_file = {(os.path.basename(r.file), os.path.basename(r.signature)): r for r in results}
+
+    assert by_file["file0", "file0.sig"].verified
+    assert by_file["file1", "file1.sig"].verified
+    assert by_file["file3", "file3.sig"].verified
+    assert not by_file["file2", "file2.sig"].verified and by_file["file2", "file2.sig"].error is None
+    assert not by_file["missing", "file0.sig"].verified and by_file["missing", "file0.sig"].error
+    assert not by_file["file0", "bad.sig"].verified and by_file["file0", "bad.sig"].error
+    assert by_file["file1", "file1.sig"].to_dict()["size"] == 5000
+
+
+def test_verify_many_wrong_key_without_fingerprint(tree, keys):
+    formatter = TomlSignatureFormatter()
+    signature = formatter.from_bytes((tree / "file0.sig").read_bytes())
+    other = Rsa().generate_keys(512)
+
+    # the cipher of a wrong key may be even too big for the modulus of the key
+    overflow = Signature(signature.hash_method, other.public_key.mod.to_bytes(64, "big"))
+    (tree / "overflow.sig").write_bytes(formatter.to_bytes(overflow))
+    (tree / "file0.sig").write_bytes(formatter.to_bytes(Signature(signature.hash_method, signature.hash_cipher)))
+
+    entries = [(str(tree / "file0"), str(tree / "file0.sig")), (str(tree / "file0"), str(tree / "overflow.sig"))]
+
+    for result in verify_many(entries, other.public_key, 1):
+        assert not result.verified and result.error is None
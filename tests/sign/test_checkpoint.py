@@ -0,0 +1,112 @@
+import hashlib
+import io
+
+import pytest
+import toml
+
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.sign import Checkpoint, CheckpointFormatError, SignableIncrementalIO, TomlCheckpointFormatter
+
+
+def _checkpoint(data):
+    signable = SignableIncrementalIO(io.BytesIO(data))
+    signable.hash(Md5)
+    return signable.checkpoint
+
+
+def test_resume_appended():
+    data = bytes(range(256)) * 100
+    checkpoint = _checkpoint(data[:10000])
+
+    signable = SignableIncrementalIO(io.BytesIO(data), checkpoint)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(data).digest()
+    assert signable.resumed
+    assert signable.checkpoint.size == len(data)
+
+
+def test_resume_truncated():
+    data = bytes(range(256)) * 100
+    checkpoint = _checkpoint(data)
+
+    signable = SignableIncrementalIO(io.BytesIO(data[:1000]), checkpoint)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(data[:1000]).digest()
+    assert not signable.resumed
+
+
+def test_resume_rewritten():
+    data = bytes(range(256)) * 100
+    checkpoint = _checkpoint(data)
+    rewritten = data[:-10] + b"x" * 10 + b"appended"
+
+    signable = SignableIncrementalIO(io.BytesIO(rewritten), checkpoint)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(rewritten).digest()
+    assert not signable.resumed
+
+
+def test_toml_formatter():
+    formatter = TomlCheckpointFormatter()
+    checkpoint = formatter.from_string(formatter.to_string(_checkpoint(b"Hello world!" * 100)))
+
+    data = b"Hello world!" * 110
+    signable = SignableIncrementalIO(io.BytesIO(data), checkpoint)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(data).digest()
+    assert signable.resumed
+
+
+def test_resume_replaced(tmp_path):
+    data = bytes(range(256)) * 100
+    path = tmp_path / "file"
+    path.write_bytes(data)
+
+    with open(str(path), "rb") as file:
+        checkpoint = SignableIncrementalIO(file)
+        checkpoint.hash(Md5)
+        checkpoint = TomlCheckpointFormatter().from_string(TomlCheckpointFormatter().to_string(checkpoint.checkpoint))
+
+    # same content, new inode
+    replaced = data + b"appended"
+    other = tmp_path / "other"
+    other.write_bytes(replaced)
+    other.replace(path)
+
+    with open(str(path), "rb") as file:
+        signable = SignableIncrementalIO(file, checkpoint)
+        assert signable.hash(Md5).to_bytes() == hashlib.md5(replaced).digest()
+        assert not signable.resumed
+
+
+def test_resume_rewritten_middle():
+    data = bytes(range(256)) * 100
+    checkpoint = _checkpoint(data)
+    rewritten = data[:10000] + b"x" * 10 + data[10010:] + b"appended"
+
+    signable = SignableIncrementalIO(io.BytesIO(rewritten), checkpoint)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(rewritten).digest()
+    assert not signable.resumed
+
+
+def test_resume_rewritten_large():
+    data = bytes(range(256)) * 1100
+    checkpoint = _checkpoint(data)
+
+    # the first, the last and a middle guard window
+    for offset in [0, Checkpoint._guard_offsets(len(data))[32] + 100, len(data) - 1]:
+        rewritten = data[:offset] + b"x" + data[offset + 1:] + b"appended"
+        signable = SignableIncrementalIO(io.BytesIO(rewritten), checkpoint)
+
+        assert signable.hash(Md5).to_bytes() == hashlib.md5(rewritten).digest()
+        assert not signable.resumed
+
+
+def test_toml_formatter_size_mismatch():
+    formatter = TomlCheckpointFormatter()
+    doc = toml.loads(formatter.to_string(_checkpoint(b"Hello world!" * 100)))
+    doc["checkpoint"]["size"] += 64
+
+    with pytest.raises(CheckpointFormatError):
+        formatter.from_string(toml.dumps(doc))
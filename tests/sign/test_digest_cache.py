@@ -0,0 +1,150 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5, HashlibMd5
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import DigestCache, DigestCacheError, Signature, SignableCachedFile, signable_file
+
+
+def test_get_put(tmp_path):
+    path = str(tmp_path / "cache.db")
+    stat = os.stat(str(tmp_path))
+
+    with DigestCache(path) as cache:
+        assert cache.get(stat, "MD5") is None
+
+        cache.put(stat, "MD5", b"digest")
+
+        assert cache.get(stat, "MD5") == b"digest"
+        assert cache.get(stat, "SHA") is None
+
+        stats = cache.stats()
+        assert (stats.hits, stats.misses, stats.size) == (1, 2, 1)
+
+    with DigestCache(path) as cache:
+        assert cache.get(stat, "MD5") == b"digest"
+
+    # the cache is a single file, the journal exists only during a write
+    assert os.listdir(str(tmp_path)) == ["cache.db"]
+
+
+def test_hits_are_flushed(tmp_path):
+    path = str(tmp_path / "cache.db")
+    stat = os.stat(str(tmp_path))
+
+    with DigestCache(path) as cache:
+        cache.put(stat, "MD5", b"digest")
+
+    used = sqlite3.connect(path).execute("SELECT used FROM digests").fetchone()[0]
+
+    with DigestCache(path) as cache:
+        assert cache.get(stat, "MD5") == b"digest"
+        # the use time of a hit is not written before the flush
+        assert sqlite3.connect(path).execute("SELECT used FROM digests").fetchone()[0] == used
+
+    assert sqlite3.connect(path).execute("SELECT used FROM digests").fetchone()[0] > used
+
+
+def test_eviction(tmp_path):
+    paths = []
+
+    for i in range(12):
+        paths.append(tmp_path / "file{}".format(i))
+        paths[-1].write_bytes(bytes(i))
+
+    with DigestCache(str(tmp_path / "cache.db"), 10) as cache:
+        for path in paths[:10]:
+            cache.put(os.stat(str(path)), "MD5", b"x")
+
+        # refresh the first entry, so the second is the least recently used
+        assert cache.get(os.stat(str(paths[0])), "MD5") == b"x"
+
+        cache.put(os.stat(str(paths[10])), "MD5", b"x")
+
+        assert cache.stats().size == 9
+        assert cache.get(os.stat(str(paths[0])), "MD5") == b"x"
+        assert cache.get(os.stat(str(paths[1])), "MD5") is None
+        assert cache.get(os.stat(str(paths[2])), "MD5") is None
+        assert cache.get(os.stat(str(paths[10])), "MD5") == b"x"
+
+
+def test_bad_file(tmp_path):
+    path = tmp_path / "cache.db"
+    path.write_bytes(b"not a database" * 100)
+
+    with pytest.raises(DigestCacheError):
+        DigestCache(str(path))
+
+
+def _age(path):
+    """Set the modification time of a file out of the racy window."""
+
+    past = time.time() - 60
+    os.utime(str(path), (past, past))
+
+
+def test_signable_cached_file(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"Hello world!")
+    _age(path)
+
+    with DigestCache(str(tmp_path / "cache.db")) as cache:
+        with open(str(path), "rb") as file:
+            signable = signable_file(file, cache)
+            assert isinstance(signable, SignableCachedFile)
+            assert signable.digest(Md5) == hashlib.md5(b"Hello world!").digest()
+
+        assert cache.stats().size == 1
+
+        # the digest of an unchanged file comes from the cache
+        with open(str(path), "rb") as file:
+            assert signable_file(file, cache).digest(HashlibMd5) == hashlib.md5(b"Hello world!").digest()
+
+        assert cache.stats().hits == 1
+
+        path.write_bytes(b"Hello world?")
+
+        with open(str(path), "rb") as file:
+            assert signable_file(file, cache).digest(Md5) == hashlib.md5(b"Hello world?").digest()
+
+        assert cache.stats().hits == 1
+
+
+def test_racy_file_not_cached(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"Hello world!")
+
+    with DigestCache(str(tmp_path / "cache.db")) as cache:
+        # a write in the same timestamp tick would not change the modification time
+        with open(str(path), "rb") as file:
+            assert signable_file(file, cache).digest(Md5) == hashlib.md5(b"Hello world!").digest()
+
+        assert cache.stats().size == 0
+
+        _age(path)
+
+        with open(str(path), "rb") as file:
+            assert signable_file(file, cache).digest(Md5) == hashlib.md5(b"Hello world!").digest()
+
+        assert cache.stats().size == 1
+
+
+def test_signature_with_cache(tmp_path):
+    keys = Rsa().generate_keys(512)
+    path = tmp_path / "file"
+    path.write_bytes(os.urandom(10000))
+    _age(path)
+
+    with DigestCache(str(tmp_path / "cache.db")) as cache:
+        with open(str(path), "rb") as file:
+            signature = Signature.sign(signable_file(file, cache), Md5, keys.private_key)
+
+        for _ in range(2):
+            with open(str(path), "rb") as file:
+                assert signature.verify(signable_file(file, cache), keys.public_key)
+
+        assert cache.stats().hits == 2
@@ -0,0 +1,102 @@
+import hashlib
+import io
+import os
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import DigestCacheError, signable_file, sign_directory, verify_directory, walk_files
+from kiv_bit_rsa.sign import directory
+from kiv_bit_rsa.sign.directory import MANIFEST_HEADER, escape_path, relative_exclude
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "c").mkdir()
+    (tmp_path / "a").mkdir()
+    (tmp_path / "z.txt").write_bytes(b"z")
+    (tmp_path / "b" / "x").write_bytes(os.urandom(5000))
+    (tmp_path / "b" / "c" / "tab\tname").write_bytes(b"")
+    (tmp_path / "a" / "y").write_bytes(b"y" * 100)
+
+    for i in range(100):
+        (tmp_path / "a" / "many{:03}".format(i)).write_bytes(bytes([i]))
+
+    return tmp_path
+
+
+def test_walk_files(tree):
+    files = list(walk_files(str(tree)))
+
+    assert files[0] == "z.txt"
+    assert files[1:101] == ["a/many{:03}".format(i) for i in range(100)]
+    assert files[101:] == ["a/y", "b/x", "b/c/tab\tname"]
+    assert list(walk_files(str(tree), {"a/y", "z.txt"})) == files[1:101] + files[102:]
+
+
+def test_escape_path():
+    assert escape_path("a\\b\tc\nd\re") == "a\\\\b\\tc\\nd\\re"
+
+
+def test_relative_exclude(tree):
+    assert relative_exclude(str(tree), [str(tree / "a" / "m"), None, str(tree) + ".manifest"]) == {"a/m"}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sign_directory(tree, keys, workers):
+    manifest = io.BytesIO()
+    signature = sign_directory(str(tree), manifest, Md5, keys.private_key, workers)
+
+    lines = manifest.getvalue().decode("utf8").splitlines()
+
+    assert lines[:2] == [MANIFEST_HEADER, "# hash-method: MD5"]
+    assert len(lines) == 2 + 104
+    assert lines[2] == "{}\t1\tz.txt".format(hashlib.md5(b"z").hexdigest())
+    assert lines[-1] == "{}\t0\tb/c/tab\\tname".format(hashlib.md5(b"").hexdigest())
+
+    # the signature is an ordinary signature of the manifest
+    assert signature.verify(signable_file(io.BytesIO(manifest.getvalue())), keys.public_key)
+
+    assert verify_directory(str(tree), signature, keys.public_key, workers)
+
+
+def test_verify_directory_detects_changes(tree, keys):
+    signature = sign_directory(str(tree), io.BytesIO(), Md5, keys.private_key, 1)
+
+    (tree / "a" / "new").write_bytes(b"")
+    assert not verify_directory(str(tree), signature, keys.public_key, 1)
+    assert verify_directory(str(tree), signature, keys.public_key, 1, {"a/new"})
+
+    (tree / "b" / "x").write_bytes(b"changed")
+    assert not verify_directory(str(tree), signature, keys.public_key, 1, {"a/new"})
+
+    other = Rsa().generate_keys(512)
+    assert not verify_directory(str(tree), signature, other.public_key, 1, {"a/new"})
+
+
+def test_directory_with_digest_cache(tree, keys, tmp_path_factory):
+    cache = str(tmp_path_factory.mktemp("cache") / "cache.db")
+
+    signature = sign_directory(str(tree), io.BytesIO(), Md5, keys.private_key, 1, digest_cache=cache)
+
+    # the cache opened in this process is closed when the walk is done
+    assert directory._worker_digest_cache is None
+    assert verify_directory(str(tree), signature, keys.public_key, 1, digest_cache=cache)
+
+    (tree / "b" / "x").write_bytes(b"changed")
+    assert not verify_directory(str(tree), signature, keys.public_key, 1, digest_cache=cache)
+
+
+def test_directory_with_bad_digest_cache(tree, keys, tmp_path_factory):
+    cache = tmp_path_factory.mktemp("cache") / "cache.db"
+    cache.write_bytes(b"not a database" * 100)
+
+    with pytest.raises(DigestCacheError):
+        sign_directory(str(tree), io.BytesIO(), Md5, keys.private_key, 2, digest_cache=str(cache))
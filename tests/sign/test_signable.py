@@ -0,0 +1,97 @@
+import hashlib
+import io
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5, HashlibMd5
+from kiv_bit_rsa.sign import SignableBinaryIO, SignableMmapFile, signable_file
+
+
+def test_hash():
+    data = b"Hello world!" * 100
+    signable = SignableBinaryIO(io.BytesIO(data))
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(data).digest()
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(data).digest()
+
+
+def test_hash_is_copy():
+    signable = SignableBinaryIO(io.BytesIO(b"Hello"))
+    signable.hash(Md5).update(b" world!")
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(b"Hello").digest()
+
+
+def test_hash_prefix():
+    header = b"common header " * 10
+    prefix = Md5(header)
+
+    for body in (b"", b"first", b"second" * 100):
+        signable = SignableBinaryIO(io.BytesIO(body), prefix=prefix)
+        assert signable.hash(Md5).to_bytes() == hashlib.md5(header + body).digest()
+
+    assert prefix.to_bytes() == hashlib.md5(header).digest()
+
+
+def test_hash_prefix_other_class():
+    signable = SignableBinaryIO(io.BytesIO(b"body"), prefix=Md5(b"header"))
+
+    with pytest.raises(ValueError):
+        signable.hash(HashlibMd5)
+
+    assert signable.hash(Md5).to_bytes() == hashlib.md5(b"headerbody").digest()
+
+    with pytest.raises(ValueError):
+        signable.hash(HashlibMd5)
+
+
+def test_hash_buffer_size():
+    data = bytes(range(256)) * 100
+
+    for buffer_size in (1, 63, 64, 1000, 1 << 20):
+        signable = SignableBinaryIO(io.BytesIO(data), buffer_size=buffer_size)
+        assert signable.hash(Md5).to_bytes() == hashlib.md5(data).digest()
+
+
+def test_hash_mmap(tmp_path):
+    data = bytes(range(256)) * 100
+
+    for content in (data, b""):
+        path = tmp_path / "file"
+        path.write_bytes(content)
+
+        with open(str(path), "rb") as file:
+            signable = signable_file(file)
+            assert isinstance(signable, SignableMmapFile)
+            assert signable.hash(Md5).to_bytes() == hashlib.md5(content).digest()
+
+
+def test_signable_file_stream():
+    assert isinstance(signable_file(io.BytesIO(b"Hello")), SignableBinaryIO)
+
+
+def test_hash_class_is_respected():
+    signable = SignableBinaryIO(io.BytesIO(b"Hello"))
+
+    assert type(signable.hash(Md5)) is Md5
+    assert type(signable.hash(HashlibMd5)) is HashlibMd5
+    assert signable.hash(HashlibMd5).to_bytes() == hashlib.md5(b"Hello").digest()
+
+
+def test_hash_class_unseekable_stream():
+    class Stream(io.RawIOBase):
+        def __init__(self):
+            self._data = io.BytesIO(b"Hello")
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            return self._data.readinto(buffer)
+
+    signable = SignableBinaryIO(Stream())
+
+    assert signable.digest(Md5) == hashlib.md5(b"Hello").digest()
+
+    with pytest.raises(ValueError):
+        signable.hash(HashlibMd5)
@@ -0,0 +1,79 @@
+import io
+
+import pytest
+
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import Signature, TreeSignature, SignableBinaryIO, SignableTree, HashTree
+from kiv_bit_rsa.sign import TomlSignatureFormatter, BinarySignatureFormatter, SignatureFormatError
+from kiv_bit_rsa.sign import detect_signature_formatter, load_signature
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+@pytest.fixture(scope="module")
+def other_keys():
+    return Rsa().generate_keys(512)
+
+
+def sign(keys, data=b"Hello world!"):
+    return Signature.sign(SignableBinaryIO(io.BytesIO(data)), Md5, keys.private_key)
+
+
+def test_fingerprint(keys, other_keys):
+    signature = sign(keys)
+
+    assert signature.key_fingerprint == keys.public_key.fingerprint()
+    assert signature.verify(SignableBinaryIO(io.BytesIO(b"Hello world!")), keys.public_key)
+    assert not signature.verify(SignableBinaryIO(io.BytesIO(b"Hello world!")), other_keys.public_key)
+
+    # signatures without the fingerprint are still verified
+    anonymous = Signature(Md5, signature.hash_cipher)
+    assert anonymous.verify(SignableBinaryIO(io.BytesIO(b"Hello world!")), keys.public_key)
+
+
+@pytest.mark.parametrize("formatter", [TomlSignatureFormatter(), BinarySignatureFormatter()])
+def test_roundtrip(keys, formatter):
+    for signature in (sign(keys), Signature(Md5, sign(keys).hash_cipher)):
+        data = formatter.to_bytes(signature)
+        loaded = load_signature(data)
+
+        assert type(detect_signature_formatter(data)) is type(formatter)
+        assert loaded.hash_method.name() == "MD5"
+        assert loaded.hash_cipher == signature.hash_cipher
+        assert loaded.key_fingerprint == signature.key_fingerprint
+        assert formatter.from_string(formatter.to_string(signature)).hash_cipher == signature.hash_cipher
+
+
+@pytest.mark.parametrize("formatter", [TomlSignatureFormatter(), BinarySignatureFormatter()])
+def test_tree_roundtrip(keys, formatter, tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(bytes(range(256)) * 100)
+
+    signature = TreeSignature.sign(SignableTree(str(path), 1000, 1), Md5, keys.private_key)
+    loaded = formatter.from_bytes(formatter.to_bytes(signature))
+
+    assert isinstance(loaded, TreeSignature)
+    assert loaded.tree.leaf_size == 1000
+    assert loaded.tree.leaf_digests == signature.tree.leaf_digests
+    assert loaded.verify(SignableTree(str(path), 1000, 1), keys.public_key)
+
+
+def test_binary_bad_format(keys):
+    formatter = BinarySignatureFormatter()
+    data = formatter.to_bytes(sign(keys))
+
+    for bad in (b"", data[:-1], data + b"\x00", b"XXXX" + data[4:], data[:5] + b"\x09" + data[6:], b"KBRS"):
+        with pytest.raises(SignatureFormatError):
+            formatter.from_bytes(bad)
+
+    tree = TreeSignature(Md5, data, HashTree(Md5, 10, [bytes(16)]))
+
+    with pytest.raises(SignatureFormatError):
+        formatter.from_bytes(formatter.to_bytes(tree)[:-1])
+
+    with pytest.raises(SignatureFormatError):
+        load_signature(b"\xff garbage")
@@ -0,0 +1,63 @@
+import pytest
+
+from kiv_bit_rsa.hash import Md5
+from kiv_bit_rsa.rsa import Rsa
+from kiv_bit_rsa.sign import HashTree, SignableTree, TreeSignature, TomlSignatureFormatter
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return Rsa().generate_keys(512)
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(bytes(range(256)) * 1000)
+    return str(path)
+
+
+def test_tree_leaves(path):
+    data = open(path, "rb").read()
+    tree = HashTree.compute(path, Md5, 10000, workers=2)
+
+    assert len(tree.leaf_digests) == 26
+    assert tree.leaf_digests[3] == Md5(data[30000:40000]).to_bytes()
+    assert tree.root().to_bytes() == HashTree.compute(path, Md5, 10000, workers=1).root().to_bytes()
+
+
+def test_sign_verify(path, keys):
+    signature = TreeSignature.sign(SignableTree(path, 10000, 2), Md5, keys.private_key)
+
+    assert signature.verify(SignableTree(path, 10000, 1), keys.public_key)
+    assert not signature.verify(SignableTree(path, 20000, 1), keys.public_key)
+
+    with open(path, "r+b") as file:
+        file.seek(123456)
+        file.write(b"x")
+
+    assert not signature.verify(SignableTree(path, 10000, 1), keys.public_key)
+
+
+def test_verify_range(path, keys):
+    signature = TreeSignature.sign(SignableTree(path, 10000, 1), Md5, keys.private_key)
+
+    with open(path, "r+b") as file:
+        file.seek(123456)
+        file.write(b"x")
+
+        assert signature.verify_range(file, keys.public_key, 0, 120000)
+        assert signature.verify_range(file, keys.public_key, 130000, 256000)
+        assert not signature.verify_range(file, keys.public_key, 120000, 130000)
+        assert not signature.verify_range(file, keys.public_key, 0, 300000)
+
+
+def test_toml_formatter(path, keys):
+    formatter = TomlSignatureFormatter()
+    signature = TreeSignature.sign(SignableTree(path, 10000, 1), Md5, keys.private_key)
+    loaded = formatter.from_string(formatter.to_string(signature))
+
+    assert isinstance(loaded, TreeSignature)
+    assert loaded.tree.leaf_size == 10000
+    assert loaded.tree.leaf_digests == signature.tree.leaf_digests
+    assert loaded.verify(SignableTree(path, 10000, 1), keys.public_key)